@@ -1,7 +1,28 @@
+from canonicalwebteam.blog.cache import ResponseCache  # noqa: F401
 from canonicalwebteam.blog.wordpress import (  # noqa: F401
     NotFoundError,
     Wordpress,
 )
+from canonicalwebteam.blog.article import LazyArticle  # noqa: F401
 from canonicalwebteam.blog.blog_api import BlogAPI  # noqa: F401
 from canonicalwebteam.blog.blueprint import build_blueprint  # noqa: F401
 from canonicalwebteam.blog.views import BlogViews  # noqa: F401
+from canonicalwebteam.blog.taxonomy import TaxonomyIndex  # noqa: F401
+from canonicalwebteam.blog.related import (  # noqa: F401
+    RelatedArticlesIndex,
+    RelatedArticlesTable,
+)
+from canonicalwebteam.blog.mirror import LocalMirror  # noqa: F401
+from canonicalwebteam.blog.prefetch import Prefetcher  # noqa: F401
+from canonicalwebteam.blog.poller import (  # noqa: F401
+    ChangePoller,
+    PostChanges,
+)
+from canonicalwebteam.blog.async_wordpress import (  # noqa: F401
+    AsyncWordpress,
+)
+from canonicalwebteam.blog.async_blog_api import AsyncBlogAPI  # noqa: F401
+from canonicalwebteam.blog.async_views import AsyncBlogViews  # noqa: F401
+from canonicalwebteam.blog.blueprint import (  # noqa: F401
+    build_async_blueprint,
+)
@@ -0,0 +1,156 @@
+# Standard library
+import threading
+
+
+class LazyArticle(dict):
+    def __init__(self, article):
+        """
+        An article whose expensive fields are only transformed when
+        they are first read, e.g. by a template, and then kept.
+
+        It is a dictionary, so templates, json and code reading articles
+        work as before. Reading a field, or all of them at once through
+        items(), values(), dict(), unpacking, copies and comparisons,
+        transforms it.
+
+        :param article: The article's fields
+        """
+
+        super().__init__(article)
+
+        self._pending = {}
+        self._lock = threading.RLock()
+
+    def defer(self, key, transform):
+        """
+        Transform a field when it is first read
+
+        :param key: The field, which doesn't need to exist yet
+        :param transform: Callable taking the current value of the field,
+            or None, and returning the new value. It is called once.
+        """
+
+        dict.__setitem__(self, key, dict.get(self, key))
+
+        self._pending[key] = transform
+
+    def fork(self):
+        """
+        Get a new LazyArticle with the same fields, whose pending fields
+        are read from this one, so they are only transformed once
+        however many forks read them. Fields can be set on a fork
+        without changing this article.
+        """
+
+        with self._lock:
+            fork = LazyArticle(dict(dict.items(self)))
+            pending = list(self._pending)
+
+        for key in pending:
+            fork.defer(key, lambda _, key=key: self[key])
+
+        return fork
+
+    def __getitem__(self, key):
+        self._resolve(key)
+
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        self._pending.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._pending.pop(key, None)
+        dict.__delitem__(self, key)
+
+    def __iter__(self):
+        # Without an __iter__ of its own, dict(), {**article} and
+        # keyword arguments copy the stored values, skipping __getitem__
+        return dict.__iter__(self)
+
+    def __eq__(self, other):
+        self._resolve_all()
+
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        self._resolve_all()
+
+        return dict.__ne__(self, other)
+
+    def __or__(self, other):
+        return self.copy() | other
+
+    def __ior__(self, other):
+        self.update(other)
+
+        return self
+
+    def __repr__(self):
+        self._resolve_all()
+
+        return f"LazyArticle({dict.__repr__(self)})"
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles are plain, fully transformed dictionaries
+        return (dict, (self.copy(),))
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def items(self):
+        self._resolve_all()
+
+        return dict.items(self)
+
+    def values(self):
+        self._resolve_all()
+
+        return dict.values(self)
+
+    def copy(self):
+        self._resolve_all()
+
+        return dict.copy(self)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._resolve(key)
+            self._pending.pop(key, None)
+
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        self._resolve_all()
+
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def _resolve(self, key):
+        if key not in self._pending:
+            return
+
+        with self._lock:
+            transform = self._pending.get(key)
+
+            if transform is None:
+                return
+
+            # Stored before it stops being pending, so other threads
+            # only read it without the lock once it is transformed
+            dict.__setitem__(self, key, transform(dict.__getitem__(self, key)))
+            del self._pending[key]
+
+    def _resolve_all(self):
+        for key in list(self._pending):
+            self._resolve(key)
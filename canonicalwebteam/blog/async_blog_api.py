@@ -0,0 +1,118 @@
+# Local
+from canonicalwebteam.blog.async_wordpress import AsyncWordpress
+from canonicalwebteam.blog.blog_api import BlogAPI
+
+
+class AsyncBlogAPI(AsyncWordpress, BlogAPI):
+    """
+    Asyncio counterpart to BlogAPI, taking the same arguments and
+    transforming articles the same way
+    """
+
+    async def get_articles(
+        self,
+        tags=None,
+        tags_exclude=None,
+        exclude=None,
+        categories=None,
+        sticky=None,
+        before=None,
+        after=None,
+        author=None,
+        groups=None,
+        per_page=12,
+        page=1,
+        status=None,
+        fields=None,
+        cursor=None,
+        include=None,
+    ):
+        arguments = (
+            tags,
+            tags_exclude,
+            exclude,
+            categories,
+            sticky,
+            before,
+            after,
+            author,
+            groups,
+            per_page,
+            page,
+            status,
+            fields,
+            cursor,
+            include,
+        )
+
+        if self.mirror:
+            articles, metadata = self.mirror.get_articles(*arguments)
+        else:
+            articles, metadata = await super().get_articles(*arguments)
+
+        return (
+            [self._get_transformed_article(a) for a in articles],
+            metadata,
+        )
+
+    async def get_article(
+        self,
+        slug,
+        tags=None,
+        tags_exclude=None,
+        status=None,
+        fields=None,
+    ):
+        if self.mirror:
+            article = self.mirror.get_article(
+                slug, tags, tags_exclude, status, fields
+            )
+        else:
+            article = await super().get_article(
+                slug, tags, tags_exclude, status, fields
+            )
+
+        if not article:
+            return {}
+
+        return self._get_transformed_article(article)
+
+    async def get_tag_by_id(self, id):
+        term = self._get_mirrored_term("tags", id=id)
+
+        return term or await super().get_tag_by_id(id)
+
+    async def get_tag_by_slug(self, slug):
+        term = self._get_mirrored_term("tags", slug=slug)
+
+        return term or await super().get_tag_by_slug(slug)
+
+    async def get_group_by_slug(self, slug):
+        term = self._get_mirrored_term("group", slug=slug)
+
+        return term or await super().get_group_by_slug(slug)
+
+    async def get_group_by_id(self, id):
+        term = self._get_mirrored_term("group", id=id)
+
+        return term or await super().get_group_by_id(id)
+
+    async def get_category_by_slug(self, slug):
+        term = self._get_mirrored_term("categories", slug=slug)
+
+        return term or await super().get_category_by_slug(slug)
+
+    async def get_category_by_id(self, id):
+        term = self._get_mirrored_term("categories", id=id)
+
+        return term or await super().get_category_by_id(id)
+
+    async def get_user_by_username(self, username):
+        term = self._get_mirrored_term("users", slug=username)
+
+        return term or await super().get_user_by_username(username)
+
+    async def get_user_by_id(self, id):
+        term = self._get_mirrored_term("users", id=id)
+
+        return term or await super().get_user_by_id(id)
@@ -0,0 +1,471 @@
+# Standard library
+import asyncio
+from functools import partial
+
+# Packages
+import flask
+
+# Local
+from .views import FEATURED_COUNT, MERGED_LATEST_FIELDS, BlogViews
+
+
+async def _skip():
+    return None
+
+
+class AsyncBlogViews(BlogViews):
+    """
+    Asyncio counterpart to BlogViews, taking an AsyncBlogAPI and
+    gathering independent API calls with asyncio.gather
+
+    The API calls and contexts come from the same helpers as in
+    BlogViews, with the API calls returning awaitables.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if self.taxonomy is not None:
+            self._terms = _AsyncTerms(self.taxonomy, self.api)
+
+    async def _gather(self, *awaitables):
+        """
+        Await independent API calls concurrently
+
+        :param awaitables: Awaitables, or None to skip
+
+        :returns: List of the results in the same order, None for skipped
+        """
+
+        return await asyncio.gather(
+            *[
+                awaitable if awaitable is not None else _skip()
+                for awaitable in awaitables
+            ]
+        )
+
+    async def get_index(self, page=1, category_slug="", cursor=None):
+        categories = []
+        events_and_webinars = []
+        featured_articles = []
+
+        # Pages reached by cursor are never the first
+        first_page = page == 1 and not cursor
+        merge = first_page and self._can_merge_index_queries()
+        get_featured = self._get_featured_query(page)
+
+        category_resolved, featured, events, webinars = await self._gather(
+            (
+                self._terms.get_category_by_slug(category_slug)
+                if category_slug
+                else None
+            ),
+            get_featured() if first_page and not merge else None,
+            self._terms.get_category_by_slug("events") if first_page else None,
+            (
+                self._terms.get_category_by_slug("webinars")
+                if first_page
+                else None
+            ),
+        )
+
+        if category_resolved:
+            categories.append(category_resolved.get("id", ""))
+
+        if featured:
+            featured_articles, _ = featured
+
+        get_articles = self._get_listing_query(
+            page, cursor, categories=categories, status=self.status
+        )
+        get_events_and_webinars = (
+            self._get_events_and_webinars_query(page, 3, events, webinars)()
+            if first_page
+            else None
+        )
+
+        # The articles are fetched along with the featured articles,
+        # with a few more to drop the featured ones from locally
+        if merge:
+            featured, (articles, metadata), events_and_webinars_result = (
+                await self._gather(
+                    get_featured(),
+                    get_articles(per_page=self.per_page + FEATURED_COUNT),
+                    get_events_and_webinars,
+                )
+            )
+            featured_articles, _ = featured
+            articles, metadata = self._exclude_articles(
+                articles, metadata, featured_articles, categories
+            )
+        else:
+            (articles, metadata), events_and_webinars_result = (
+                await self._gather(
+                    get_articles(
+                        exclude=[
+                            article["id"] for article in featured_articles
+                        ]
+                    ),
+                    get_events_and_webinars,
+                )
+            )
+
+        if events_and_webinars_result:
+            events_and_webinars, _ = events_and_webinars_result
+
+        context = self._get_listing_context(
+            page,
+            articles,
+            metadata,
+            featured_articles=featured_articles,
+            events_and_webinars=events_and_webinars,
+            category={"slug": category_slug},
+        )
+        self._prefetch_listing(
+            partial(self.get_index, category_slug=category_slug),
+            page,
+            cursor,
+            context,
+        )
+
+        return context
+
+    async def get_index_feed(self, uri, path):
+        return self.render_feed(await self.get_index_feed_context())
+
+    async def get_index_feed_context(self):
+        articles, _ = await self._get_feed_query()()
+
+        return self._get_feed_context(
+            self.blog_title, articles, flask.request.url_root
+        )
+
+    async def get_article(self, slug):
+        article = await self.api.get_article(
+            slug,
+            self.tag_ids,
+            self.excluded_tags,
+            self.status,
+        )
+
+        if not article:
+            return {}
+
+        return await self._get_article_context(
+            article, self.tag_ids, self.excluded_tags
+        )
+
+    async def get_latest_article(self):
+        articles, _ = await self.api.get_articles(
+            tags=self.tag_ids,
+            tags_exclude=self.excluded_tags,
+            page=1,
+            per_page=1,
+        )
+
+        if not articles:
+            return {}
+
+        return await self._get_article_context(
+            articles[0], self.tag_ids, self.excluded_tags
+        )
+
+    async def get_group(
+        self, group_slug, page=1, category_slug=None, cursor=None
+    ):
+        categories = None
+        group, category = await self._gather(
+            self._terms.get_group_by_slug(group_slug),
+            (
+                self._terms.get_category_by_slug(category_slug)
+                if category_slug
+                else None
+            ),
+        )
+
+        if category_slug:
+            categories = [category.get("id", "")]
+
+        articles, metadata = await self._get_listing_query(
+            page,
+            cursor,
+            groups=[group.get("id", "")],
+            categories=categories,
+        )()
+
+        return self._get_listing_context(
+            page,
+            articles,
+            metadata,
+            group=group,
+            category={"slug": category_slug},
+        )
+
+    async def get_group_feed(self, group_slug, uri, path):
+        context = await self.get_group_feed_context(group_slug)
+
+        return self.render_feed(context) if context else None
+
+    async def get_group_feed_context(self, group_slug):
+        group = await self._terms.get_group_by_slug(group_slug)
+
+        if not group:
+            return None
+
+        articles, _ = await self._get_feed_query(
+            groups=[group.get("id", "")]
+        )()
+
+        return self._get_feed_context(
+            f"{group['name']} - {self.blog_title}",
+            articles,
+            flask.request.url_root,
+            group=group,
+        )
+
+    async def get_topic(self, topic_slug, page=1, cursor=None):
+        tag = await self._terms.get_tag_by_slug(topic_slug)
+        tag_ids = [tag["id"]] if tag else []
+
+        articles, metadata = await self._get_listing_query(
+            page, cursor, tags=self.tag_ids + tag_ids
+        )()
+
+        return self._get_listing_context(page, articles, metadata)
+
+    async def get_topic_feed(self, topic_slug, uri, path):
+        context = await self.get_topic_feed_context(topic_slug)
+
+        return self.render_feed(context) if context else None
+
+    async def get_topic_feed_context(self, topic_slug):
+        tag = await self._terms.get_tag_by_slug(topic_slug)
+
+        if not tag:
+            return None
+
+        articles, _ = await self._get_feed_query(tags=[tag["id"]])()
+
+        return self._get_feed_context(
+            f"{tag['name']} - {self.blog_title}",
+            articles,
+            flask.request.url_root.rstrip("/"),
+            tag=tag,
+        )
+
+    async def get_events_and_webinars(self, page=1, cursor=None):
+        events, webinars = await self._gather(
+            self._terms.get_category_by_slug("events"),
+            self._terms.get_category_by_slug("webinars"),
+        )
+
+        articles, metadata = await self._get_events_and_webinars_query(
+            page, self.per_page, events, webinars, cursor=cursor
+        )()
+
+        return self._get_listing_context(page, articles, metadata)
+
+    async def get_author(self, username, page=1, cursor=None):
+        author = await self._terms.get_user_by_username(username)
+
+        if not author:
+            return None
+
+        articles, metadata = await self._get_listing_query(
+            page, cursor, author=author["id"]
+        )()
+
+        context = self._get_listing_context(
+            page,
+            articles,
+            metadata,
+            total_posts=metadata.get("total_posts", 0),
+            author=author,
+        )
+        self._prefetch_listing(
+            partial(self.get_author, username), page, cursor, context
+        )
+
+        return context
+
+    async def get_author_feed(self, username, uri, path):
+        context = await self.get_author_feed_context(username)
+
+        return self.render_feed(context) if context else None
+
+    async def get_author_feed_context(self, username):
+        author = await self._terms.get_user_by_username(username)
+
+        if not author:
+            return None
+
+        articles, _ = await self._get_feed_query(author=author["id"])()
+
+        return self._get_feed_context(
+            f"{author['name']} - {self.blog_title}",
+            articles,
+            flask.request.url_root,
+            author=author,
+        )
+
+    async def get_latest_news(self, limit=3, tag_ids=None, group_ids=None):
+        limit = int(limit)
+        get_pinned, get_latest = self._get_latest_news_queries(
+            limit, tag_ids, group_ids
+        )
+
+        if self.merge_queries:
+            # One query instead of two, and a second round trip only
+            # when the pinned article isn't among the latest ones
+            latest_articles, _ = await get_latest(fields=MERGED_LATEST_FIELDS)
+            latest_pinned_articles = self._pick_pinned_articles(
+                latest_articles, limit
+            )
+
+            if latest_pinned_articles is None:
+                latest_pinned_articles, _ = await get_pinned()
+        else:
+            (latest_pinned_articles, _), (latest_articles, _) = (
+                await self._gather(get_pinned(), get_latest())
+            )
+
+        return self._get_latest_news_context(
+            latest_pinned_articles, latest_articles, limit
+        )
+
+    async def get_archives(
+        self, page=1, group="", month="", year="", category="", cursor=None
+    ):
+        groups = []
+        categories = []
+        category_slugs = category.split(",") if category else []
+
+        group, resolved_categories = await self._gather(
+            self._terms.get_group_by_slug(group) if group else None,
+            (
+                self._terms.get_categories_by_slugs(category_slugs)
+                if category_slugs
+                else None
+            ),
+        )
+
+        if group is not None:
+            if not group:
+                return None
+
+            groups.append(group["id"])
+
+        for category in resolved_categories or []:
+            categories.append(category["id"])
+
+        after, before = self._get_archive_dates(year, month)
+
+        articles, metadata = await self._get_listing_query(
+            page,
+            cursor,
+            groups=groups,
+            categories=categories,
+            after=after,
+            before=before,
+        )()
+
+        return self._get_archives_context(page, articles, metadata, group)
+
+    async def get_tag(self, slug, page=1, cursor=None):
+        tag = await self._terms.get_tag_by_slug(slug)
+
+        if not tag:
+            return None
+
+        articles, metadata = await self._get_listing_query(
+            page, cursor, tags=[tag["id"]], status=self.status
+        )()
+
+        context = self._get_listing_context(
+            page,
+            articles,
+            metadata,
+            total_posts=metadata.get("total_posts", 0),
+            tag=tag,
+        )
+        self._prefetch_listing(
+            partial(self.get_tag, slug), page, cursor, context
+        )
+
+        return context
+
+    def _prefetch(self, key, function):
+        # Prefetches run in an event loop of their own, on the
+        # prefetcher's threads, where only a client from the API's
+        # session_factory can be used
+        if getattr(self.api, "session_factory", None) is None:
+            return
+
+        super()._prefetch(key, lambda: asyncio.run(function()))
+
+    async def _get_article_context(
+        self, article, related_tag_ids=[], excluded_tags=[]
+    ):
+        """
+        Build the content for the article page
+        :param article: Article to create context for
+        """
+
+        tags = article["_embedded"].get("wp:term", [{}, {}])[1]
+
+        all_related_articles = self._get_local_related_articles(
+            article, tags, related_tag_ids, excluded_tags
+        )
+
+        if all_related_articles is None:
+            all_related_articles, _ = await self._get_related_query(
+                article, tags, excluded_tags
+            )()
+
+        return self._build_article_context(
+            article, tags, all_related_articles, related_tag_ids
+        )
+
+
+class _AsyncTerms:
+    """
+    Look up terms in a TaxonomyIndex, awaiting the views' asynchronous
+    API for the ones missing from it, rather than the index's own API
+    """
+
+    def __init__(self, taxonomy, api):
+        self.taxonomy = taxonomy
+        self.api = api
+
+    async def get_category_by_slug(self, slug):
+        term = self.taxonomy.lookup("categories", "slug", slug)
+
+        return term or await self.api.get_category_by_slug(slug)
+
+    async def get_tag_by_slug(self, slug):
+        term = self.taxonomy.lookup("tags", "slug", slug)
+
+        return term or await self.api.get_tag_by_slug(slug)
+
+    async def get_group_by_slug(self, slug):
+        term = self.taxonomy.lookup("group", "slug", slug)
+
+        return term or await self.api.get_group_by_slug(slug)
+
+    async def get_user_by_username(self, username):
+        user = self.taxonomy.lookup("users", "slug", username)
+
+        return user or await self.api.get_user_by_username(username)
+
+    async def get_categories_by_slugs(self, slugs):
+        terms = {
+            slug: self.taxonomy.lookup("categories", "slug", slug)
+            for slug in slugs
+        }
+        missing = [slug for slug, term in terms.items() if not term]
+
+        if missing:
+            for term in await self.api.get_categories_by_slugs(missing):
+                terms[term["slug"]] = term
+
+        return [terms[slug] for slug in slugs if terms.get(slug)]
@@ -0,0 +1,441 @@
+# Standard library
+import asyncio
+import threading
+import weakref
+
+# Local
+from .constants import (
+    CATEGORY_FIELDS,
+    TAG_FIELDS,
+    USER_FIELDS,
+    DEFAULT_POST_FIELDS,
+    POST_DETAILS_FIELDS,
+)
+from .dependencies import get_response_tags
+from .wordpress import NotFoundError, Wordpress
+
+
+class AsyncWordpress(Wordpress):
+    def __init__(self, session=None, *args, session_factory=None, **kwargs):
+        """
+        Asyncio counterpart to the Wordpress API object, with the same
+        methods returning awaitables
+
+        The session must be an asynchronous HTTP client whose request
+        method is a coroutine, e.g. httpx.AsyncClient. Such clients
+        belong to the event loop they were first used in, so to call
+        the API from more than one loop, like Flask does with a new loop
+        for each request, pass session_factory instead of a session.
+
+        :param session_factory: Callable returning a new asynchronous
+            HTTP client, called once for each event loop
+        """
+
+        super().__init__(session, *args, **kwargs)
+
+        self.session_factory = session_factory
+
+        if self.session is None and session_factory is None:
+            raise TypeError("Either a session or session_factory is needed")
+
+        # Tasks and clients can only be used within their own event loop
+        self._tasks_by_loop = weakref.WeakKeyDictionary()
+        self._sessions_by_loop = weakref.WeakKeyDictionary()
+        self._refresh_loop = None
+
+    async def request(
+        self,
+        endpoint,
+        params={},
+        method="get",
+        embed=True,
+        fields=None,
+        cached=True,
+    ):
+        """
+        Build url to fetch articles from Wordpress api
+        :param endpoint: The REST endpoint to fetch data from
+        :param params: Dictionary of parameter keys and their values
+        :param embed: Whether to request embedded resources via _embed=true
+        :param fields: Optional list or comma-separated
+                        string of fields to include
+        :param cached: Whether the response can come from, and be stored
+                        in, the cache
+
+        :returns: Response from Wordpress api
+        """
+
+        url, key = self._build_url(endpoint, params, embed, fields)
+
+        if method.lower() != "get" or not cached:
+            return await self._fetch(method, url)
+
+        if self.cache is None:
+            return await self._coalesce(key, lambda: self._fetch(method, url))
+
+        entry = self.cache.get_entry(key, include_expired=True)
+
+        if entry is None or not entry.is_usable():
+            return await self._coalesce(
+                key,
+                lambda: self._fetch_into_cache(
+                    key, endpoint, params, method, url, entry
+                ),
+            )
+
+        if not entry.is_fresh():
+            if self.session_factory is None:
+                # The session is tied to this loop, which may not outlive
+                # the request, so refresh the stale copy before serving it
+                return await self._coalesce(
+                    key,
+                    lambda: self._fetch_into_cache(
+                        key, endpoint, params, method, url, entry
+                    ),
+                )
+
+            self._refresh_in_background(
+                key, endpoint, params, method, url, entry
+            )
+
+        return entry.value
+
+    def _refresh_in_background(
+        self, key, endpoint, params, method, url, previous
+    ):
+        """
+        Refetch an expired response on an event loop running for as
+        long as the API object, on its own thread, so the stale copy
+        can be served in the meantime. Only one refresh runs per key.
+        """
+
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+
+            self._refreshing.add(key)
+
+            if self._refresh_loop is None:
+                self._refresh_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._refresh_loop.run_forever,
+                    name="blog-refresh",
+                    daemon=True,
+                ).start()
+
+        async def refresh():
+            try:
+                await self._coalesce(
+                    key,
+                    lambda: self._fetch_into_cache(
+                        key, endpoint, params, method, url, previous
+                    ),
+                )
+            except Exception:
+                # Keep serving the stale copy until it runs out
+                pass
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        asyncio.run_coroutine_threadsafe(refresh(), self._refresh_loop)
+
+    def _coalesce(self, key, make_call):
+        """
+        Share one task between all the concurrent calls for a key
+
+        :returns: A future for the result
+        """
+
+        tasks = self._get_tasks()
+        task = tasks.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(make_call())
+            tasks[key] = task
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+
+        # Don't let one cancelled caller cancel the call for everyone
+        return asyncio.shield(task)
+
+    def _get_tasks(self):
+        loop = asyncio.get_running_loop()
+
+        if loop not in self._tasks_by_loop:
+            self._tasks_by_loop[loop] = {}
+
+        return self._tasks_by_loop[loop]
+
+    def _get_session(self):
+        """
+        Get the client to make requests with from the running loop
+        """
+
+        if self.session_factory is None:
+            return self.session
+
+        loop = asyncio.get_running_loop()
+
+        if loop not in self._sessions_by_loop:
+            session = self.session_factory()
+            self._prepare_session(session)
+            self._sessions_by_loop[loop] = session
+
+        return self._sessions_by_loop[loop]
+
+    async def _fetch(self, method, url, headers=None):
+        session = self._get_session()
+
+        if headers:
+            response = await session.request(method, url, headers=headers)
+        else:
+            response = await session.request(method, url)
+
+        # Asynchronous clients like httpx raise for anything but a 2xx,
+        # so let revalidated responses through before checking
+        if response.status_code == 304 and headers:
+            return response
+
+        response.raise_for_status()
+
+        return response
+
+    async def _fetch_into_cache(
+        self, key, endpoint, params, method, url, previous=None
+    ):
+        response = await self._fetch(
+            method, url, self._conditional_headers(previous)
+        )
+
+        if response.status_code == 304 and previous is not None:
+            response = previous.value
+
+        self.cache.set(
+            key,
+            response,
+            size=len(response.content),
+            ttl=self.cache.get_ttl(endpoint),
+            tags=get_response_tags(endpoint, params, response.json()),
+        )
+
+        return response
+
+    async def get_first_item(
+        self, endpoint, params={}, embed=True, fields=None
+    ):
+        response = await self.request(
+            endpoint, params, embed=embed, fields=fields
+        )
+
+        if len(response.json()) == 0:
+            raise NotFoundError(f"No items returned from {response.url}")
+
+        return response.json()[0]
+
+    async def get_all_pages(
+        self, endpoint, params={}, embed=False, fields=None, cached=True
+    ):
+        items = []
+        page = 1
+
+        while True:
+            response = await self.request(
+                endpoint,
+                {**params, "per_page": 100, "page": page},
+                embed=embed,
+                fields=fields,
+                cached=cached,
+            )
+            items.extend(response.json())
+
+            total_pages = int(response.headers.get("X-WP-TotalPages") or 1)
+
+            if page >= total_pages:
+                return items
+
+            page += 1
+
+    async def get_articles(
+        self,
+        tags=None,
+        tags_exclude=None,
+        exclude=None,
+        categories=None,
+        sticky=None,
+        before=None,
+        after=None,
+        author=None,
+        groups=None,
+        per_page=12,
+        page=1,
+        status=None,
+        fields=None,
+        cursor=None,
+        include=None,
+    ):
+        params = self._get_articles_params(
+            tags,
+            tags_exclude,
+            exclude,
+            categories,
+            sticky,
+            before,
+            after,
+            author,
+            groups,
+            per_page,
+            page,
+            status,
+            cursor,
+            include,
+        )
+        fields = fields if fields else DEFAULT_POST_FIELDS
+        response = await self.request("posts", params, fields=fields)
+        articles, metadata = self._parse_articles_response(
+            response, per_page, cursor, params["per_page"]
+        )
+        wider_params = self._get_wider_params(
+            response, articles, per_page, cursor, params
+        )
+
+        if wider_params:
+            response = await self.request("posts", wider_params, fields=fields)
+            articles, metadata = self._parse_articles_response(
+                response, per_page, cursor, wider_params["per_page"]
+            )
+
+        return articles, metadata
+
+    async def get_article(
+        self,
+        slug,
+        tags=None,
+        tags_exclude=None,
+        status=None,
+        fields=None,
+    ):
+        try:
+            return await self.get_first_item(
+                "posts",
+                {
+                    "slug": slug,
+                    "tags": tags,
+                    "tags_exclude": tags_exclude,
+                    "status": status,
+                },
+                fields=(fields if fields else POST_DETAILS_FIELDS),
+            )
+        except NotFoundError:
+            return {}
+
+    async def get_tag_by_id(self, id):
+        response = await self.request(
+            f"tags/{id}", embed=False, fields=TAG_FIELDS
+        )
+
+        return response.json()
+
+    async def get_tag_by_slug(self, slug):
+        try:
+            return await self.get_first_item(
+                "tags", {"slug": slug}, embed=False, fields=TAG_FIELDS
+            )
+        except NotFoundError:
+            return {}
+
+    async def get_tag_by_name(self, name):
+        try:
+            return await self.get_first_item(
+                "tags", {"search": name}, embed=False, fields=TAG_FIELDS
+            )
+        except NotFoundError:
+            return {}
+
+    async def get_categories(self):
+        response = await self.request(
+            "categories",
+            {"per_page": 100},
+            embed=False,
+            fields=CATEGORY_FIELDS,
+        )
+
+        return response.json()
+
+    async def get_group_by_slug(self, slug):
+        try:
+            return await self.get_first_item(
+                "group", {"slug": slug}, embed=False, fields=CATEGORY_FIELDS
+            )
+        except NotFoundError:
+            return {}
+
+    async def get_group_by_id(self, id):
+        response = await self.request(
+            f"group/{str(id)}", embed=False, fields=CATEGORY_FIELDS
+        )
+
+        return response.json()
+
+    async def get_category_by_slug(self, slug):
+        try:
+            return await self.get_first_item(
+                "categories",
+                {"slug": slug},
+                embed=False,
+                fields=CATEGORY_FIELDS,
+            )
+        except NotFoundError:
+            return {}
+
+    async def get_category_by_id(self, id):
+        response = await self.request(
+            f"categories/{str(id)}", embed=False, fields=CATEGORY_FIELDS
+        )
+
+        return response.json()
+
+    async def get_media(self, id):
+        response = await self.request(f"media/{str(id)}", embed=False)
+
+        return response.json()
+
+    async def get_user_by_username(self, username):
+        try:
+            return await self.get_first_item(
+                "users", {"slug": username}, embed=False, fields=USER_FIELDS
+            )
+        except NotFoundError:
+            return {}
+
+    async def get_user_by_id(self, id):
+        response = await self.request(
+            f"users/{str(id)}", embed=False, fields=USER_FIELDS
+        )
+
+        return response.json()
+
+    async def _get_items_by(self, endpoint, key, values, fields=None):
+        if key == "id":
+            values = [int(value) for value in values]
+
+        values = list(dict.fromkeys(values))
+        items = {}
+        requests = []
+
+        for start in range(0, len(values), 100):
+            chunk = values[start : start + 100]  # noqa: E203
+            params = {"include" if key == "id" else "slug": chunk}
+
+            # Wordpress returns 10 items per page by default
+            if len(chunk) > 10:
+                params["per_page"] = len(chunk)
+
+            requests.append(
+                self.request(endpoint, params, embed=False, fields=fields)
+            )
+
+        for response in await asyncio.gather(*requests):
+            for item in response.json():
+                items[item[key]] = item
+
+        return [items[value] for value in values if value in items]
@@ -1,15 +1,18 @@
 # Standard library
+import json
 import re
 import html
 from datetime import date
 from datetime import datetime
 
 # Packages
-from bs4 import BeautifulSoup
 from canonicalwebteam import image_template
 
 # Local
 from canonicalwebteam.blog import Wordpress
+from canonicalwebteam.blog.article import LazyArticle
+from canonicalwebteam.blog.cache import ResponseCache
+from canonicalwebteam.blog.rewriter import rewrite_images
 
 
 class BlogAPI(Wordpress):
@@ -22,15 +25,37 @@ class BlogAPI(Wordpress):
         thumbnail_height=185,
         wordpress_username=None,
         wordpress_password=None,
+        cache=None,
+        mirror=None,
+        transform_cache=None,
+        image_cache=None,
     ):
+        """
+        :param mirror: Optional LocalMirror to answer get_articles,
+            get_article and the single term and user lookups from,
+            instead of the Wordpress API
+        :param transform_cache: Optional ResponseCache to keep transformed
+            articles in, for each article revision
+        :param image_cache: ResponseCache to keep image template markup
+            in, defaults to one holding 4096 images for a day
+        """
+
         super().__init__(
-            session, api_url, wordpress_username, wordpress_password
+            session, api_url, wordpress_username, wordpress_password, cache
         )
 
+        self.mirror = mirror
+        self.transform_cache = transform_cache
+        self.image_cache = image_cache
         self.use_image_template = use_image_template
         self.thumbnail_width = thumbnail_width
         self.thumbnail_height = thumbnail_height
 
+        if self.image_cache is None:
+            self.image_cache = ResponseCache(
+                default_ttl=86400, max_entries=4096
+            )
+
     def get_articles(
         self,
         tags=None,
@@ -46,8 +71,11 @@ class BlogAPI(Wordpress):
         page=1,
         status=None,
         fields=None,
+        cursor=None,
+        include=None,
     ):
-        articles, metadata = super().get_articles(
+        source = self.mirror or super()
+        articles, metadata = source.get_articles(
             tags,
             tags_exclude,
             exclude,
@@ -61,10 +89,12 @@ class BlogAPI(Wordpress):
             page,
             status,
             fields,
+            cursor,
+            include,
         )
 
         return (
-            [self._transform_article(a) for a in articles],
+            [self._get_transformed_article(a) for a in articles],
             metadata,
         )
 
@@ -76,12 +106,119 @@ class BlogAPI(Wordpress):
         status=None,
         fields=None,
     ):
-        article = super().get_article(slug, tags, tags_exclude, status, fields)
+        source = self.mirror or super()
+        article = source.get_article(slug, tags, tags_exclude, status, fields)
 
         if not article:
             return {}
 
-        return self._transform_article(article)
+        return self._get_transformed_article(article)
+
+    def get_tag_by_id(self, id):
+        term = self._get_mirrored_term("tags", id=id)
+
+        return term or super().get_tag_by_id(id)
+
+    def get_tag_by_slug(self, slug):
+        term = self._get_mirrored_term("tags", slug=slug)
+
+        return term or super().get_tag_by_slug(slug)
+
+    def get_group_by_slug(self, slug):
+        term = self._get_mirrored_term("group", slug=slug)
+
+        return term or super().get_group_by_slug(slug)
+
+    def get_group_by_id(self, id):
+        term = self._get_mirrored_term("group", id=id)
+
+        return term or super().get_group_by_id(id)
+
+    def get_category_by_slug(self, slug):
+        term = self._get_mirrored_term("categories", slug=slug)
+
+        return term or super().get_category_by_slug(slug)
+
+    def get_category_by_id(self, id):
+        term = self._get_mirrored_term("categories", id=id)
+
+        return term or super().get_category_by_id(id)
+
+    def get_user_by_username(self, username):
+        term = self._get_mirrored_term("users", slug=username)
+
+        return term or super().get_user_by_username(username)
+
+    def get_user_by_id(self, id):
+        term = self._get_mirrored_term("users", id=id)
+
+        return term or super().get_user_by_id(id)
+
+    def invalidate(self, tags):
+        removed = super().invalidate(tags)
+
+        if self.transform_cache is not None:
+            removed += self.transform_cache.invalidate_tags(tags)
+
+        return removed
+
+    def _get_mirrored_term(self, taxonomy, slug=None, id=None):
+        """
+        Look a term or user up in the mirror, if there is one. Terms
+        created since it was last synced are left to Wordpress.
+
+        :returns: The term, or an empty dictionary
+        """
+
+        if not self.mirror:
+            return {}
+
+        if slug is not None:
+            return self.mirror.get_term_by_slug(taxonomy, slug)
+
+        return self.mirror.get_term_by_id(taxonomy, id)
+
+    def _get_transformed_article(self, article):
+        """
+        Transform an article, or get a fork of the same revision
+        transformed before from the transform cache. The revision is
+        identified by its id, modified_gmt and which fields it has.
+
+        :param article: The raw article object
+
+        :returns: The transformed article, which the caller can set
+            fields on
+        """
+
+        if (
+            self.transform_cache is None
+            or "id" not in article
+            or "modified_gmt" not in article
+        ):
+            return self._transform_article(article)
+
+        key = (
+            f"{article['id']}:{article['modified_gmt']}:"
+            f"{self.use_image_template}:"
+            f"{self.thumbnail_width}x{self.thumbnail_height}:"
+            f"{','.join(sorted(article))}"
+        )
+        cached = self.transform_cache.get(key)
+
+        # Forks share the fields transformed so far, and transform the
+        # rest only once, when some caller first reads them
+        if cached is not None:
+            return cached.fork()
+
+        transformed = self._transform_article(article)
+        self.transform_cache.set(
+            key,
+            transformed,
+            size=len(json.dumps(article)),
+            tags=[f"post:{article['id']}"],
+        )
+
+        return transformed.fork()
 
     def _transform_article(self, article):
         """Transform article to include featured image, a group, human readable
@@ -89,9 +226,13 @@ class BlogAPI(Wordpress):
 
         :param article: The raw article object
 
-        :returns: The transformed article
+        :returns: The transformed article, as a LazyArticle which
+            transforms the excerpt, content, image and meta description
+            when they are first read
         """
 
+        article = LazyArticle(article)
+
         if "_embedded" in article:
             article["image"] = article["_embedded"].get(
                 "wp:featuredmedia", [None]
@@ -116,23 +257,7 @@ class BlogAPI(Wordpress):
             article["date"] = article_date.strftime("%-d %B %Y")
 
         if "excerpt" in article and "rendered" in article["excerpt"]:
-            article["excerpt"]["raw"] = self._strip_excerpt(
-                article["excerpt"]["rendered"]
-            )[:340]
-
-            # If the excerpt doesn't end before 340 characters, add ellipsis
-            raw_article = article["excerpt"]["raw"]
-            # split at the last 3 characters
-            raw_article_start = raw_article[:-3]
-            raw_article_end = raw_article[-3:]
-            # for the last 3 characters replace any part of […]
-            raw_article_end = raw_article_end.replace("[", "")
-            raw_article_end = raw_article_end.replace("…", "")
-            raw_article_end = raw_article_end.replace("]", "")
-            # join it back up
-            article["excerpt"]["raw"] = "".join(
-                [raw_article_start, raw_article_end, " […]"]
-            )
+            article.defer("excerpt", self._transform_excerpt)
 
         if (
             article.get("_start_month")
@@ -156,48 +281,14 @@ class BlogAPI(Wordpress):
                 article["_end_day"], end_month_name, article["_end_year"]
             )
         if "content" in article:
-            # replace url on the blog article page
-            article["content"]["rendered"] = self._replace_url(
-                article["content"]["rendered"]
-            )
+            article.defer("content", self._transform_content)
 
         if (
             "image" in article
             and article["image"] is not None
             and "source_url" in article["image"]
         ):
-            # replace url from the image thumbnail
-            article["image"]["source_url"] = self._replace_url(
-                article["image"]["source_url"]
-            )
-
-            # create default rendered image
-            article["image"]["rendered"] = (
-                '<img src="'
-                + article["image"]["source_url"]
-                + '" loading="lazy">'
-            )
-
-        if self.use_image_template:
-            if "content" in article:
-                # apply image template for blog article images
-                article["content"]["rendered"] = self._apply_image_template(
-                    content=article["content"]["rendered"],
-                    width=720,
-                )
-
-            if "image" in article:
-                # apply image template to thumbnail image
-                if (
-                    article["image"] is not None
-                    and "source_url" in article["image"]
-                ):
-                    article["image"]["rendered"] = self._apply_image_template(
-                        content=article["image"]["rendered"],
-                        width=self.thumbnail_width,
-                        height=self.thumbnail_height,
-                        use_e_sharpen=True,
-                    )
+            article.defer("image", self._transform_image)
 
         # extract meta description from yoast_head_json
         yoast_head_json = article.get("yoast_head_json", {})
@@ -205,13 +296,84 @@ class BlogAPI(Wordpress):
         # even if the API returns an array
         if isinstance(yoast_head_json, list):
             yoast_head_json = {}
-        # if there is no meta description, use the excerpt
-        article["meta_description"] = yoast_head_json.get(
-            "description", article["excerpt"]["raw"]
-        )
+
+        if "description" in yoast_head_json:
+            article["meta_description"] = yoast_head_json["description"]
+        else:
+            # if there is no meta description, use the excerpt
+            article.defer(
+                "meta_description", lambda _: article["excerpt"]["raw"]
+            )
 
         return article
 
+    def _transform_excerpt(self, excerpt):
+        """Add a stripped version of the excerpt, of up to 340 characters
+
+        :param excerpt: The excerpt object, with the rendered excerpt
+
+        :returns: The excerpt object
+        """
+
+        excerpt["raw"] = self._strip_excerpt(excerpt["rendered"])[:340]
+
+        # If the excerpt doesn't end before 340 characters, add ellipsis
+        raw_article = excerpt["raw"]
+        # split at the last 3 characters
+        raw_article_start = raw_article[:-3]
+        raw_article_end = raw_article[-3:]
+        # for the last 3 characters replace any part of […]
+        raw_article_end = raw_article_end.replace("[", "")
+        raw_article_end = raw_article_end.replace("…", "")
+        raw_article_end = raw_article_end.replace("]", "")
+        # join it back up
+        excerpt["raw"] = "".join([raw_article_start, raw_article_end, " […]"])
+
+        return excerpt
+
+    def _transform_content(self, content):
+        """Replace urls on the blog article page, and apply image template
+        to the images in it
+
+        :param content: The content object, with the rendered content
+
+        :returns: The content object
+        """
+
+        if self.use_image_template:
+            # apply image template for blog article images, which
+            # replaces urls in the same pass
+            content["rendered"] = self._apply_image_template(
+                content=content["rendered"],
+                width=720,
+            )
+        else:
+            content["rendered"] = self._replace_url(content["rendered"])
+
+        return content
+
+    def _transform_image(self, image):
+        """Replace the url of the thumbnail image, and render it
+
+        :param image: The featured media object, with a source_url
+
+        :returns: The featured media object
+        """
+
+        # replace url from the image thumbnail
+        image["source_url"] = self._replace_url(image["source_url"])
+
+        # create default rendered image
+        image["rendered"] = (
+            '<img src="' + image["source_url"] + '" loading="lazy">'
+        )
+
+        if self.use_image_template:
+            # apply image template to thumbnail image
+            image["rendered"] = self._render_thumbnail(image)
+
+        return image
+
     def _replace_url(self, content):
         """Change insights url to ubuntu.com
 
@@ -247,7 +409,8 @@ class BlogAPI(Wordpress):
     def _apply_image_template(
         self, content, width, height=None, use_e_sharpen=False
     ):
-        """Apply image template to the img tags
+        """Apply image template to the img tags, and change insights urls
+        to ubuntu.com, in one pass over the HTML
 
         :param content: String to replace url
         :param width: Default width of the image
@@ -256,10 +419,9 @@ class BlogAPI(Wordpress):
         :returns: HTML images templated
         """
 
-        soup = BeautifulSoup(content, "html.parser")
-        for image in soup.findAll("img"):
-            if not image.get("src") or "http" not in image.get("src"):
-                continue
+        def template_image(image):
+            if not image.get("src") or "http" not in image["src"]:
+                return None
 
             # Try to get width from the 'width' attribute
             img_width = (
@@ -270,7 +432,7 @@ class BlogAPI(Wordpress):
             )
 
             # If not found, try to get width from the 'style' attribute
-            if img_width is None and image.has_attr("style"):
+            if img_width is None and "style" in image:
                 match = re.search(r"width\s*:\s*(\d+)px", image["style"])
                 if match:
                     img_width = match.group(1)
@@ -283,24 +445,78 @@ class BlogAPI(Wordpress):
             )
 
             # If not found, try to get height from the 'style' attribute
-            if img_height is None and image.has_attr("style"):
+            if img_height is None and "style" in image:
                 match = re.search(r"height\s*:\s*(\d+)px", image["style"])
                 if match:
                     img_height = match.group(1)
 
-            new_image = BeautifulSoup(
+            return self._render_image(
+                url=image["src"],
+                width=img_width or width,
+                height=img_height or height,
+                use_e_sharpen=use_e_sharpen,
+            )
+
+        return rewrite_images(content, template_image, self._replace_url)
+
+    def _render_thumbnail(self, image):
+        """Apply image template to the default rendered thumbnail image,
+        without parsing it when its src is an image URL
+
+        :param image: The featured media, with source_url and rendered
+
+        :returns: HTML image templated
+        """
+
+        # The src the rendered image would be parsed with
+        url = html.unescape(image["source_url"])
+
+        if "http" not in url:
+            return self._apply_image_template(
+                content=image["rendered"],
+                width=self.thumbnail_width,
+                height=self.thumbnail_height,
+                use_e_sharpen=True,
+            )
+
+        return self._render_image(
+            url=url,
+            width=self.thumbnail_width,
+            height=self.thumbnail_height,
+            use_e_sharpen=True,
+        )
+
+    def _render_image(self, url, width, height=None, use_e_sharpen=False):
+        """Render the image template for one image, or get the markup
+        rendered before from the image cache
+
+        :param url: The URL of the image
+        :param width: Width of the image
+        :param height: Height of the image
+
+        :returns: The image markup, written as it appears in articles
+        """
+
+        options = {
+            "e_sharpen": use_e_sharpen,
+            "hi_def": True,
+            "fill": True,
+            "loading": "lazy",
+        }
+        key = (
+            url,
+            str(width),
+            None if height is None else str(height),
+            *options.values(),
+        )
+        markup = self.image_cache.get(key)
+
+        if markup is None:
+            markup = rewrite_images(
                 image_template(
-                    url=image.get("src"),
-                    alt="",
-                    width=img_width or width,
-                    height=img_height or height,
-                    hi_def=True,
-                    fill=True,
-                    e_sharpen=use_e_sharpen,
-                    loading="lazy",
-                ),
-                "html.parser",
+                    url=url, alt="", width=width, height=height, **options
+                )
             )
-            image.replace_with(new_image)
+            self.image_cache.set(key, markup, size=len(markup.encode()))
 
-        return str(soup)
+        return markup
@@ -1,30 +1,76 @@
+# Standard library
+import functools
+import hmac
+from urllib.parse import urlencode
+
 # Packages
 import flask
+from werkzeug.http import is_resource_modified
+
+# Local
+from .cursor import decode_cursor
+from .dependencies import get_context_validators, record_context_tags
+from .poller import PostChanges
+
+
+def build_blueprint(
+    blog_views,
+    invalidation_secret=None,
+    surrogate_key_header="Surrogate-Key",
+    conditional_requests=False,
+    cache_control=None,
+):
+    """
+    :param invalidation_secret: If set, add a POST /invalidate route
+        for Wordpress to call when posts change, authenticated with
+        an "Authorization: Bearer <invalidation_secret>" header
+    :param surrogate_key_header: Header listing the dependency tags of
+        each response, for CDNs to purge by: "Surrogate-Key" (space
+        separated), "Cache-Tag" (comma separated) or None for neither
+    :param conditional_requests: Send ETag and Last-Modified headers
+        derived from the articles on each page, and answer requests
+        with the page's ETag in If-None-Match with 304 Not Modified,
+        before rendering it
+    :param cache_control: Cache-Control header for successful
+        responses, e.g. "public, max-age=60"
+    """
 
-
-def build_blueprint(blog_views):
     blueprint = flask.Blueprint("blog", __name__)
 
+    if surrogate_key_header:
+        _add_surrogate_keys(blueprint, surrogate_key_header)
+
+    _add_template_helpers(blueprint, blog_views)
+    _add_cache_headers(blueprint, cache_control)
+    _add_prefetching(blueprint)
+
+    if invalidation_secret:
+        _add_invalidation_route(blueprint, blog_views, invalidation_secret)
+
     @blueprint.route("/")
+    @_cache_page(blog_views, "page", "cursor", "category")
     def homepage():
         context = blog_views.get_index(
             page=flask.request.args.get("page", type=int) or 1,
             category_slug=flask.request.args.get("category") or "",
+            cursor=_get_cursor(),
         )
 
-        return flask.render_template("blog/index.html", **context)
+        return _render_template(
+            "blog/index.html", context, conditional_requests
+        )
 
     @blueprint.route("/feed")
+    @_cache_page(blog_views)
     def homepage_feed():
-        feed = blog_views.get_index_feed(
-            uri=flask.request.url_root, path=flask.request.path
-        )
+        context = blog_views.get_index_feed_context()
 
-        return flask.Response(feed, mimetype="application/rss+xml")
+        return _render_feed(blog_views, context, conditional_requests)
 
     @blueprint.route("/latest")
     def lastest_article():
         context = blog_views.get_latest_article()
+        record_context_tags(context)
 
         return flask.redirect(
             flask.url_for(".article", slug=context.get("article").get("slug"))
@@ -42,15 +88,19 @@ def build_blueprint(blog_views):
         return flask.redirect(flask.url_for(".article", slug=slug))
 
     @blueprint.route("/<slug>")
+    @_cache_page(blog_views)
     def article(slug):
         context = blog_views.get_article(slug)
 
         if not context:
             flask.abort(404, "Article not found")
 
-        return flask.render_template("blog/article.html", **context)
+        return _render_template(
+            "blog/article.html", context, conditional_requests
+        )
 
     @blueprint.route("/latest-news")
+    @_cache_page(blog_views, "tag-id", "group-id", "limit")
     def latest_news():
         context = blog_views.get_latest_news(
             tag_ids=flask.request.args.getlist("tag-id"),
@@ -58,32 +108,39 @@ def build_blueprint(blog_views):
             limit=flask.request.args.get("limit", "3"),
         )
 
-        return flask.jsonify(context)
+        return _respond(
+            context, lambda: flask.jsonify(context), conditional_requests
+        )
 
     @blueprint.route("/author/<username>")
+    @_cache_page(blog_views, "page", "cursor")
     def author(username):
         page_param = flask.request.args.get("page", default=1, type=int)
-        context = blog_views.get_author(username, page_param)
+        context = blog_views.get_author(
+            username, page_param, cursor=_get_cursor()
+        )
 
         if not context:
             flask.abort(404)
 
-        return flask.render_template("blog/author.html", **context)
+        return _render_template(
+            "blog/author.html", context, conditional_requests
+        )
 
     @blueprint.route("/author/<username>/feed")
+    @_cache_page(blog_views)
     def author_feed(username):
-        feed = blog_views.get_author_feed(
-            username=username,
-            uri=flask.request.url_root,
-            path=flask.request.path,
-        )
+        context = blog_views.get_author_feed_context(username)
 
-        if not feed:
+        if not context:
             flask.abort(404)
 
-        return flask.Response(feed, mimetype="application/rss+xml")
+        return _render_feed(blog_views, context, conditional_requests)
 
     @blueprint.route("/archives")
+    @_cache_page(
+        blog_views, "page", "cursor", "group", "month", "year", "category"
+    )
     def archives():
         page_param = flask.request.args.get("page", default=1, type=int)
         group_param = flask.request.args.get("group", default="", type=str)
@@ -94,78 +151,668 @@ def build_blueprint(blog_views):
         )
 
         context = blog_views.get_archives(
-            page_param, group_param, month_param, year_param, category_param
+            page_param,
+            group_param,
+            month_param,
+            year_param,
+            category_param,
+            cursor=_get_cursor(),
         )
 
         if not context:
             flask.abort(404)
 
-        return flask.render_template("blog/archives.html", **context)
+        return _render_template(
+            "blog/archives.html", context, conditional_requests
+        )
 
     @blueprint.route("/group/<slug>")
+    @_cache_page(blog_views, "page", "cursor", "category")
     def group(slug):
         page_param = flask.request.args.get("page", default=1, type=int)
         category_param = flask.request.args.get(
             "category", default="", type=str
         )
 
-        context = blog_views.get_group(slug, page_param, category_param)
+        context = blog_views.get_group(
+            slug, page_param, category_param, cursor=_get_cursor()
+        )
 
         if not context:
             flask.abort(404)
 
-        return flask.render_template("blog/group.html", **context)
+        return _render_template(
+            "blog/group.html", context, conditional_requests
+        )
 
     @blueprint.route("/group/<slug>/feed")
+    @_cache_page(blog_views)
     def group_feed(slug):
-        feed = blog_views.get_group_feed(
-            group_slug=slug,
-            uri=flask.request.url_root,
-            path=flask.request.path,
-        )
+        context = blog_views.get_group_feed_context(slug)
 
-        if not feed:
+        if not context:
             flask.abort(404)
 
-        return flask.Response(feed, mimetype="application/rss+xml")
+        return _render_feed(blog_views, context, conditional_requests)
 
     @blueprint.route("/topic/<slug>")
+    @_cache_page(blog_views, "page", "cursor")
     def topic(slug):
         page_param = flask.request.args.get("page", default=1, type=int)
-        context = blog_views.get_topic(slug, page_param)
+        context = blog_views.get_topic(slug, page_param, cursor=_get_cursor())
 
-        return flask.render_template("blog/topic.html", **context)
+        return _render_template(
+            "blog/topic.html", context, conditional_requests
+        )
 
     @blueprint.route("/topic/<slug>/feed")
+    @_cache_page(blog_views)
     def topic_feed(slug):
-        feed = blog_views.get_topic_feed(
-            topic_slug=slug,
-            uri=flask.request.url_root,
-            path=flask.request.path,
-        )
+        context = blog_views.get_topic_feed_context(slug)
 
-        if not feed:
+        if not context:
             flask.abort(404)
 
-        return flask.Response(feed, mimetype="application/rss+xml")
+        return _render_feed(blog_views, context, conditional_requests)
 
     @blueprint.route("/events-and-webinars")
+    @_cache_page(blog_views, "page", "cursor")
     def events_and_webinars():
         page_param = flask.request.args.get("page", default=1, type=int)
-        context = blog_views.get_events_and_webinars(page_param)
+        context = blog_views.get_events_and_webinars(
+            page_param, cursor=_get_cursor()
+        )
 
-        return flask.render_template(
-            "blog/events-and-webinars.html", **context
+        return _render_template(
+            "blog/events-and-webinars.html", context, conditional_requests
         )
 
     @blueprint.route("/tag/<slug>")
+    @_cache_page(blog_views, "page", "cursor")
     def tag(slug):
         page_param = flask.request.args.get("page", default=1, type=int)
-        context = blog_views.get_tag(slug, page_param)
+        context = blog_views.get_tag(slug, page_param, cursor=_get_cursor())
 
         if not context:
             flask.abort(404)
 
-        return flask.render_template("blog/tag.html", **context)
+        return _render_template("blog/tag.html", context, conditional_requests)
 
     return blueprint
+
+
+def build_async_blueprint(
+    blog_views,
+    invalidation_secret=None,
+    surrogate_key_header="Surrogate-Key",
+    conditional_requests=False,
+    cache_control=None,
+):
+    """
+    Build the same blueprint as build_blueprint with async def routes,
+    for an AsyncBlogViews. Flask needs the "async" extra for these.
+    """
+
+    blueprint = flask.Blueprint("blog", __name__)
+
+    if surrogate_key_header:
+        _add_surrogate_keys(blueprint, surrogate_key_header)
+
+    _add_template_helpers(blueprint, blog_views)
+    _add_cache_headers(blueprint, cache_control)
+    _add_prefetching(blueprint)
+
+    if invalidation_secret:
+        _add_invalidation_route(blueprint, blog_views, invalidation_secret)
+
+    @blueprint.route("/")
+    @_cache_async_page(blog_views, "page", "cursor", "category")
+    async def homepage():
+        context = await blog_views.get_index(
+            page=flask.request.args.get("page", type=int) or 1,
+            category_slug=flask.request.args.get("category") or "",
+            cursor=_get_cursor(),
+        )
+
+        return _render_template(
+            "blog/index.html", context, conditional_requests
+        )
+
+    @blueprint.route("/feed")
+    @_cache_async_page(blog_views)
+    async def homepage_feed():
+        context = await blog_views.get_index_feed_context()
+
+        return _render_feed(blog_views, context, conditional_requests)
+
+    @blueprint.route("/latest")
+    async def lastest_article():
+        context = await blog_views.get_latest_article()
+        record_context_tags(context)
+
+        return flask.redirect(
+            flask.url_for(".article", slug=context.get("article").get("slug"))
+        )
+
+    @blueprint.route(
+        '/<regex("[0-9]{4}"):year>/<regex("[0-9]{2}"):month>/'
+        '<regex("[0-9]{2}"):day>/<slug>'
+    )
+    @blueprint.route(
+        '/<regex("[0-9]{4}"):year>/<regex("[0-9]{2}"):month>/<slug>'
+    )
+    @blueprint.route('/<regex("[0-9]{4}"):year>/<slug>')
+    def article_redirect(slug, year, month=None, day=None):
+        return flask.redirect(flask.url_for(".article", slug=slug))
+
+    @blueprint.route("/<slug>")
+    @_cache_async_page(blog_views)
+    async def article(slug):
+        context = await blog_views.get_article(slug)
+
+        if not context:
+            flask.abort(404, "Article not found")
+
+        return _render_template(
+            "blog/article.html", context, conditional_requests
+        )
+
+    @blueprint.route("/latest-news")
+    @_cache_async_page(blog_views, "tag-id", "group-id", "limit")
+    async def latest_news():
+        context = await blog_views.get_latest_news(
+            tag_ids=flask.request.args.getlist("tag-id"),
+            group_ids=flask.request.args.getlist("group-id"),
+            limit=flask.request.args.get("limit", "3"),
+        )
+
+        return _respond(
+            context, lambda: flask.jsonify(context), conditional_requests
+        )
+
+    @blueprint.route("/author/<username>")
+    @_cache_async_page(blog_views, "page", "cursor")
+    async def author(username):
+        page_param = flask.request.args.get("page", default=1, type=int)
+        context = await blog_views.get_author(
+            username, page_param, cursor=_get_cursor()
+        )
+
+        if not context:
+            flask.abort(404)
+
+        return _render_template(
+            "blog/author.html", context, conditional_requests
+        )
+
+    @blueprint.route("/author/<username>/feed")
+    @_cache_async_page(blog_views)
+    async def author_feed(username):
+        context = await blog_views.get_author_feed_context(username)
+
+        if not context:
+            flask.abort(404)
+
+        return _render_feed(blog_views, context, conditional_requests)
+
+    @blueprint.route("/archives")
+    @_cache_async_page(
+        blog_views, "page", "cursor", "group", "month", "year", "category"
+    )
+    async def archives():
+        page_param = flask.request.args.get("page", default=1, type=int)
+        group_param = flask.request.args.get("group", default="", type=str)
+        month_param = flask.request.args.get("month", default="", type=int)
+        year_param = flask.request.args.get("year", default="", type=int)
+        category_param = flask.request.args.get(
+            "category", default="", type=str
+        )
+
+        context = await blog_views.get_archives(
+            page_param,
+            group_param,
+            month_param,
+            year_param,
+            category_param,
+            cursor=_get_cursor(),
+        )
+
+        if not context:
+            flask.abort(404)
+
+        return _render_template(
+            "blog/archives.html", context, conditional_requests
+        )
+
+    @blueprint.route("/group/<slug>")
+    @_cache_async_page(blog_views, "page", "cursor", "category")
+    async def group(slug):
+        page_param = flask.request.args.get("page", default=1, type=int)
+        category_param = flask.request.args.get(
+            "category", default="", type=str
+        )
+
+        context = await blog_views.get_group(
+            slug, page_param, category_param, cursor=_get_cursor()
+        )
+
+        if not context:
+            flask.abort(404)
+
+        return _render_template(
+            "blog/group.html", context, conditional_requests
+        )
+
+    @blueprint.route("/group/<slug>/feed")
+    @_cache_async_page(blog_views)
+    async def group_feed(slug):
+        context = await blog_views.get_group_feed_context(slug)
+
+        if not context:
+            flask.abort(404)
+
+        return _render_feed(blog_views, context, conditional_requests)
+
+    @blueprint.route("/topic/<slug>")
+    @_cache_async_page(blog_views, "page", "cursor")
+    async def topic(slug):
+        page_param = flask.request.args.get("page", default=1, type=int)
+        context = await blog_views.get_topic(
+            slug, page_param, cursor=_get_cursor()
+        )
+
+        return _render_template(
+            "blog/topic.html", context, conditional_requests
+        )
+
+    @blueprint.route("/topic/<slug>/feed")
+    @_cache_async_page(blog_views)
+    async def topic_feed(slug):
+        context = await blog_views.get_topic_feed_context(slug)
+
+        if not context:
+            flask.abort(404)
+
+        return _render_feed(blog_views, context, conditional_requests)
+
+    @blueprint.route("/events-and-webinars")
+    @_cache_async_page(blog_views, "page", "cursor")
+    async def events_and_webinars():
+        page_param = flask.request.args.get("page", default=1, type=int)
+        context = await blog_views.get_events_and_webinars(
+            page_param, cursor=_get_cursor()
+        )
+
+        return _render_template(
+            "blog/events-and-webinars.html", context, conditional_requests
+        )
+
+    @blueprint.route("/tag/<slug>")
+    @_cache_async_page(blog_views, "page", "cursor")
+    async def tag(slug):
+        page_param = flask.request.args.get("page", default=1, type=int)
+        context = await blog_views.get_tag(
+            slug, page_param, cursor=_get_cursor()
+        )
+
+        if not context:
+            flask.abort(404)
+
+        return _render_template("blog/tag.html", context, conditional_requests)
+
+    return blueprint
+
+
+def _cache_page(blog_views, *query_args):
+    """
+    Keep the responses of a route in blog_views.page_cache, if set,
+    keyed by the route, its arguments and the query arguments it reads
+
+    :param query_args: Names of the query arguments the route reads
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def cached_view(**view_args):
+            page_cache = blog_views.page_cache
+
+            if page_cache is None:
+                return view(**view_args)
+
+            key = _get_page_key(view_args, query_args)
+            cached_response = _get_cached_page(page_cache, key)
+
+            if cached_response is not None:
+                return cached_response
+
+            response = flask.make_response(view(**view_args))
+            _set_cached_page(page_cache, key, view.__name__, response)
+
+            return response
+
+        return cached_view
+
+    return decorator
+
+
+def _cache_async_page(blog_views, *query_args):
+    """
+    The same as _cache_page, for async def routes
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def cached_view(**view_args):
+            page_cache = blog_views.page_cache
+
+            if page_cache is None:
+                return await view(**view_args)
+
+            key = _get_page_key(view_args, query_args)
+            cached_response = _get_cached_page(page_cache, key)
+
+            if cached_response is not None:
+                return cached_response
+
+            response = flask.make_response(await view(**view_args))
+            _set_cached_page(page_cache, key, view.__name__, response)
+
+            return response
+
+        return cached_view
+
+    return decorator
+
+
+def _get_page_key(view_args, query_args):
+    """
+    Pages include absolute URLs, so the key includes the host
+    """
+
+    params = sorted(view_args.items())
+    params.extend(
+        (name, value)
+        for name in query_args
+        for value in flask.request.args.getlist(name)
+    )
+
+    return (
+        f"{flask.request.url_root}{flask.request.endpoint}?"
+        f"{urlencode(params)}"
+    )
+
+
+def _get_cached_page(page_cache, key):
+    """
+    Rebuild a cached response, restoring what it depends on and its
+    validators for the after_request hooks to send again
+
+    :returns: The response, 304 Not Modified, or None if not cached
+    """
+
+    cached = page_cache.get(key)
+
+    if cached is None:
+        return None
+
+    body, headers, tags, validators = cached
+    flask.g.blog_dependency_tags = set(tags)
+
+    if validators:
+        flask.g.blog_validators = validators
+
+        if not _is_modified(validators):
+            return flask.Response(status=304)
+
+    return flask.Response(body, headers=headers)
+
+
+def _set_cached_page(page_cache, key, name, response):
+    """
+    Store a successful response, tagged with what it depends on so
+    BlogViews.invalidate can drop it. The TTL is looked up by route
+    name, e.g. ttls={"article": 600, "homepage": 60}.
+    """
+
+    if response.status_code != 200:
+        return
+
+    body = response.get_data()
+    tags = frozenset(flask.g.get("blog_dependency_tags", ()))
+
+    page_cache.set(
+        key,
+        (
+            body,
+            list(response.headers.items()),
+            tags,
+            flask.g.get("blog_validators"),
+        ),
+        size=len(body),
+        ttl=page_cache.get_ttl(name),
+        tags=tags,
+    )
+
+
+def _render_template(template, context, conditional_requests):
+    response = flask.make_response(
+        _respond(
+            context,
+            lambda: flask.render_template(template, **context),
+            conditional_requests,
+        )
+    )
+
+    links = _get_cursor_links(context)
+
+    if links:
+        response.headers["Link"] = ", ".join(links)
+
+    return response
+
+
+def _get_cursor():
+    """
+    Get the pagination cursor from the query string, if any
+
+    :returns: The cursor, or None
+    """
+
+    cursor = flask.request.args.get("cursor") or None
+
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            flask.abort(400, "Invalid cursor")
+
+    return cursor
+
+
+def _get_cursor_links(context):
+    """
+    Link to the pages around a listing by cursor, which crawlers
+    can follow, e.g. <https://example.com/blog?cursor=...>; rel="next"
+
+    :returns: List of links
+    """
+
+    links = []
+    args = flask.request.args.to_dict(flat=False)
+    args.pop("page", None)
+
+    for key, rel in (("next_cursor", "next"), ("previous_cursor", "prev")):
+        cursor = context.get(key)
+
+        if cursor:
+            url = flask.url_for(
+                flask.request.endpoint,
+                **{**args, **flask.request.view_args, "cursor": cursor},
+                _external=True,
+            )
+            links.append(f'<{url}>; rel="{rel}"')
+
+    return links
+
+
+def _render_feed(blog_views, context, conditional_requests):
+    return _respond(
+        context,
+        lambda: flask.Response(
+            blog_views.stream_feed(context), mimetype="application/rss+xml"
+        ),
+        conditional_requests,
+    )
+
+
+def _respond(context, render, conditional_requests):
+    """
+    Record what the page depends on, then render it, unless the
+    client already has this version of it
+
+    :param context: The context from the view
+    :param render: Callable returning the response
+    :param conditional_requests: Whether to check the request's
+        If-None-Match header
+    """
+
+    record_context_tags(context)
+
+    if conditional_requests:
+        flask.g.blog_validators = get_context_validators(context)
+
+        if not _is_modified(flask.g.blog_validators):
+            return flask.Response(status=304)
+
+    return render()
+
+
+def _is_modified(validators):
+    """
+    Check the request's If-None-Match header against a page's ETag.
+
+    If-Modified-Since is ignored: a page's Last-Modified is the time
+    its newest article changed, which stays the same when an article
+    is unpublished, deleted or pushed off a listing, while the ETag
+    changes with the articles listed.
+    """
+
+    etag, _ = validators
+
+    return is_resource_modified(flask.request.environ, etag=etag)
+
+
+def _add_template_helpers(blueprint, blog_views):
+    """
+    Let the blog's templates render article cards through the
+    fragment cache, with {{ render_blog_card(article, "card.html") }}
+    """
+
+    @blueprint.context_processor
+    def inject_template_helpers():
+        return {"render_blog_card": blog_views.render_card}
+
+
+def _add_cache_headers(blueprint, cache_control):
+    """
+    Send the validators worked out by _respond, and Cache-Control
+    """
+
+    @blueprint.after_request
+    def add_cache_headers(response):
+        if response.status_code not in (200, 304):
+            return response
+
+        if "blog_validators" in flask.g:
+            etag, last_modified = flask.g.blog_validators
+            response.set_etag(etag)
+
+            if last_modified:
+                response.last_modified = last_modified
+
+        if cache_control:
+            response.headers["Cache-Control"] = cache_control
+
+        return response
+
+
+def _add_prefetching(blueprint):
+    """
+    Start the prefetches queued with Prefetcher.prefetch_after_response
+    once the response has been sent
+    """
+
+    @blueprint.after_request
+    def prefetch_after_response(response):
+        prefetches = flask.g.pop("blog_prefetches", None)
+
+        if prefetches:
+
+            def prefetch():
+                for prefetcher, key, function in prefetches:
+                    prefetcher.prefetch(key, function)
+
+            response.call_on_close(prefetch)
+
+        return response
+
+
+def _add_surrogate_keys(blueprint, header):
+    """
+    Send the dependency tags recorded while building each response,
+    the same tags the /invalidate route and ChangePoller purge by
+    """
+
+    separator = "," if header.lower() == "cache-tag" else " "
+
+    @blueprint.after_request
+    def add_surrogate_keys(response):
+        tags = flask.g.get("blog_dependency_tags")
+
+        if tags:
+            response.headers[header] = separator.join(sorted(tags))
+
+        return response
+
+
+def _add_invalidation_route(blueprint, blog_views, secret):
+    """
+    Add the webhook route purging whatever depends on a changed post
+    or term. It takes a JSON body like:
+
+        {
+            "post": {"id": 12, "slug": "...", "tags": [3], ...},
+            "previous": {"id": 12, "tags": [4], ...},
+            "terms": {"tags": [3]}
+        }
+
+    where "previous" is the post before an update, so the listings
+    it has left are purged too, and every key is optional
+    """
+
+    @blueprint.route("/invalidate", methods=["POST"])
+    def invalidate():
+        authorization = flask.request.headers.get("Authorization", "")
+
+        if not hmac.compare_digest(
+            authorization.encode(), f"Bearer {secret}".encode()
+        ):
+            flask.abort(403)
+
+        payload = flask.request.get_json(silent=True)
+
+        if not isinstance(payload, dict):
+            flask.abort(400, "Expected a JSON object")
+
+        changes = PostChanges(
+            updated=[payload["post"]] if payload.get("post") else [],
+            previous=[payload["previous"]] if payload.get("previous") else [],
+            terms=payload.get("terms") or {},
+        )
+
+        try:
+            tags = changes.get_dependency_tags()
+        except (KeyError, TypeError, AttributeError):
+            flask.abort(400, "Posts need an id, and terms a known taxonomy")
+
+        return flask.jsonify({"invalidated": blog_views.invalidate(tags)})
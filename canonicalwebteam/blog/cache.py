@@ -0,0 +1,242 @@
+# Standard library
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class CacheEntry:
+    def __init__(self, value, size, ttl, max_stale=0, tags=()):
+        """
+        A single cached value, along with its size, expiry time
+        and the dependency tags it can be invalidated by
+        """
+
+        self.value = value
+        self.size = size
+        self.tags = frozenset(tags)
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl
+        self.stale_until = self.expires_at + max_stale
+
+    def is_fresh(self):
+        return time.monotonic() < self.expires_at
+
+    def is_usable(self):
+        """
+        Whether the value is fresh or still within its allowed staleness
+        """
+
+        return time.monotonic() < self.stale_until
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        default_ttl=300,
+        ttls=None,
+        max_entries=512,
+        max_bytes=64 * 1024 * 1024,
+        max_stale=0,
+    ):
+        """
+        In-process TTL and LRU cache for Wordpress API responses
+
+        :param default_ttl: Seconds a response stays fresh by default
+        :param ttls: Dictionary of endpoint names (e.g. "posts", "tags")
+            to the number of seconds their responses stay fresh
+        :param max_entries: Maximum number of responses to keep
+        :param max_bytes: Maximum combined size of the cached responses
+        :param max_stale: Seconds an expired response can still be served
+            while it is refreshed in the background
+        """
+
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self.total_bytes = 0
+
+        self._entries = OrderedDict()
+        self._keys_by_tag = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_ttl(self, endpoint):
+        """
+        Get the TTL for an endpoint, e.g. "tags/12" uses the "tags" TTL
+        """
+
+        return self.ttls.get(endpoint.split("/")[0], self.default_ttl)
+
+    def get(self, key):
+        """
+        Get a fresh value from the cache
+
+        :param key: The cache key
+
+        :returns: The cached value, or None if missing or expired
+        """
+
+        entry = self.get_entry(key)
+
+        if entry is None or not entry.is_fresh():
+            return None
+
+        return entry.value
+
+    def get_entry(self, key, include_expired=False):
+        """
+        Get the entry for a key, as long as it is fresh or within
+        max_stale of its expiry time
+
+        :param key: The cache key
+        :param include_expired: Also return entries past max_stale,
+            e.g. to revalidate them, instead of dropping them
+
+        :returns: A CacheEntry, or None
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            if not include_expired and not entry.is_usable():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+
+            return entry
+
+    def set(self, key, value, size, ttl=None, tags=()):
+        """
+        Store a value in the cache, evicting the least recently used
+        values until the cache fits its limits again
+
+        :param key: The cache key
+        :param value: The value to store
+        :param size: Size of the value in bytes
+        :param ttl: Seconds the value stays fresh, defaults to default_ttl
+        :param tags: Dependency tags, e.g. "post:12", to invalidate
+            the value by when what it was built from changes
+        """
+
+        if size > self.max_bytes:
+            return
+
+        entry = CacheEntry(
+            value,
+            size,
+            self.default_ttl if ttl is None else ttl,
+            self.max_stale,
+            tags,
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self.total_bytes += size
+
+            for tag in entry.tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+
+            while (
+                len(self._entries) > self.max_entries
+                or self.total_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tags(self, tags):
+        """
+        Remove every value stored with any of the dependency tags
+
+        :param tags: Iterable of dependency tags
+
+        :returns: Number of values removed
+        """
+
+        with self._lock:
+            keys = set()
+
+            for tag in tags:
+                keys.update(self._keys_by_tag.get(tag, ()))
+
+            for key in keys:
+                self._remove(key)
+
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            keys.discard(key)
+
+            if not keys:
+                del self._keys_by_tag[tag]
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesce concurrent calls for the same key, so only one of them
+        does the work and the others wait for and share its result
+        """
+
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Call function, unless a call for key is already in flight,
+        in which case wait for that one instead
+
+        :param key: Identifies calls that can share a result
+        :param function: Callable taking no arguments
+
+        :returns: The result of function
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+
+            if is_leader:
+                call = self._calls[key] = Future()
+
+        if not is_leader:
+            return call.result()
+
+        try:
+            result = function()
+        except BaseException as error:
+            call.set_exception(error)
+            raise
+        else:
+            call.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return result
@@ -0,0 +1,230 @@
+# Standard library
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone
+
+# Directions a cursor can page in, from the article it was built from
+CURSOR_DIRECTIONS = ("next", "previous")
+
+# Furthest a site's local time can be from UTC
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+# Most articles Wordpress returns at once
+MAX_CURSOR_LIMIT = 100
+
+
+def encode_cursor(article, direction="next"):
+    """
+    Build an opaque cursor pointing past an article, for keyset
+    pagination in the same order as listings: newest first, by
+    date_gmt then id
+
+    :param article: The last article shown for "next",
+        or the first one for "previous"
+    :param direction: "next" for older articles, "previous" for newer
+
+    :returns: URL safe string
+    """
+
+    key = json.dumps([direction, article["date_gmt"], article["id"]])
+
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Read a cursor built by encode_cursor
+
+    :raises ValueError: If it isn't a valid cursor
+
+    :returns: direction, date_gmt, id
+    """
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, date_gmt, id = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+    except (binascii.Error, TypeError, UnicodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+    if (
+        direction not in CURSOR_DIRECTIONS
+        or not isinstance(date_gmt, str)
+        or not isinstance(id, int)
+    ):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+    # Raises ValueError for anything but a date
+    datetime.fromisoformat(date_gmt)
+
+    return direction, date_gmt, id
+
+
+def get_cursor_bounds(cursor, before=None, after=None):
+    """
+    Get the date filters to fetch the articles past a cursor with.
+    Wordpress filters dates to the second and can't break ties by id,
+    so the bound includes the cursor's own second, and
+    get_cursor_page drops the articles already seen.
+
+    Wordpress compares the filters with the site's local dates, so the
+    bound is sent with an explicit UTC offset for it to convert. Other
+    bounds are local dates, which are only kept over the cursor's when
+    they are tighter whatever the site's timezone.
+
+    :param cursor: Cursor built by encode_cursor
+    :param before: Date the articles must also be before, if any
+    :param after: Date the articles must also be after, if any
+
+    :returns: before, after, order
+    """
+
+    direction, date_gmt, _ = decode_cursor(cursor)
+    date = datetime.fromisoformat(date_gmt)
+
+    if direction == "next":
+        bound = date + timedelta(seconds=1)
+
+        if before is None or _as_datetime(before) > bound - MAX_UTC_OFFSET:
+            before = _as_utc(bound)
+
+        return before, after, "desc"
+
+    bound = date - timedelta(seconds=1)
+
+    if after is None or _as_datetime(after) < bound + MAX_UTC_OFFSET:
+        after = _as_utc(bound)
+
+    return before, after, "asc"
+
+
+def get_cursor_limit(per_page):
+    """
+    Get the number of articles to fetch from get_cursor_bounds for a
+    page. Articles sharing a second come back in no particular order,
+    so there is room for the ones of the cursor's second already seen,
+    and for the ones at the far end of the fetch, where a second may
+    be cut off partway through.
+
+    :param per_page: Number of articles in a page
+
+    :returns: Number of articles to fetch
+    """
+
+    return min(2 * int(per_page) + 1, MAX_CURSOR_LIMIT)
+
+
+def needs_wider_fetch(fetched, page, per_page, limit):
+    """
+    Whether the articles of one second took up so much of a fetch that
+    the page past the cursor came out short, and fetching
+    MAX_CURSOR_LIMIT articles instead could fill it
+
+    :param fetched: Number of articles fetched
+    :param page: The page picked by get_cursor_page
+    :param per_page: Number of articles in a page
+    :param limit: Number of articles asked for
+    """
+
+    return (
+        fetched >= int(limit)
+        and int(limit) < MAX_CURSOR_LIMIT
+        and len(page) < int(per_page)
+    )
+
+
+def get_cursor_page(articles, cursor, per_page, total_posts=None, limit=None):
+    """
+    Pick the page of articles past a cursor, out of the articles
+    fetched from get_cursor_bounds
+
+    :param articles: The articles fetched, in either order
+    :param cursor: Cursor built by encode_cursor
+    :param per_page: Number of articles in a page
+    :param total_posts: Number of articles matching the bounds, if known
+    :param limit: Number of articles asked for, if the articles of a
+        second may have been cut off partway through, as Wordpress
+        orders articles by date alone
+
+    :returns: articles newest first, metadata with cursors
+    """
+
+    direction, date_gmt, id = decode_cursor(cursor)
+    key = (date_gmt, id)
+    per_page = int(per_page)
+
+    # Nearest to the cursor first
+    if direction == "next":
+        page = [article for article in articles if _get_key(article) < key]
+        page.sort(key=_get_key, reverse=True)
+    else:
+        page = [article for article in articles if _get_key(article) > key]
+        page.sort(key=_get_key)
+
+    # Articles of the cursor's second which were already seen
+    seen = len(articles) - len(page)
+    cut_off = limit is not None and len(articles) >= int(limit)
+    has_more = (
+        cut_off
+        or len(page) > per_page
+        or (total_posts is not None and int(total_posts) - seen > per_page)
+    )
+
+    # Leave the articles of the furthest second for the next page, which
+    # may be missing some of them. If they are all there is, the page
+    # comes out short for needs_wider_fetch to fetch more, unless no
+    # more can be fetched at once.
+    if cut_off:
+        last_second = page[-1]["date_gmt"] if page else None
+        complete = [a for a in page if a["date_gmt"] != last_second]
+
+        if complete or int(limit) < MAX_CURSOR_LIMIT:
+            page = complete
+
+    page = sorted(page[:per_page], key=_get_key, reverse=True)
+
+    if direction == "next":
+        return page, get_page_cursors(page, has_more, True)
+
+    return page, get_page_cursors(page, True, has_more)
+
+
+def get_page_cursors(articles, has_next, has_previous):
+    """
+    Build the cursors to the pages around a page of articles
+
+    :returns: Dictionary of "next_cursor" and "previous_cursor",
+        None where there is no such page
+    """
+
+    if not articles:
+        return {"next_cursor": None, "previous_cursor": None}
+
+    return {
+        "next_cursor": (
+            encode_cursor(articles[-1], "next") if has_next else None
+        ),
+        "previous_cursor": (
+            encode_cursor(articles[0], "previous") if has_previous else None
+        ),
+    }
+
+
+def _get_key(article):
+    return (article["date_gmt"], article["id"])
+
+
+def _as_datetime(value):
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return value
+
+
+def _as_utc(value):
+    return value.replace(tzinfo=timezone.utc).isoformat()
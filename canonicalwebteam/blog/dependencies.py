@@ -0,0 +1,245 @@
+# Dependency tags name what a cached response or page was built from,
+# e.g. "post:12" or "tag:3", so it can be invalidated when that changes
+
+# Standard library
+import hashlib
+import json
+from datetime import datetime, timezone
+
+# Packages
+import flask
+
+# Post listings with none of these filters depend on every post
+ALL_POSTS = "posts:all"
+
+# Post fields and request parameters for each filter, and the
+# prefix of their dependency tags
+POST_FILTERS = {
+    "tags": "tag",
+    "categories": "category",
+    "group": "group",
+    "author": "author",
+}
+
+# Taxonomy endpoints, and the prefix of the post filter they are used in
+TAXONOMY_FILTERS = {
+    "tags": "tag",
+    "categories": "category",
+    "group": "group",
+    "users": "author",
+}
+
+# Keys of view contexts holding lists of articles
+ARTICLE_LIST_KEYS = [
+    "articles",
+    "featured_articles",
+    "events_and_webinars",
+    "related_articles",
+    "latest_articles",
+    "latest_pinned_articles",
+]
+
+# Keys of view contexts holding the term or user a listing is filtered by
+CONTEXT_FILTERS = {"tag": "tag", "group": "group", "author": "author"}
+
+
+def get_response_tags(endpoint, params, items):
+    """
+    Get the dependency tags of a Wordpress API response
+
+    :param endpoint: The REST endpoint, e.g. "posts" or "tags/12"
+    :param params: The parameters the request was made with
+    :param items: The decoded response, a list or a single item
+
+    :returns: Set of dependency tags
+    """
+
+    name = endpoint.split("/")[0]
+
+    if name in TAXONOMY_FILTERS:
+        return {f"terms:{name}"}
+
+    if name != "posts":
+        return set()
+
+    if isinstance(items, dict):
+        items = [items]
+
+    tags = {f"post:{item['id']}" for item in items if "id" in item}
+    filtered = False
+
+    for param, prefix in POST_FILTERS.items():
+        for value in _as_list(params.get(param)):
+            tags.add(f"{prefix}:{value}")
+            filtered = True
+
+    for slug in _as_list(params.get("slug")):
+        tags.add(f"slug:{slug}")
+        filtered = True
+
+    for id in _as_list(params.get("include")):
+        tags.add(f"post:{id}")
+        filtered = True
+
+    if not filtered:
+        tags.add(ALL_POSTS)
+
+    return tags
+
+
+def get_post_tags(post):
+    """
+    Get the dependency tags to invalidate when a post is added,
+    updated or deleted: responses containing it, and the listings
+    it could appear in
+
+    :param post: The post, or at least its id, slug and filter fields
+
+    :returns: Set of dependency tags
+    """
+
+    tags = get_article_tags(post)
+    tags.add(ALL_POSTS)
+
+    if post.get("slug"):
+        tags.add(f"slug:{post['slug']}")
+
+    return tags
+
+
+def get_article_tags(article):
+    """
+    Get the dependency tags of an article shown on a page:
+    the article itself, and its tags, categories, group and author
+
+    :param article: Raw or transformed article
+
+    :returns: Set of dependency tags
+    """
+
+    tags = {f"post:{article['id']}"}
+
+    for field, prefix in POST_FILTERS.items():
+        for value in _as_list(article.get(field)):
+            tags.add(f"{prefix}:{value}")
+
+    return tags
+
+
+def get_context_tags(context):
+    """
+    Get the dependency tags of a page from the context of its view:
+    the articles on it, and what the listing is filtered by. Listings
+    not filtered by a tag, group or author depend on every post.
+
+    :param context: Dictionary returned by a BlogViews method
+
+    :returns: Set of dependency tags
+    """
+
+    tags = set()
+    article = context.get("article")
+
+    if article:
+        tags.add(f"slug:{article['slug']}")
+
+    for context_article in _get_context_articles(context):
+        tags.update(get_article_tags(context_article))
+
+    filtered = False
+
+    for key, prefix in CONTEXT_FILTERS.items():
+        if isinstance(context.get(key), dict) and "id" in context[key]:
+            tags.add(f"{prefix}:{context[key]['id']}")
+            filtered = True
+
+    if not article and not filtered:
+        tags.add(ALL_POSTS)
+
+    return tags
+
+
+def get_context_validators(context):
+    """
+    Get HTTP validators for a page from the context of its view, so
+    conditional requests can be answered before it is rendered.
+    Articles are identified by their id and modified_gmt, and
+    everything else in the context by its value.
+
+    :param context: Dictionary returned by a BlogViews method
+
+    :returns: ETag, Last-Modified datetime or None
+    """
+
+    fingerprint = {}
+
+    for key, value in context.items():
+        if key == "article" and value:
+            value = [value["id"], value.get("modified_gmt")]
+        elif key in ARTICLE_LIST_KEYS and value:
+            value = [
+                [article["id"], article.get("modified_gmt")]
+                for article in value
+            ]
+
+        fingerprint[key] = value
+
+    etag = hashlib.sha256(
+        json.dumps(fingerprint, sort_keys=True, default=str).encode()
+    ).hexdigest()[:32]
+
+    modified = [
+        article["modified_gmt"]
+        for article in _get_context_articles(context)
+        if article.get("modified_gmt")
+    ]
+    last_modified = None
+
+    if modified:
+        last_modified = datetime.strptime(
+            max(modified), "%Y-%m-%dT%H:%M:%S"
+        ).replace(tzinfo=timezone.utc)
+
+    return etag, last_modified
+
+
+def record_context_tags(context):
+    """
+    Record the dependency tags of the page being built for this request,
+    for the blueprint to send to caches in front of it
+    """
+
+    if "blog_dependency_tags" not in flask.g:
+        flask.g.blog_dependency_tags = set()
+
+    flask.g.blog_dependency_tags.update(get_context_tags(context))
+
+
+def _get_context_articles(context):
+    articles = []
+
+    if context.get("article"):
+        articles.append(context["article"])
+
+    for key in ARTICLE_LIST_KEYS:
+        articles.extend(context.get(key) or [])
+
+    return articles
+
+
+def _as_list(value):
+    """
+    Turn a parameter or field into a list of ids or slugs. Transformed
+    articles have the author and group as objects, instead of ids.
+    """
+
+    if value is None or value == "" or value == []:
+        return []
+
+    if isinstance(value, dict):
+        return [str(value["id"])] if "id" in value else []
+
+    if isinstance(value, (list, tuple, set)):
+        return [id for item in value for id in _as_list(item)]
+
+    return str(value).split(",")
@@ -0,0 +1,59 @@
+# Standard library
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+
+# Namespaces declared on the <rss> element, for the items to use
+FEED_NAMESPACES = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "content": "http://purl.org/rss/1.0/modules/content/",
+}
+
+
+def stream_rss(
+    title,
+    link,
+    description,
+    items,
+    last_build_date=None,
+    generator="Python Feedgen",
+):
+    """
+    Write an RSS 2.0 feed a piece at a time, in the same format as
+    feedgen, so only one item needs to be in memory at once
+
+    :param title: Title of the feed
+    :param link: URL of the feed
+    :param description: Description of the feed
+    :param items: Iterable of serialized <item> elements, as bytes
+    :param last_build_date: Datetime the feed last changed, defaults
+        to now
+    :param generator: Name of the program generating the feed
+
+    :returns: Generator of bytes
+    """
+
+    if last_build_date is None:
+        last_build_date = datetime.now(timezone.utc)
+
+    namespaces = " ".join(
+        f"xmlns:{prefix}={quoteattr(uri)}"
+        for prefix, uri in FEED_NAMESPACES.items()
+    )
+
+    yield (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        f'<rss {namespaces} version="2.0"><channel>'
+        f"<title>{escape(title)}</title>"
+        f"<link>{escape(link)}</link>"
+        f"<description>{escape(description)}</description>"
+        f'<atom:link href={quoteattr(link)} rel="self"/>'
+        "<docs>http://www.rssboard.org/rss-specification</docs>"
+        f"<generator>{escape(generator)}</generator>"
+        f"<lastBuildDate>{format_datetime(last_build_date)}</lastBuildDate>"
+    ).encode()
+
+    for item in items:
+        yield item
+
+    yield b"</channel></rss>"
@@ -0,0 +1,467 @@
+# Standard library
+import json
+import math
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+# Local
+from .constants import (
+    CATEGORY_FIELDS,
+    TAG_FIELDS,
+    USER_FIELDS,
+    DEFAULT_POST_FIELDS,
+    POST_DETAILS_FIELDS,
+)
+from .cursor import decode_cursor, get_cursor_page
+
+# Fields of posts kept in the mirror, with the local date to filter by
+MIRROR_POST_FIELDS = [*POST_DETAILS_FIELDS, "date", "sticky", "status"]
+
+# Endpoint and fields for each taxonomy kept in the mirror
+MIRROR_TAXONOMIES = {
+    "categories": CATEGORY_FIELDS,
+    "tags": TAG_FIELDS,
+    "group": CATEGORY_FIELDS,
+    "users": USER_FIELDS,
+}
+
+# Tables linking posts to their terms, and the post field listing them
+POST_TERM_TABLES = {
+    "post_tags": "tags",
+    "post_categories": "categories",
+    "post_groups": "group",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL,
+    date_gmt TEXT NOT NULL,
+    date TEXT,
+    modified_gmt TEXT,
+    author INTEGER,
+    sticky INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_date ON posts (date_gmt, id);
+CREATE INDEX IF NOT EXISTS posts_slug ON posts (slug);
+CREATE INDEX IF NOT EXISTS posts_author ON posts (author, date_gmt);
+CREATE INDEX IF NOT EXISTS posts_sticky ON posts (sticky, date_gmt);
+CREATE TABLE IF NOT EXISTS post_tags (
+    term_id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    PRIMARY KEY (term_id, post_id)
+);
+CREATE INDEX IF NOT EXISTS post_tags_post ON post_tags (post_id);
+CREATE TABLE IF NOT EXISTS post_categories (
+    term_id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    PRIMARY KEY (term_id, post_id)
+);
+CREATE INDEX IF NOT EXISTS post_categories_post ON post_categories (post_id);
+CREATE TABLE IF NOT EXISTS post_groups (
+    term_id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    PRIMARY KEY (term_id, post_id)
+);
+CREATE INDEX IF NOT EXISTS post_groups_post ON post_groups (post_id);
+CREATE TABLE IF NOT EXISTS terms (
+    taxonomy TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    slug TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (taxonomy, id)
+);
+CREATE INDEX IF NOT EXISTS terms_slug ON terms (taxonomy, slug);
+"""
+
+
+class LocalMirror:
+    def __init__(self, path=":memory:"):
+        """
+        Local SQLite copy of the posts and taxonomies in Wordpress,
+        which BlogAPI can answer get_articles, get_article and the
+        single term and user lookups from
+
+        :param path: Path of the SQLite file to keep the mirror in
+        """
+
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+            # Mirrors created before the local date was kept
+            columns = [
+                row[1]
+                for row in self._connection.execute("PRAGMA table_info(posts)")
+            ]
+            if "date" not in columns:
+                self._connection.execute("ALTER TABLE posts ADD COLUMN date")
+
+    def sync(self, api, status=None):
+        """
+        Copy every post and term from Wordpress into the mirror,
+        removing the posts that are no longer there
+
+        :param api: Wordpress API object to fetch everything with
+        :param status: Array of post statuses to mirror, defaults to publish
+        """
+
+        # Bypass the API's cache, which could serve pages from before the
+        # changes, and would be filled with everything
+        posts = api.get_all_pages(
+            "posts",
+            {"status": status},
+            embed=True,
+            fields=MIRROR_POST_FIELDS,
+            cached=False,
+        )
+        terms = {
+            taxonomy: api.get_all_pages(taxonomy, fields=fields, cached=False)
+            for taxonomy, fields in MIRROR_TAXONOMIES.items()
+        }
+
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM posts")
+            self._connection.execute("DELETE FROM terms")
+
+            for table in POST_TERM_TABLES:
+                self._connection.execute(f"DELETE FROM {table}")
+
+            self._insert_posts(posts)
+
+            for taxonomy, items in terms.items():
+                self._insert_terms(taxonomy, items)
+
+    def update_posts(self, posts):
+        """
+        Add posts to the mirror, or replace the mirrored copies
+        """
+
+        with self._lock, self._connection:
+            self._delete_posts([post["id"] for post in posts])
+            self._insert_posts(posts)
+
+    def delete_posts(self, ids):
+        with self._lock, self._connection:
+            self._delete_posts(ids)
+
+    def get_term_by_slug(self, taxonomy, slug):
+        """
+        :param taxonomy: "categories", "tags", "group" or "users"
+
+        :returns: The term, or an empty dictionary if it isn't mirrored
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM terms WHERE taxonomy = ? AND slug = ?",
+                (taxonomy, slug),
+            ).fetchone()
+
+        return json.loads(row[0]) if row else {}
+
+    def get_term_by_id(self, taxonomy, id):
+        """
+        :param taxonomy: "categories", "tags", "group" or "users"
+
+        :returns: The term, or an empty dictionary if it isn't mirrored
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM terms WHERE taxonomy = ? AND id = ?",
+                (taxonomy, int(id)),
+            ).fetchone()
+
+        return json.loads(row[0]) if row else {}
+
+    def get_articles(
+        self,
+        tags=None,
+        tags_exclude=None,
+        exclude=None,
+        categories=None,
+        sticky=None,
+        before=None,
+        after=None,
+        author=None,
+        groups=None,
+        per_page=12,
+        page=1,
+        status=None,
+        fields=None,
+        cursor=None,
+        include=None,
+    ):
+        """
+        Get articles from the mirror, taking the same filters as
+        Wordpress.get_articles
+
+        :returns: articles, metadata dictionary
+        """
+
+        where, params = self._build_filters(
+            tags=tags,
+            tags_exclude=tags_exclude,
+            exclude=exclude,
+            categories=categories,
+            include=include,
+            sticky=sticky,
+            before=before,
+            after=after,
+            author=author,
+            groups=groups,
+            status=status,
+        )
+        per_page = int(per_page)
+        order = "DESC"
+        limit = per_page
+        offset = (int(page) - 1) * per_page
+
+        # One more article than a page, to know if there are more
+        if cursor:
+            direction, date_gmt, id = decode_cursor(cursor)
+            operator = "<" if direction == "next" else ">"
+            where += (
+                f" AND (date_gmt {operator} ? "
+                f"OR (date_gmt = ? AND id {operator} ?))"
+            )
+            params = [*params, date_gmt, date_gmt, id]
+            order = "DESC" if direction == "next" else "ASC"
+            limit = per_page + 1
+            offset = 0
+
+        with self._lock:
+            total_posts = self._connection.execute(
+                f"SELECT COUNT(*) FROM posts WHERE {where}", params
+            ).fetchone()[0]
+            rows = self._connection.execute(
+                f"SELECT data FROM posts WHERE {where} "
+                f"ORDER BY date_gmt {order}, id {order} LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+
+        articles = [json.loads(row[0]) for row in rows]
+
+        # Match the strings of Wordpress' X-WP-Total* headers
+        metadata = {
+            "total_pages": str(math.ceil(total_posts / per_page)),
+            "total_posts": str(total_posts),
+        }
+
+        # Before selecting fields, which may leave out the date and id
+        if cursor:
+            articles, cursors = get_cursor_page(articles, cursor, per_page)
+            metadata.update(cursors)
+
+            # Like Wordpress, only the articles from the cursor on count
+            metadata["total_pages"] = None
+
+        return (
+            [
+                self._select_fields(article, fields or DEFAULT_POST_FIELDS)
+                for article in articles
+            ],
+            metadata,
+        )
+
+    def get_article(
+        self,
+        slug,
+        tags=None,
+        tags_exclude=None,
+        status=None,
+        fields=None,
+    ):
+        where, params = self._build_filters(
+            tags=tags, tags_exclude=tags_exclude, status=status
+        )
+
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT data FROM posts WHERE slug = ? AND {where} "
+                "ORDER BY date_gmt DESC LIMIT 1",
+                [slug.strip("/"), *params],
+            ).fetchone()
+
+        if not row:
+            return {}
+
+        return self._select_fields(
+            json.loads(row[0]), fields or POST_DETAILS_FIELDS
+        )
+
+    def _build_filters(
+        self,
+        tags=None,
+        tags_exclude=None,
+        exclude=None,
+        categories=None,
+        sticky=None,
+        before=None,
+        after=None,
+        author=None,
+        groups=None,
+        status=None,
+        include=None,
+    ):
+        """
+        Turn Wordpress' post filters into a SQL condition,
+        treating empty values as no filter like the API does
+
+        :returns: condition, list of parameters
+        """
+
+        conditions = []
+        params = []
+
+        statuses = _as_list(status) or ["publish"]
+        conditions.append(f"status IN ({_placeholders(statuses)})")
+        params.extend(statuses)
+
+        included_ids = _as_list(include)
+        if included_ids:
+            conditions.append(f"id IN ({_placeholders(included_ids)})")
+            params.extend(int(id) for id in included_ids)
+
+        for table, ids, include in (
+            ("post_tags", _as_list(tags), True),
+            ("post_tags", _as_list(tags_exclude), False),
+            ("post_categories", _as_list(categories), True),
+            ("post_groups", _as_list(groups), True),
+        ):
+            if ids:
+                conditions.append(
+                    f"{'' if include else 'NOT '}EXISTS ("
+                    f"SELECT 1 FROM {table} WHERE post_id = posts.id "
+                    f"AND term_id IN ({_placeholders(ids)}))"
+                )
+                params.extend(int(id) for id in ids)
+
+        excluded_ids = _as_list(exclude)
+        if excluded_ids:
+            conditions.append(f"id NOT IN ({_placeholders(excluded_ids)})")
+            params.extend(int(id) for id in excluded_ids)
+
+        if sticky:
+            conditions.append("sticky = ?")
+            params.append(0 if str(sticky).lower() == "false" else 1)
+
+        for operator, bound in (("<", before), (">", after)):
+            if bound:
+                column, value = _get_date_bound(bound)
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+
+        if author:
+            conditions.append("author = ?")
+            params.append(int(author))
+
+        return " AND ".join(conditions), params
+
+    def _insert_posts(self, posts):
+        self._connection.executemany(
+            "INSERT INTO posts "
+            "(id, slug, date_gmt, date, modified_gmt, author, sticky, status, "
+            "data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    post["id"],
+                    post["slug"],
+                    post["date_gmt"],
+                    post.get("date"),
+                    post.get("modified_gmt"),
+                    post.get("author"),
+                    1 if post.get("sticky") else 0,
+                    post.get("status", "publish"),
+                    json.dumps(post),
+                )
+                for post in posts
+            ],
+        )
+
+        for table, field in POST_TERM_TABLES.items():
+            self._connection.executemany(
+                f"INSERT OR IGNORE INTO {table} (term_id, post_id) "
+                "VALUES (?, ?)",
+                [
+                    (term_id, post["id"])
+                    for post in posts
+                    for term_id in post.get(field) or []
+                ],
+            )
+
+    def _insert_terms(self, taxonomy, terms):
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO terms (taxonomy, id, slug, data) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (taxonomy, term["id"], term["slug"], json.dumps(term))
+                for term in terms
+            ],
+        )
+
+    def _delete_posts(self, ids):
+        ids = [(int(id),) for id in ids]
+
+        self._connection.executemany("DELETE FROM posts WHERE id = ?", ids)
+
+        for table in POST_TERM_TABLES:
+            self._connection.executemany(
+                f"DELETE FROM {table} WHERE post_id = ?", ids
+            )
+
+    def _select_fields(self, post, fields):
+        """
+        Keep the top level fields of a post that Wordpress would have
+        returned for the requested _fields, e.g. "title" for
+        "title.rendered", so list pages don't carry full content
+        """
+
+        if isinstance(fields, str):
+            fields = fields.split(",")
+
+        names = {field.split(".")[0] for field in fields}
+
+        return {key: value for key, value in post.items() if key in names}
+
+
+def _as_list(value):
+    if not value:
+        return []
+
+    if isinstance(value, (list, tuple, set)):
+        return [item for item in value if item not in (None, "")]
+
+    return str(value).split(",")
+
+
+def _get_date_bound(value):
+    """
+    Get what to compare a before or after filter with. Wordpress
+    compares them with the posts' local dates, unless they carry a UTC
+    offset, so the others are compared with date_gmt, in UTC. Posts
+    mirrored without their local date fall back to date_gmt.
+
+    :returns: column, value
+    """
+
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+
+    if value.tzinfo is None:
+        return "COALESCE(date, date_gmt)", value.isoformat()
+
+    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return "date_gmt", value.isoformat()
+
+
+def _placeholders(values):
+    return ", ".join("?" for _ in values)
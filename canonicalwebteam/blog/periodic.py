@@ -0,0 +1,51 @@
+# Standard library
+import threading
+
+
+class PeriodicCall:
+    def __init__(self, function):
+        """
+        Call a function now, then again in the background at an
+        interval, until stopped. Used by the indexes and the poller
+        to keep themselves up to date.
+
+        :param function: Callable taking no arguments. If it raises,
+            the next call is still scheduled before the error is raised.
+        """
+
+        self.function = function
+
+        self._timer = None
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self, interval):
+        """
+        Call the function, then keep calling it every interval seconds
+
+        :param interval: Seconds between the end of one call
+            and the start of the next
+        """
+
+        with self._lock:
+            self._running = True
+
+        try:
+            self.function()
+        finally:
+            with self._lock:
+                # Unless stopped while the function was running
+                if self._running:
+                    self._timer = threading.Timer(
+                        interval, self.start, [interval]
+                    )
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
@@ -0,0 +1,271 @@
+# Standard library
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Local
+from .dependencies import TAXONOMY_FILTERS, get_post_tags
+from .periodic import PeriodicCall
+
+# Fields of posts needed to spot changes and find what they affect
+POLL_POST_FIELDS = [
+    "id",
+    "slug",
+    "modified",
+    "author",
+    "tags",
+    "categories",
+    "group",
+]
+
+# Fields of terms compared to spot changes
+POLL_TERM_FIELDS = ["id", "slug", "name", "parent"]
+
+
+class PostChanges:
+    def __init__(
+        self, added=None, updated=None, deleted=None, terms=None, previous=None
+    ):
+        """
+        Changes found in Wordpress by one poll
+
+        :param added: Posts which are new
+        :param updated: Posts which were modified, or whose embedded
+            terms changed
+        :param deleted: Posts which were deleted or unpublished
+        :param terms: Dictionary of taxonomies to the ids of their
+            terms which were added, changed or deleted
+        :param previous: The last seen versions of the updated posts
+        """
+
+        self.added = added or []
+        self.updated = updated or []
+        self.deleted = deleted or []
+        self.terms = terms or {}
+        self.previous = previous or []
+
+    def __bool__(self):
+        return bool(
+            self.added
+            or self.updated
+            or self.deleted
+            or any(self.terms.values())
+        )
+
+    def get_dependency_tags(self):
+        """
+        Get the dependency tags of everything the changes affect
+
+        :returns: Set of dependency tags
+        """
+
+        tags = set()
+
+        # Previous versions for the listings updated posts have left
+        for post in self.added + self.updated + self.deleted + self.previous:
+            tags.update(get_post_tags(post))
+
+        for taxonomy, ids in self.terms.items():
+            if ids:
+                tags.add(f"terms:{taxonomy}")
+
+            for id in ids:
+                tags.add(f"{TAXONOMY_FILTERS[taxonomy]}:{id}")
+
+        return tags
+
+
+class ChangePoller:
+    def __init__(self, api, interval=60, sweep_interval=3600, status=None):
+        """
+        Poll Wordpress for posts modified since the last poll, and
+        invalidate the cached responses the changes affect, so the
+        cache can use long TTLs and still serve fresh content
+
+        Wordpress can't list deleted posts or changed terms, so every
+        sweep_interval seconds all post ids and terms are fetched and
+        compared with the previous sweep instead
+
+        :param api: Wordpress API object, whose cache is invalidated
+        :param interval: Seconds between polls once started
+        :param sweep_interval: Seconds between full sweeps
+        :param status: Array of post statuses to watch, defaults to publish
+        """
+
+        self.api = api
+        self.interval = interval
+        self.sweep_interval = sweep_interval
+        self.status = status
+
+        self._posts = None
+        self._terms = {}
+        self._high_water_mark = None
+        self._last_sweep = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._periodic = PeriodicCall(self.poll)
+
+    def add_listener(self, listener):
+        """
+        Call listener with the PostChanges of every poll that finds any,
+        e.g. to invalidate caches of rendered pages
+
+        :param listener: Callable taking a PostChanges
+        """
+
+        self._listeners.append(listener)
+
+    def poll(self):
+        """
+        Look for changes once, invalidate the cached responses
+        they affect and notify the listeners
+
+        The first poll records the current state of Wordpress,
+        and has no changes to report
+
+        :returns: PostChanges
+        """
+
+        with self._lock:
+            sweep_due = (
+                self._last_sweep is None
+                or time.monotonic() - self._last_sweep >= self.sweep_interval
+            )
+            changes = self._sweep() if sweep_due else self._poll_modified()
+
+        if changes:
+            self.api.invalidate(changes.get_dependency_tags())
+
+            for listener in self._listeners:
+                listener(changes)
+
+        return changes
+
+    def start(self):
+        """
+        Poll, then keep polling in the background
+        every interval seconds
+        """
+
+        self._periodic.start(self.interval)
+
+    def stop(self):
+        self._periodic.stop()
+
+    def _poll_modified(self):
+        """
+        Fetch the posts modified since the high-water mark
+        """
+
+        # Wordpress compares whole seconds, so overlap the previous poll
+        # by a second and skip the posts already seen at that time
+        modified_after = datetime.fromisoformat(
+            self._high_water_mark
+        ) - timedelta(seconds=1)
+
+        posts = self.api.get_all_pages(
+            "posts",
+            {
+                "modified_after": modified_after.isoformat(),
+                "orderby": "modified",
+                "order": "asc",
+                "status": self.status,
+            },
+            fields=POLL_POST_FIELDS,
+            cached=False,
+        )
+
+        changes = PostChanges()
+
+        for post in posts:
+            self._compare_post(post, self._posts.get(post["id"]), changes)
+            self._posts[post["id"]] = post
+            self._high_water_mark = max(
+                self._high_water_mark, post["modified"]
+            )
+
+        return changes
+
+    def _sweep(self):
+        """
+        Fetch every post and term, and compare them with the last sweep
+        """
+
+        posts = {
+            post["id"]: post
+            for post in self.api.get_all_pages(
+                "posts",
+                {"status": self.status},
+                fields=POLL_POST_FIELDS,
+                cached=False,
+            )
+        }
+        terms = {
+            taxonomy: {
+                term["id"]: term
+                for term in self.api.get_all_pages(
+                    taxonomy, fields=POLL_TERM_FIELDS, cached=False
+                )
+            }
+            for taxonomy in TAXONOMY_FILTERS
+        }
+
+        changes = PostChanges()
+
+        if self._posts is not None:
+            for id, post in posts.items():
+                self._compare_post(post, self._posts.get(id), changes)
+
+            changes.deleted = [
+                post for id, post in self._posts.items() if id not in posts
+            ]
+
+            for taxonomy, items in terms.items():
+                previous_items = self._terms.get(taxonomy, {})
+
+                changes.terms[taxonomy] = [
+                    id
+                    for id in items.keys() | previous_items.keys()
+                    if items.get(id) != previous_items.get(id)
+                ]
+
+            # Posts embed the names of their terms and authors
+            changed_ids = {post["id"] for post in changes.added}
+            changed_ids.update(post["id"] for post in changes.updated)
+
+            changes.updated.extend(
+                post
+                for post in posts.values()
+                if post["id"] not in changed_ids
+                and self._has_changed_terms(post, changes.terms)
+            )
+
+        self._posts = posts
+        self._terms = terms
+        self._last_sweep = time.monotonic()
+        self._high_water_mark = max(
+            [post["modified"] for post in posts.values()]
+            + [self._high_water_mark or "1970-01-01T00:00:00"]
+        )
+
+        return changes
+
+    def _compare_post(self, post, previous, changes):
+        if previous is None:
+            changes.added.append(post)
+        elif previous["modified"] != post["modified"]:
+            changes.updated.append(post)
+            changes.previous.append(previous)
+
+    def _has_changed_terms(self, post, changed_terms):
+        for taxonomy, ids in changed_terms.items():
+            field = "author" if taxonomy == "users" else taxonomy
+            values = post.get(field)
+
+            if not isinstance(values, list):
+                values = [values]
+
+            if any(id in values for id in ids):
+                return True
+
+        return False
@@ -0,0 +1,121 @@
+# Standard library
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Packages
+import flask
+
+# Local
+from .cache import ResponseCache
+
+
+class Prefetcher:
+    def __init__(self, max_concurrent=2, article_count=3, ttl=60):
+        """
+        Warm the API caches for what visitors are likely to ask for
+        next, like the next page of a listing, on background threads
+
+        At most max_concurrent prefetches run at once, across all the
+        views sharing the prefetcher. Any more are dropped rather than
+        queued, so prefetching never holds up requests being served.
+
+        :param max_concurrent: Number of prefetches running at once
+        :param article_count: Number of articles at the top of a listing
+            to prefetch the article pages of
+        :param ttl: Seconds to remember what was prefetched for, so it
+            isn't prefetched again while still in the API cache. Set it
+            to the API cache's TTL, or below.
+        """
+
+        self.max_concurrent = max_concurrent
+        self.article_count = article_count
+        self.ttl = ttl
+
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._running = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = None
+        self._done = ResponseCache(default_ttl=ttl, max_entries=4096)
+
+    def prefetch(self, key, function):
+        """
+        Call function on a background thread, unless it is already
+        being prefetched, was prefetched less than ttl seconds ago, all
+        the slots are taken, or this is a prefetch itself, so
+        prefetches don't set off more prefetches
+
+        :param key: Identifies prefetches doing the same thing
+        :param function: Callable taking no arguments, whose result
+            is thrown away
+
+        :returns: Whether the prefetch was started
+        """
+
+        if self.is_prefetching() or self._done.get(key) is not None:
+            return False
+
+        if not self._slots.acquire(blocking=False):
+            return False
+
+        with self._lock:
+            if key in self._running:
+                self._slots.release()
+                return False
+
+            self._running.add(key)
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent,
+                    thread_name_prefix="blog-prefetch",
+                )
+
+        def run():
+            self._local.prefetching = True
+
+            try:
+                function()
+                self._done.set(key, True, size=0)
+            except Exception:
+                # Whoever asks for it next will fetch it themselves
+                pass
+            finally:
+                self._local.prefetching = False
+
+                with self._lock:
+                    self._running.discard(key)
+
+                self._slots.release()
+
+        self._executor.submit(run)
+
+        return True
+
+    def prefetch_after_response(self, key, function):
+        """
+        Prefetch once the response to the current request has been
+        sent, so it doesn't compete with rendering it, or straight
+        away outside of a request. The blueprints start the prefetches
+        kept in flask.g.blog_prefetches.
+
+        :param key: Identifies prefetches doing the same thing
+        :param function: Callable taking no arguments, whose result
+            is thrown away
+        """
+
+        if not flask.has_request_context():
+            self.prefetch(key, function)
+            return
+
+        if "blog_prefetches" not in flask.g:
+            flask.g.blog_prefetches = []
+
+        flask.g.blog_prefetches.append((self, key, function))
+
+    def is_prefetching(self):
+        """
+        Whether the current thread is running a prefetch
+        """
+
+        return getattr(self._local, "prefetching", False)
@@ -0,0 +1,395 @@
+# Standard library
+import threading
+
+# Local
+from .periodic import PeriodicCall
+
+
+class RelatedArticlesIndex:
+    def __init__(self, api, refresh_interval=3600):
+        """
+        In-memory inverted index from tag ids to the articles tagged with
+        them, to find the articles most related to another one across
+        every published article, without a round trip to Wordpress
+
+        Articles are numbered from the newest, and each tag has a bitset
+        of the numbers of its articles, so filtering and counting the
+        tags articles share are a few operations on integers
+
+        :param api: BlogAPI to load the article summaries with
+        :param refresh_interval: Seconds between reloads once started
+        """
+
+        self.api = api
+        self.refresh_interval = refresh_interval
+
+        # Articles from the newest, their positions by id,
+        # and bitsets of positions by tag id
+        self._index = ([], {}, {})
+        self._lock = threading.Lock()
+        self._periodic = PeriodicCall(self.load)
+
+    def __len__(self):
+        return len(self._index[0])
+
+    def load(self):
+        """
+        Load the summaries of every article from Wordpress,
+        100 at a time, and replace the index with them
+        """
+
+        articles = []
+        page = 1
+
+        while True:
+            page_articles, metadata = self.api.get_articles(
+                per_page=100, page=page
+            )
+            articles.extend(page_articles)
+
+            if page >= int(metadata.get("total_pages") or 1):
+                break
+
+            page += 1
+
+        with self._lock:
+            self._build(articles)
+
+    def start(self):
+        """
+        Load the index, then keep reloading it in the background
+        every refresh_interval seconds
+        """
+
+        self._periodic.start(self.refresh_interval)
+
+    def stop(self):
+        self._periodic.stop()
+
+    def get_related(
+        self,
+        tag_ids,
+        required_tag_ids=(),
+        excluded_tag_ids=(),
+        exclude=(),
+        count=3,
+    ):
+        """
+        Get the articles sharing the most tags with tag_ids,
+        the newest first among those sharing as many
+
+        :param tag_ids: Ids of the tags of the article to relate to
+        :param required_tag_ids: Ids of tags related articles must all have
+        :param excluded_tag_ids: Ids of tags related articles can't have
+        :param exclude: Ids of articles to leave out, e.g. the article
+            being related to
+        :param count: Maximum number of articles to get
+
+        :returns: List of copies of the article summaries, with
+            the number of shared tags as "compatibility"
+        """
+
+        articles = self._index[0]
+
+        return [
+            _with_compatibility(articles[position], compatibility)
+            for position, compatibility in _rank(
+                self._index,
+                tag_ids,
+                required_tag_ids,
+                excluded_tag_ids,
+                exclude,
+                count,
+            )
+        ]
+
+    def get_articles(self, ids):
+        """
+        Get copies of the summaries of articles in the index
+
+        :param ids: Ids of the articles
+        :returns: List of the summaries, leaving out unknown ids
+        """
+
+        articles, positions, _ = self._index
+
+        return [
+            articles[positions[id]].copy() for id in ids if id in positions
+        ]
+
+    def update(self, articles=(), deleted_ids=()):
+        """
+        Add or replace some articles, and remove others,
+        without reloading the whole index
+
+        :param articles: Summaries of new or modified articles
+        :param deleted_ids: Ids of articles to remove
+        """
+
+        with self._lock:
+            replaced = {article["id"] for article in articles}
+            replaced.update(deleted_ids)
+
+            self._build(
+                [
+                    article
+                    for article in self._index[0]
+                    if article["id"] not in replaced
+                ]
+                + list(articles)
+            )
+
+    def _build(self, articles):
+        """
+        Number the articles from the newest, and index them by tag
+        """
+
+        articles = sorted(
+            articles,
+            key=lambda article: (article["date_gmt"], article["id"]),
+            reverse=True,
+        )
+        positions = {}
+        postings = {}
+
+        for position, article in enumerate(articles):
+            positions[article["id"]] = position
+
+            for tag_id in article.get("tags") or []:
+                postings[tag_id] = postings.get(tag_id, 0) | 1 << position
+
+        # Replaced at once, for lookups running meanwhile
+        self._index = (articles, positions, postings)
+
+
+class RelatedArticlesTable:
+    def __init__(
+        self,
+        index,
+        related_tag_ids=(),
+        excluded_tag_ids=(),
+        count=3,
+        refresh_interval=3600,
+    ):
+        """
+        The most related articles of every article in a
+        RelatedArticlesIndex, worked out ahead of time, so article pages
+        only look them up
+
+        Each row is recomputed when the article, or an article sharing
+        a tag with it, changes, by passing the table's update method to
+        ChangePoller.add_listener
+
+        :param index: RelatedArticlesIndex to rank the articles with
+        :param related_tag_ids: Ids of tags related articles must all
+            have, as BlogViews' tag_ids
+        :param excluded_tag_ids: Ids of tags related articles can't have,
+            as BlogViews' excluded_tags
+        :param count: Number of related articles for each article
+        :param refresh_interval: Seconds between reloads once started
+        """
+
+        self.index = index
+        self.related_tag_ids = [int(id) for id in related_tag_ids]
+        self.excluded_tag_ids = [int(id) for id in excluded_tag_ids]
+        self.count = count
+        self.refresh_interval = refresh_interval
+
+        # Article ids to the ids and compatibilities of their
+        # related articles
+        self._rows = {}
+        self._lock = threading.Lock()
+        self._periodic = PeriodicCall(self.load)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def load(self):
+        """
+        Reload the index, and compute every row again
+        """
+
+        self.index.load()
+
+        with self._lock:
+            index = self.index._index
+            self._rows = {
+                article["id"]: self._get_row(index, article)
+                for article in index[0]
+            }
+
+    def start(self):
+        """
+        Load the table, then keep reloading it in the background
+        every refresh_interval seconds
+        """
+
+        self._periodic.start(self.refresh_interval)
+
+    def stop(self):
+        self._periodic.stop()
+
+    def update(self, changes):
+        """
+        Fetch the summaries of the articles a poll found changed into
+        the index, 100 at a time, and compute the rows they affect again
+
+        :param changes: PostChanges from a ChangePoller
+        """
+
+        if not self._rows:
+            return
+
+        changed_ids = [post["id"] for post in changes.added + changes.updated]
+        articles = []
+
+        for start in range(0, len(changed_ids), 100):
+            chunk = changed_ids[start : start + 100]  # noqa: E203
+            chunk_articles, _ = self.index.api.get_articles(
+                include=chunk, per_page=len(chunk)
+            )
+            articles.extend(chunk_articles)
+
+        deleted_ids = [post["id"] for post in changes.deleted]
+
+        # Rows can only change for articles sharing a tag with
+        # a changed article, before or after the change
+        changed_tag_ids = set()
+        for post in (
+            articles + changes.previous + changes.deleted + changes.added
+        ):
+            changed_tag_ids.update(post.get("tags") or [])
+
+        with self._lock:
+            self.index.update(articles, deleted_ids)
+            index = self.index._index
+
+            for id in deleted_ids:
+                self._rows.pop(id, None)
+
+            for article in index[0]:
+                tag_ids = article.get("tags") or []
+
+                # Articles without tags are related to the newest ones
+                if (
+                    not tag_ids
+                    or changed_tag_ids.intersection(tag_ids)
+                    or article["id"] not in self._rows
+                ):
+                    self._rows[article["id"]] = self._get_row(index, article)
+
+    def get_related(self, article_id, related_tag_ids=(), excluded_tag_ids=()):
+        """
+        Look up the related articles of an article
+
+        :param article_id: Id of the article to relate to
+        :param related_tag_ids: Ids of tags related articles must all have
+        :param excluded_tag_ids: Ids of tags related articles can't have
+
+        :returns: List of copies of the article summaries, with
+            the number of shared tags as "compatibility", or None if
+            the table has no row for the article and these tags
+        """
+
+        row = self._rows.get(article_id)
+
+        if (
+            row is None
+            or [int(id) for id in related_tag_ids] != self.related_tag_ids
+            or [int(id) for id in excluded_tag_ids] != self.excluded_tag_ids
+        ):
+            return None
+
+        articles, positions, _ = self.index._index
+
+        return [
+            _with_compatibility(articles[positions[id]], compatibility)
+            for id, compatibility in row
+            if id in positions
+        ]
+
+    def _get_row(self, index, article):
+        articles = index[0]
+
+        return tuple(
+            (articles[position]["id"], compatibility)
+            for position, compatibility in _rank(
+                index,
+                article.get("tags") or [],
+                self.related_tag_ids,
+                self.excluded_tag_ids,
+                [article["id"]],
+                self.count,
+            )
+        )
+
+
+def _rank(
+    index,
+    tag_ids,
+    required_tag_ids,
+    excluded_tag_ids,
+    exclude,
+    count,
+):
+    """
+    Find the positions of the most related articles, in the articles,
+    positions and postings of a RelatedArticlesIndex
+
+    :returns: List of positions and compatibilities
+    """
+
+    articles, positions, postings = index
+    tag_ids = {int(tag_id) for tag_id in tag_ids}
+
+    # Like Wordpress, any article is a candidate without tags to match
+    candidates = 0 if tag_ids else (1 << len(articles)) - 1
+    for tag_id in tag_ids:
+        candidates |= postings.get(tag_id, 0)
+
+    for tag_id in required_tag_ids:
+        candidates &= postings.get(int(tag_id), 0)
+
+    for tag_id in excluded_tag_ids:
+        candidates &= ~postings.get(int(tag_id), 0)
+
+    for id in exclude:
+        if int(id) in positions:
+            candidates &= ~(1 << positions[int(id)])
+
+    # Count the tags each candidate shares in binary,
+    # one bitset for each bit of the counts
+    count_bits = []
+    for tag_id in tag_ids:
+        carry = postings.get(tag_id, 0) & candidates
+        for bit, bits in enumerate(count_bits):
+            count_bits[bit], carry = bits ^ carry, bits & carry
+            if not carry:
+                break
+        if carry:
+            count_bits.append(carry)
+
+    ranked = []
+
+    for compatibility in range(len(tag_ids), -1, -1):
+        if compatibility >> len(count_bits):
+            continue
+
+        matches = candidates
+        for bit, bits in enumerate(count_bits):
+            matches &= bits if compatibility >> bit & 1 else ~bits
+
+        # The lowest positions are the newest articles
+        while matches and len(ranked) < count:
+            lowest = matches & -matches
+            matches ^= lowest
+            ranked.append((lowest.bit_length() - 1, compatibility))
+
+        if len(ranked) == count:
+            break
+
+    return ranked
+
+
+def _with_compatibility(article, compatibility):
+    return {**article, "compatibility": compatibility}
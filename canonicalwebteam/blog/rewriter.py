@@ -0,0 +1,307 @@
+# Standard library
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+
+# Elements which never have content, written as <tag/>
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "basefont",
+    "bgsound",
+    "br",
+    "col",
+    "command",
+    "embed",
+    "frame",
+    "hr",
+    "image",
+    "img",
+    "input",
+    "isindex",
+    "keygen",
+    "link",
+    "menuitem",
+    "meta",
+    "nextid",
+    "param",
+    "source",
+    "spacer",
+    "track",
+    "wbr",
+}
+
+# Attributes holding space separated lists, for all elements under "*"
+LIST_ATTRIBUTES = {
+    "*": {"class", "accesskey", "dropzone"},
+    "a": {"rel", "rev"},
+    "link": {"rel", "rev"},
+    "td": {"headers"},
+    "th": {"headers"},
+    "form": {"accept-charset"},
+    "object": {"archive"},
+    "area": {"rel"},
+    "icon": {"sizes"},
+    "iframe": {"sandbox"},
+    "output": {"for"},
+}
+
+# Elements whose whitespace is kept as it is
+PRESERVE_WHITESPACE_ELEMENTS = {"pre", "textarea"}
+
+# Elements whose text is written without escaping
+RAW_TEXT_ELEMENTS = {"script", "style"}
+
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# Named character references, with or without their semicolon
+ENTITIES = {}
+for _name, _character in sorted(html5.items()):
+    ENTITIES.setdefault(_name.rstrip(";"), _character)
+
+ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+ESCAPE_PATTERN = re.compile("[&<>]")
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def rewrite_images(content, replace_image=None, rewrite_text=None):
+    """
+    Rewrite HTML in a single pass, replacing <img> elements as they
+    are found. Everything else is written out the way BeautifulSoup's
+    "html.parser" tree builder would serialize it, so the result is
+    the same as editing a soup, without building one.
+
+    :param content: The HTML to rewrite
+    :param replace_image: Callable taking the attributes of an <img>
+        as a dictionary, and returning the markup to write in its place
+        as it is, or None to keep it
+    :param rewrite_text: Callable applied to text, comments and
+        attribute values, e.g. to change URLs
+
+    :returns: The rewritten HTML
+    """
+
+    rewriter = _ImageRewriter(replace_image, rewrite_text)
+    rewriter.feed(content)
+    rewriter.close()
+
+    return "".join(rewriter.output)
+
+
+class _ImageRewriter(HTMLParser):
+    def __init__(self, replace_image, rewrite_text):
+        # Character references are decoded in handle_charref
+        # and handle_entityref, as BeautifulSoup does
+        super().__init__(convert_charrefs=False)
+
+        self.replace_image = replace_image
+        self.rewrite_text = rewrite_text
+        self.output = []
+
+        self._data = []
+        self._open_elements = []
+        self._closed_void_elements = []
+
+    def close(self):
+        super().close()
+        self._end_data()
+
+        while self._open_elements:
+            self.output.append(f"</{self._open_elements.pop()}>")
+
+    def handle_starttag(self, tag, attrs):
+        self._start_element(tag, attrs, closed=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start_element(tag, attrs, closed=True)
+
+    def handle_endtag(self, tag):
+        # The end tag of a void element that was already written
+        if tag in self._closed_void_elements:
+            self._closed_void_elements.remove(tag)
+            return
+
+        self._end_data()
+        self._close_element(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        base = 10
+        pattern = r"^([0-9]+)(.*)"
+
+        if name[:1] in ("x", "X"):
+            name = name[1:]
+            base = 16
+            pattern = r"^([0-9a-f]+)(.*)"
+
+        # Digits followed by anything else are a reference then text
+        try:
+            number, extra = int(name, base), ""
+        except ValueError:
+            match = re.search(pattern, name)
+
+            if not match:
+                self._data.append(name)
+                return
+
+            number, extra = int(match.group(1), base), match.group(2)
+
+        self._data.append(_get_character(number))
+        self._data.append(extra)
+
+    def handle_entityref(self, name):
+        self._data.append(ENTITIES.get(name, f"&{name}"))
+
+    def handle_comment(self, data):
+        self._end_data()
+        self._data.append(data)
+        self._end_data("<!--", "-->")
+
+    def handle_decl(self, decl):
+        self._end_data()
+        # Strip "DOCTYPE ", and "CDATA[" below
+        self._data.append(decl[8:])
+        self._end_data("<!DOCTYPE ", ">\n")
+
+    def unknown_decl(self, data):
+        self._end_data()
+
+        if data.upper().startswith("CDATA["):
+            self._data.append(data[6:])
+            self._end_data("<![CDATA[", "]]>")
+        else:
+            self._data.append(data)
+            self._end_data("<?", "?>")
+
+    def handle_pi(self, data):
+        self._end_data()
+        self._data.append(data)
+        self._end_data("<?", ">")
+
+    def _start_element(self, tag, attrs, closed):
+        self._end_data()
+
+        attributes = {}
+        for name, value in attrs:
+            attributes[name] = value or ""
+
+        if self.rewrite_text:
+            attributes = {
+                name: self.rewrite_text(value)
+                for name, value in attributes.items()
+            }
+
+        if tag == "img" and self.replace_image:
+            markup = self.replace_image(attributes)
+
+            if markup is not None:
+                self.output.append(markup)
+
+                if not closed:
+                    self._closed_void_elements.append(tag)
+
+                return
+
+        list_attributes = LIST_ATTRIBUTES["*"] | LIST_ATTRIBUTES.get(
+            tag, set()
+        )
+        written = []
+
+        for name, value in sorted(attributes.items()):
+            if name in list_attributes:
+                value = " ".join(WORD_PATTERN.findall(value))
+
+            written.append(f" {name}={_quote(_escape(value))}")
+
+        if tag in VOID_ELEMENTS:
+            self.output.append(f"<{tag}{''.join(written)}/>")
+
+            if not closed:
+                self._closed_void_elements.append(tag)
+        else:
+            self.output.append(f"<{tag}{''.join(written)}>")
+            self._open_elements.append(tag)
+
+            if closed:
+                self._close_element(tag)
+
+    def _close_element(self, tag):
+        """
+        Close the most recent open element named tag,
+        and any elements left open inside it
+        """
+
+        if tag not in self._open_elements:
+            return
+
+        while True:
+            name = self._open_elements.pop()
+            self.output.append(f"</{name}>")
+
+            if name == tag:
+                break
+
+    def _end_data(self, prefix=None, suffix=""):
+        """
+        Write out the text collected since the last tag, as text
+        or, with a prefix, as a comment or declaration
+        """
+
+        if not self._data:
+            return
+
+        data = "".join(self._data)
+        self._data = []
+
+        # Whitespace between tags is collapsed to one character
+        if not PRESERVE_WHITESPACE_ELEMENTS.intersection(
+            self._open_elements
+        ) and all(character in ASCII_SPACES for character in data):
+            data = "\n" if "\n" in data else " "
+
+        if self.rewrite_text:
+            data = self.rewrite_text(data)
+
+        if prefix is not None:
+            self.output.append(prefix + data + suffix)
+        elif (
+            self._open_elements
+            and self._open_elements[-1] in RAW_TEXT_ELEMENTS
+        ):
+            self.output.append(data)
+        else:
+            self.output.append(_escape(data))
+
+
+def _get_character(number):
+    """
+    Get the character a numeric character reference stands for,
+    reading C1 controls as Windows-1252
+    """
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd"
+
+    if 0x80 <= number <= 0x9F:
+        try:
+            return bytes([number]).decode("cp1252")
+        except UnicodeDecodeError:
+            pass
+
+    return chr(number)
+
+
+def _escape(value):
+    return ESCAPE_PATTERN.sub(lambda match: ESCAPES[match.group()], value)
+
+
+def _quote(value):
+    if '"' not in value:
+        return f'"{value}"'
+
+    if "'" not in value:
+        return f"'{value}'"
+
+    return '"' + value.replace('"', "&quot;") + '"'
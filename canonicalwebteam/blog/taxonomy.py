@@ -0,0 +1,180 @@
+# Local
+from .constants import (
+    CATEGORY_FIELDS,
+    TAG_FIELDS,
+    USER_FIELDS,
+)
+from .periodic import PeriodicCall
+
+
+class TaxonomyIndex:
+    # Endpoint and fields for each kind of term in the index
+    TAXONOMIES = {
+        "categories": CATEGORY_FIELDS,
+        "tags": TAG_FIELDS,
+        "group": CATEGORY_FIELDS,
+        "users": USER_FIELDS,
+    }
+
+    def __init__(self, api, refresh_interval=3600):
+        """
+        In-memory index of all the categories, tags, groups and users,
+        to resolve slugs and ids without a round trip to Wordpress.
+        Lookups that miss the index fall back to the Wordpress API.
+
+        :param api: Wordpress API object to load the terms with
+        :param refresh_interval: Seconds between reloads once started
+        """
+
+        self.api = api
+        self.refresh_interval = refresh_interval
+
+        self._by_id = {taxonomy: {} for taxonomy in self.TAXONOMIES}
+        self._by_slug = {taxonomy: {} for taxonomy in self.TAXONOMIES}
+        self._periodic = PeriodicCall(self.load)
+
+    def load(self):
+        """
+        Load every term from Wordpress, 100 at a time,
+        and replace the index with them
+        """
+
+        by_id = {}
+        by_slug = {}
+
+        for taxonomy, fields in self.TAXONOMIES.items():
+            terms = self.api.get_all_pages(taxonomy, fields=fields)
+
+            by_id[taxonomy] = {term["id"]: term for term in terms}
+            by_slug[taxonomy] = {term["slug"]: term for term in terms}
+
+        self._by_id = by_id
+        self._by_slug = by_slug
+
+    def start(self):
+        """
+        Load the index, then keep reloading it in the background
+        every refresh_interval seconds
+        """
+
+        self._periodic.start(self.refresh_interval)
+
+    def stop(self):
+        self._periodic.stop()
+
+    def lookup(self, taxonomy, key, value):
+        """
+        Look up a term in the index alone, without falling back to the
+        API, for callers with an API of their own, like AsyncBlogViews
+
+        :param taxonomy: "categories", "tags", "group" or "users"
+        :param key: "id" or "slug"
+
+        :returns: The term, or None if it isn't in the index
+        """
+
+        if key == "id":
+            return self._by_id[taxonomy].get(int(value))
+
+        return self._by_slug[taxonomy].get(value)
+
+    def get_category_by_slug(self, slug):
+        term = self._by_slug["categories"].get(slug)
+
+        return term or self.api.get_category_by_slug(slug)
+
+    def get_category_by_id(self, id):
+        term = self._by_id["categories"].get(int(id))
+
+        return term or self.api.get_category_by_id(id)
+
+    def get_tag_by_slug(self, slug):
+        term = self._by_slug["tags"].get(slug)
+
+        return term or self.api.get_tag_by_slug(slug)
+
+    def get_tag_by_id(self, id):
+        term = self._by_id["tags"].get(int(id))
+
+        return term or self.api.get_tag_by_id(id)
+
+    def get_group_by_slug(self, slug):
+        term = self._by_slug["group"].get(slug)
+
+        return term or self.api.get_group_by_slug(slug)
+
+    def get_group_by_id(self, id):
+        term = self._by_id["group"].get(int(id))
+
+        return term or self.api.get_group_by_id(id)
+
+    def get_user_by_username(self, username):
+        user = self._by_slug["users"].get(username)
+
+        return user or self.api.get_user_by_username(username)
+
+    def get_user_by_id(self, id):
+        user = self._by_id["users"].get(int(id))
+
+        return user or self.api.get_user_by_id(id)
+
+    def get_categories_by_slugs(self, slugs):
+        return self._get_terms_by(
+            "categories", "slug", slugs, self.api.get_categories_by_slugs
+        )
+
+    def get_categories_by_ids(self, ids):
+        return self._get_terms_by(
+            "categories", "id", ids, self.api.get_categories_by_ids
+        )
+
+    def get_tags_by_slugs(self, slugs):
+        return self._get_terms_by(
+            "tags", "slug", slugs, self.api.get_tags_by_slugs
+        )
+
+    def get_tags_by_ids(self, ids):
+        return self._get_terms_by("tags", "id", ids, self.api.get_tags_by_ids)
+
+    def get_groups_by_ids(self, ids):
+        return self._get_terms_by(
+            "group", "id", ids, self.api.get_groups_by_ids
+        )
+
+    def get_users_by_ids(self, ids):
+        return self._get_terms_by(
+            "users", "id", ids, self.api.get_users_by_ids
+        )
+
+    def _get_terms_by(self, taxonomy, key, values, fetch_missing):
+        """
+        Look up many terms in the index, and fetch the ones
+        missing from it in bulk
+
+        :param taxonomy: Which taxonomy to look in
+        :param key: "id" or "slug"
+        :param values: The ids or slugs to look up
+        :param fetch_missing: API method to fetch the missing terms with
+
+        :returns: The terms found, in the order of values
+        """
+
+        if key == "id":
+            values = [int(value) for value in values]
+
+        index = (self._by_id if key == "id" else self._by_slug)[taxonomy]
+        missing = [value for value in values if value not in index]
+        fetched = {}
+
+        if missing:
+            for term in fetch_missing(missing):
+                fetched[term[key]] = term
+
+        terms = []
+        for value in values:
+            term = index.get(value) or fetched.get(value)
+
+            if term:
+                terms.append(term)
+
+        return terms
@@ -1,16 +1,29 @@
 # Standard library
-from datetime import datetime
+import math
+from datetime import datetime, timezone
+from functools import partial
 
 # Packages
 import flask
 from dateutil.relativedelta import relativedelta
 from feedgen.entry import FeedEntry
-from feedgen.feed import FeedGenerator
+from lxml import etree
+from markupsafe import Markup
 
 # Local
 from .constants import (
+    DEFAULT_POST_FIELDS,
     POST_DETAILS_FIELDS,
 )
+from .cursor import get_page_cursors
+from .feed import FEED_NAMESPACES, stream_rss
+
+# Number of featured articles on the first page of the index
+FEATURED_COUNT = 3
+
+# Fields of the latest news fetched in one query, to pick the pinned
+# article from
+MERGED_LATEST_FIELDS = [*DEFAULT_POST_FIELDS, "sticky"]
 
 
 class BlogViews:
@@ -24,7 +37,44 @@ class BlogViews:
         feed_description=None,
         per_page=12,
         status=None,
+        executor=None,
+        taxonomy=None,
+        page_cache=None,
+        fragment_cache=None,
+        feed_length=12,
+        feed_summary_only=False,
+        related_index=None,
+        related_table=None,
+        prefetcher=None,
+        merge_queries=False,
     ):
+        """
+        :param executor: Optional concurrent.futures executor, e.g. a
+            ThreadPoolExecutor shared by the views, used to make
+            independent API calls concurrently
+        :param taxonomy: Optional TaxonomyIndex to resolve category, tag,
+            group and user slugs without a round trip to Wordpress
+        :param page_cache: Optional ResponseCache for build_blueprint
+            to keep the rendered pages in
+        :param fragment_cache: Optional ResponseCache to keep the cards
+            and feed items rendered for each article revision in
+        :param feed_length: Number of articles in feeds, up to 100
+        :param feed_summary_only: Leave the full content out of feeds,
+            and don't fetch it, so they only carry the excerpts
+        :param related_index: Optional RelatedArticlesIndex to pick
+            related articles from every article, instead of fetching
+            20 candidates for each article page
+        :param related_table: Optional RelatedArticlesTable to look up
+            the related articles worked out ahead of time, for the same
+            tag_ids and excluded_tags. Its index is used for articles
+            it has no row for, unless related_index is given.
+        :param prefetcher: Optional Prefetcher to warm the API cache
+            for the next page of the index, tag and author listings,
+            and for their first articles, after serving them
+        :param merge_queries: Fetch the overlapping lists of the index
+            and latest news in fewer queries, with the same results
+        """
+
         self.api = api
         self.tag_ids = tag_ids
         self.excluded_tags = excluded_tags
@@ -33,76 +83,134 @@ class BlogViews:
         self.feed_description = feed_description or f"{blog_title} feed"
         self.per_page = per_page
         self.status = status or ["publish"]
+        self.executor = executor
+        self.taxonomy = taxonomy
+        self.page_cache = page_cache
+        self.fragment_cache = fragment_cache
+        self.feed_length = feed_length
+        self.feed_summary_only = feed_summary_only
+        self.related_index = related_index
+        self.related_table = related_table
+        self.prefetcher = prefetcher
+        self.merge_queries = merge_queries
+
+        if related_index is None and related_table is not None:
+            self.related_index = related_table.index
+
+        # Where to look up terms, falling back to the API on misses
+        self._terms = taxonomy or api
+
+    def invalidate(self, tags):
+        """
+        Drop everything cached for the views that depends on any of the
+        dependency tags, e.g. "post:12" or "tag:3"
 
-    def get_index(self, page=1, category_slug=""):
-        categories = []
-        if category_slug:
-            category_resolved = self.api.get_category_by_slug(category_slug)
-            if category_resolved:
-                categories.append(category_resolved.get("id", ""))
+        :returns: Number of cached entries removed
+        """
+
+        removed = self.api.invalidate(tags)
+
+        for cache in (self.page_cache, self.fragment_cache):
+            if cache is not None:
+                removed += cache.invalidate_tags(tags)
 
+        return removed
+
+    def get_index(self, page=1, category_slug="", cursor=None):
+        categories = []
         events_and_webinars = []
         featured_articles = []
-        if page == 1:
-            featured_articles, _ = self.api.get_articles(
-                tags=self.tag_ids,
-                tags_exclude=self.excluded_tags,
-                page=page,
-                sticky="true",
-                per_page=3,
-            )
 
+        # Pages reached by cursor are never the first
+        first_page = page == 1 and not cursor
+        merge = first_page and self._can_merge_index_queries()
+        get_featured = self._get_featured_query(page)
+
+        category_resolved, featured, events, webinars = self._run_all(
+            (
+                partial(self._terms.get_category_by_slug, category_slug)
+                if category_slug
+                else None
+            ),
+            get_featured if first_page and not merge else None,
             # Maybe we can get the IDs since there is no chance
             # this going to move
-            events = self.api.get_category_by_slug("events")
-            webinars = self.api.get_category_by_slug("webinars")
-            events_and_webinars, _ = self.api.get_articles(
-                tags=self.tag_ids,
-                tags_exclude=self.excluded_tags,
-                page=page,
-                per_page=3,
-                categories=[events["id"], webinars["id"]],
+            (
+                partial(self._terms.get_category_by_slug, "events")
+                if first_page
+                else None
+            ),
+            (
+                partial(self._terms.get_category_by_slug, "webinars")
+                if first_page
+                else None
+            ),
+        )
+
+        if category_resolved:
+            categories.append(category_resolved.get("id", ""))
+
+        if featured:
+            featured_articles, _ = featured
+
+        get_articles = self._get_listing_query(
+            page, cursor, categories=categories, status=self.status
+        )
+        get_events_and_webinars = (
+            self._get_events_and_webinars_query(page, 3, events, webinars)
+            if first_page
+            else None
+        )
+
+        if merge:
+            featured_articles, (articles, metadata), events_and_webinars = (
+                self._get_merged_index_lists(
+                    get_featured,
+                    get_articles,
+                    get_events_and_webinars,
+                    categories,
+                    [events["id"], webinars["id"]],
+                )
+            )
+        else:
+            (articles, metadata), events_and_webinars_result = self._run_all(
+                partial(
+                    get_articles,
+                    exclude=[article["id"] for article in featured_articles],
+                ),
+                get_events_and_webinars,
             )
 
-        articles, metadata = self.api.get_articles(
-            tags=self.tag_ids,
-            tags_exclude=self.excluded_tags,
-            exclude=[article["id"] for article in featured_articles],
-            page=page,
-            per_page=self.per_page,
-            categories=categories,
-            status=self.status,
+            if events_and_webinars_result:
+                events_and_webinars, _ = events_and_webinars_result
+
+        context = self._get_listing_context(
+            page,
+            articles,
+            metadata,
+            featured_articles=featured_articles,
+            events_and_webinars=events_and_webinars,
+            category={"slug": category_slug},
+        )
+        self._prefetch_listing(
+            partial(self.get_index, category_slug=category_slug),
+            page,
+            cursor,
+            context,
         )
 
-        return {
-            "current_page": int(page),
-            "total_pages": int(metadata["total_pages"]),
-            "articles": articles,
-            "featured_articles": featured_articles,
-            "events_and_webinars": events_and_webinars,
-            "title": self.blog_title,
-            "category": {"slug": category_slug},
-        }
+        return context
 
     def get_index_feed(self, uri, path):
-        articles, _ = self.api.get_articles(
-            tags=self.tag_ids,
-            tags_exclude=self.excluded_tags,
-            fields=POST_DETAILS_FIELDS,
-        )
+        return self.render_feed(self.get_index_feed_context())
 
-        url_root = flask.request.url_root
+    def get_index_feed_context(self):
+        articles, _ = self._get_feed_query()()
 
-        feed = self._build_feed(
-            blog_url=f"{url_root}/{self.blog_path}",
-            feed_url=f"{url_root}/{flask.request.path.strip('/')}",
-            feed_title=self.blog_title,
-            feed_description=self.feed_description,
-            articles=articles,
+        return self._get_feed_context(
+            self.blog_title, articles, flask.request.url_root
         )
 
-        return feed.rss_str()
-
     def get_article(self, slug):
         article = self.api.get_article(
             slug,
@@ -133,214 +241,428 @@ class BlogViews:
             articles[0], self.tag_ids, self.excluded_tags
         )
 
-    def get_group(self, group_slug, page=1, category_slug=None):
-        group = self.api.get_group_by_slug(group_slug)
+    def get_group(self, group_slug, page=1, category_slug=None, cursor=None):
         categories = None
-        category = {}
+        group, category = self._run_all(
+            partial(self._terms.get_group_by_slug, group_slug),
+            (
+                partial(self._terms.get_category_by_slug, category_slug)
+                if category_slug
+                else None
+            ),
+        )
+
         if category_slug:
-            category = self.api.get_category_by_slug(category_slug)
             categories = [category.get("id", "")]
 
-        articles, metadata = self.api.get_articles(
-            tags=self.tag_ids,
-            tags_exclude=self.excluded_tags,
-            page=page,
-            per_page=self.per_page,
+        articles, metadata = self._get_listing_query(
+            page,
+            cursor,
             groups=[group.get("id", "")],
             categories=categories,
+        )()
+
+        return self._get_listing_context(
+            page,
+            articles,
+            metadata,
+            group=group,
+            category={"slug": category_slug},
         )
 
-        return {
-            "current_page": int(page),
-            "total_pages": int(metadata["total_pages"]),
-            "articles": articles,
-            "group": group,
-            "title": self.blog_title,
-            "category": {"slug": category_slug},
-        }
-
     def get_group_feed(self, group_slug, uri, path):
-        group = self.api.get_group_by_slug(group_slug)
+        context = self.get_group_feed_context(group_slug)
+
+        return self.render_feed(context) if context else None
+
+    def get_group_feed_context(self, group_slug):
+        group = self._terms.get_group_by_slug(group_slug)
 
         if not group:
             return None
 
-        articles, _ = self.api.get_articles(
-            tags=self.tag_ids,
-            tags_exclude=self.excluded_tags,
-            groups=[group.get("id", "")],
-            fields=POST_DETAILS_FIELDS,
-        )
-
-        title = f"{group['name']} - {self.blog_title}"
-        url_root = flask.request.url_root
+        articles, _ = self._get_feed_query(groups=[group.get("id", "")])()
 
-        feed = self._build_feed(
-            blog_url=f"{url_root}/{self.blog_path}",
-            feed_url=f"{url_root}/{flask.request.path.strip('/')}",
-            feed_title=title,
-            feed_description=self.feed_description,
-            articles=articles,
+        return self._get_feed_context(
+            f"{group['name']} - {self.blog_title}",
+            articles,
+            flask.request.url_root,
+            group=group,
         )
 
-        return feed.rss_str()
-
-    def get_topic(self, topic_slug, page=1):
-        tag = self.api.get_tag_by_slug(topic_slug)
+    def get_topic(self, topic_slug, page=1, cursor=None):
+        tag = self._terms.get_tag_by_slug(topic_slug)
         tag_ids = [tag["id"]] if tag else []
 
-        articles, metadata = self.api.get_articles(
-            tags=self.tag_ids + tag_ids,
-            tags_exclude=self.excluded_tags,
-            page=page,
-            per_page=self.per_page,
-        )
+        articles, metadata = self._get_listing_query(
+            page, cursor, tags=self.tag_ids + tag_ids
+        )()
 
-        return {
-            "current_page": int(page),
-            "total_pages": int(metadata["total_pages"]),
-            "articles": articles,
-            "title": self.blog_title,
-        }
+        return self._get_listing_context(page, articles, metadata)
 
     def get_topic_feed(self, topic_slug, uri, path):
-        tag = self.api.get_tag_by_slug(topic_slug)
+        context = self.get_topic_feed_context(topic_slug)
+
+        return self.render_feed(context) if context else None
+
+    def get_topic_feed_context(self, topic_slug):
+        tag = self._terms.get_tag_by_slug(topic_slug)
 
         if not tag:
             return None
 
-        articles, _ = self.api.get_articles(
-            tags=[tag["id"]],
-            tags_exclude=self.excluded_tags,
-            fields=POST_DETAILS_FIELDS,
-        )
+        articles, _ = self._get_feed_query(tags=[tag["id"]])()
 
-        title = f"{tag['name']} - {self.blog_title}"
-        url_root = flask.request.url_root.rstrip("/")
+        return self._get_feed_context(
+            f"{tag['name']} - {self.blog_title}",
+            articles,
+            flask.request.url_root.rstrip("/"),
+            tag=tag,
+        )
 
-        feed = self._build_feed(
-            blog_url=f"{url_root}/{self.blog_path}",
-            feed_url=f"{url_root}/{flask.request.path.strip('/')}",
-            feed_title=title,
-            feed_description=self.feed_description,
-            articles=articles,
+    def get_events_and_webinars(self, page=1, cursor=None):
+        events, webinars = self._run_all(
+            partial(self._terms.get_category_by_slug, "events"),
+            partial(self._terms.get_category_by_slug, "webinars"),
         )
 
-        return feed.rss_str()
+        articles, metadata = self._get_events_and_webinars_query(
+            page, self.per_page, events, webinars, cursor=cursor
+        )()
 
-    def get_events_and_webinars(self, page=1):
-        events = self.api.get_category_by_slug("events")
-        webinars = self.api.get_category_by_slug("webinars")
+        return self._get_listing_context(page, articles, metadata)
 
-        articles, metadata = self.api.get_articles(
-            tags=self.tag_ids,
-            tags_exclude=self.excluded_tags,
-            page=page,
-            per_page=self.per_page,
-            categories=[events["id"], webinars["id"]],
+    def get_author(self, username, page=1, cursor=None):
+        author = self._terms.get_user_by_username(username)
+
+        if not author:
+            return None
+
+        articles, metadata = self._get_listing_query(
+            page, cursor, author=author["id"]
+        )()
+
+        context = self._get_listing_context(
+            page,
+            articles,
+            metadata,
+            total_posts=metadata.get("total_posts", 0),
+            author=author,
+        )
+        self._prefetch_listing(
+            partial(self.get_author, username), page, cursor, context
         )
-        total_pages = metadata["total_pages"]
 
-        return {
-            "current_page": int(page),
-            "total_pages": int(total_pages),
-            "articles": articles,
-            "title": self.blog_title,
-        }
+        return context
+
+    def get_author_feed(self, username, uri, path):
+        context = self.get_author_feed_context(username)
 
-    def get_author(self, username, page=1):
-        author = self.api.get_user_by_username(username)
+        return self.render_feed(context) if context else None
+
+    def get_author_feed_context(self, username):
+        author = self._terms.get_user_by_username(username)
 
         if not author:
             return None
 
-        articles, metadata = self.api.get_articles(
-            tags=self.tag_ids,
-            tags_exclude=self.excluded_tags,
-            page=page,
-            author=author["id"],
-            per_page=self.per_page,
+        articles, _ = self._get_feed_query(author=author["id"])()
+
+        return self._get_feed_context(
+            f"{author['name']} - {self.blog_title}",
+            articles,
+            flask.request.url_root,
+            author=author,
         )
 
-        return {
-            "current_page": int(page),
-            "total_pages": int(metadata.get("total_pages")),
-            "articles": articles,
-            "title": self.blog_title,
-            "total_posts": metadata.get("total_posts", 0),
-            "author": author,
-        }
+    def get_latest_news(self, limit=3, tag_ids=None, group_ids=None):
+        limit = int(limit)
+        get_pinned, get_latest = self._get_latest_news_queries(
+            limit, tag_ids, group_ids
+        )
 
-    def get_author_feed(self, username, uri, path):
-        author = self.api.get_user_by_username(username)
+        if self.merge_queries and self.executor is None:
+            latest_pinned_articles, latest_articles = (
+                self._get_merged_latest_news(get_pinned, get_latest, limit)
+            )
+        else:
+            # Rather than waiting for the pinned article to exclude it,
+            # fetch one extra article alongside it and drop it afterwards
+            (latest_pinned_articles, _), (latest_articles, _) = self._run_all(
+                get_pinned, get_latest
+            )
 
-        if not author:
+        return self._get_latest_news_context(
+            latest_pinned_articles, latest_articles, limit
+        )
+
+    def get_archives(
+        self, page=1, group="", month="", year="", category="", cursor=None
+    ):
+        groups = []
+        categories = []
+        category_slugs = category.split(",") if category else []
+
+        group, resolved_categories = self._run_all(
+            partial(self._terms.get_group_by_slug, group) if group else None,
+            (
+                partial(self._terms.get_categories_by_slugs, category_slugs)
+                if category_slugs
+                else None
+            ),
+        )
+
+        if group is not None:
+            if not group:
+                return None
+
+            groups.append(group["id"])
+
+        for category in resolved_categories or []:
+            categories.append(category["id"])
+
+        after, before = self._get_archive_dates(year, month)
+
+        articles, metadata = self._get_listing_query(
+            page,
+            cursor,
+            groups=groups,
+            categories=categories,
+            after=after,
+            before=before,
+        )()
+
+        return self._get_archives_context(page, articles, metadata, group)
+
+    def get_tag(self, slug, page=1, cursor=None):
+        tag = self._terms.get_tag_by_slug(slug)
+
+        if not tag:
             return None
 
-        articles, _ = self.api.get_articles(
+        articles, metadata = self._get_listing_query(
+            page, cursor, tags=[tag["id"]], status=self.status
+        )()
+
+        context = self._get_listing_context(
+            page,
+            articles,
+            metadata,
+            total_posts=metadata.get("total_posts", 0),
+            tag=tag,
+        )
+        self._prefetch_listing(
+            partial(self.get_tag, slug), page, cursor, context
+        )
+
+        return context
+
+    def _get_listing_query(self, page, cursor, **filters):
+        """
+        Get the API call for a page of a listing, shared with
+        AsyncBlogViews, which awaits what it returns
+
+        :param filters: Arguments to get_articles on top of the blog's
+            tags, or instead of them
+
+        :returns: Callable taking more arguments to get_articles
+        """
+
+        return partial(
+            self.api.get_articles,
+            **{
+                "tags": self.tag_ids,
+                "tags_exclude": self.excluded_tags,
+                "page": page,
+                "per_page": self.per_page,
+                "cursor": cursor,
+                **filters,
+            },
+        )
+
+    def _get_featured_query(self, page):
+        return partial(
+            self.api.get_articles,
             tags=self.tag_ids,
             tags_exclude=self.excluded_tags,
-            author=author["id"],
-            fields=POST_DETAILS_FIELDS,
+            page=page,
+            sticky="true",
+            per_page=FEATURED_COUNT,
         )
 
-        title = f"{author['name']} - {self.blog_title}"
-        url_root = flask.request.url_root
+    def _get_events_and_webinars_query(
+        self, page, per_page, events, webinars, **kwargs
+    ):
+        return partial(
+            self.api.get_articles,
+            tags=self.tag_ids,
+            tags_exclude=self.excluded_tags,
+            page=page,
+            per_page=per_page,
+            categories=[events["id"], webinars["id"]],
+            **kwargs,
+        )
 
-        feed = self._build_feed(
-            blog_url=f"{url_root}/{self.blog_path}",
-            feed_url=f"{url_root}/{flask.request.path.strip('/')}",
-            feed_title=title,
-            feed_description=self.feed_description,
-            articles=articles,
+    def _get_feed_query(self, **filters):
+        return partial(
+            self.api.get_articles,
+            **{
+                "tags": self.tag_ids,
+                "tags_exclude": self.excluded_tags,
+                "per_page": self.feed_length,
+                "fields": self._get_feed_fields(),
+                **filters,
+            },
         )
 
-        return feed.rss_str()
+    def _get_latest_news_queries(self, limit, tag_ids, group_ids):
+        """
+        :returns: The API calls for the pinned article,
+            and for the latest articles with one extra
+        """
 
-    def get_latest_news(self, limit=3, tag_ids=None, group_ids=None):
-        latest_pinned_articles, _ = self.api.get_articles(
+        get_articles = partial(
+            self.api.get_articles,
             tags=tag_ids or self.tag_ids,
             tags_exclude=self.excluded_tags,
             groups=group_ids,
             page=1,
-            per_page=1,
-            sticky=True,
         )
 
-        latest_articles, _ = self.api.get_articles(
-            tags=tag_ids or self.tag_ids,
-            tags_exclude=self.excluded_tags,
-            groups=group_ids,
-            exclude=[article["id"] for article in latest_pinned_articles],
-            page=1,
-            per_page=limit,
-            sticky=False,
+        return (
+            partial(get_articles, per_page=1, sticky=True),
+            partial(get_articles, per_page=limit + 1, sticky=False),
+        )
+
+    def _get_related_query(self, article, tags, excluded_tags):
+        """
+        Get the API call for the candidates for an article's related
+        articles, when they can't be found locally
+        """
+
+        return partial(
+            self.api.get_articles,
+            tags=[tag["id"] for tag in tags],
+            tags_exclude=excluded_tags,
+            per_page=20,
+            exclude=[article["id"]],
         )
 
+    def _get_listing_context(self, page, articles, metadata, **extra):
+        """
+        Build the context shared by the listing pages. Pages reached
+        by cursor have no page number, and their total_pages is None.
+
+        :param extra: More entries for the context
+        """
+
+        by_cursor = "next_cursor" in metadata
+
+        return {
+            "current_page": None if by_cursor else int(page),
+            **self._get_cursors(articles, metadata, page),
+            "total_pages": None if by_cursor else int(metadata["total_pages"]),
+            "articles": articles,
+            "title": self.blog_title,
+            **extra,
+        }
+
+    def _get_archives_context(self, page, articles, metadata, group):
+        context = self._get_listing_context(
+            page, articles, metadata, total_posts=metadata["total_posts"]
+        )
+
+        if group:
+            context["group"] = group
+
+        return context
+
+    def _get_latest_news_context(
+        self, latest_pinned_articles, latest_articles, limit
+    ):
+        pinned_ids = [article["id"] for article in latest_pinned_articles]
+        latest_articles = [
+            article
+            for article in latest_articles
+            if article["id"] not in pinned_ids
+        ][:limit]
+
         return {
             "latest_articles": latest_articles,
             "latest_pinned_articles": latest_pinned_articles,
         }
 
-    def get_archives(self, page=1, group="", month="", year="", category=""):
-        groups = []
-        categories = []
+    def _prefetch_listing(self, get_listing, page, cursor, context):
+        """
+        Warm the caches for the next page of a listing, with the same
+        filters, and for the pages of the articles at the top of it
+
+        :param get_listing: The listing's view method, with its filters,
+            taking page and cursor
+        :param page: The page number of the listing
+        :param cursor: The cursor of the listing, if any
+        :param context: The listing's context
+        """
 
-        if group:
-            group = self.api.get_group_by_slug(group)
+        if self.prefetcher is None:
+            return
+
+        # Stay with cursors once the listing is paged by cursor
+        next_page = None
+        if cursor:
+            if context["next_cursor"]:
+                next_page = {"cursor": context["next_cursor"]}
+        elif int(page) < context["total_pages"]:
+            next_page = {"page": int(page) + 1}
+
+        if next_page:
+            self._prefetch(
+                (
+                    get_listing.func.__name__,
+                    get_listing.args,
+                    tuple(sorted(get_listing.keywords.items())),
+                    tuple(next_page.items()),
+                ),
+                partial(get_listing, **next_page),
+            )
 
-            if not group:
-                return None
+        article_count = self.prefetcher.article_count
+        for article in context["articles"][:article_count]:
+            self._prefetch(
+                ("get_article", article["slug"]),
+                partial(self.get_article, article["slug"]),
+            )
 
-            groups.append(group["id"])
+    def _prefetch(self, key, function):
+        self.prefetcher.prefetch_after_response(key, function)
 
-        if category:
-            category_slugs = category.split(",")
-            for slug in category_slugs:
-                category = self.api.get_category_by_slug(slug)
+    def _get_cursors(self, articles, metadata, page):
+        """
+        Get the cursors to the pages around a listing, from the API
+        if it was fetched by cursor, or from the page number, so
+        crawlers can follow cursors from any page
+
+        :returns: Dictionary of "next_cursor" and "previous_cursor"
+        """
 
-                if category:
-                    categories.append(category["id"])
+        if "next_cursor" in metadata:
+            return {
+                "next_cursor": metadata["next_cursor"],
+                "previous_cursor": metadata["previous_cursor"],
+            }
+
+        return get_page_cursors(
+            articles,
+            has_next=int(page) < int(metadata.get("total_pages") or 1),
+            has_previous=int(page) > 1,
+        )
+
+    def _get_archive_dates(self, year, month):
+        """
+        Get the after and before dates to limit the archives to
+
+        :returns: after, before
+        """
 
         after = None
         before = None
@@ -353,57 +675,195 @@ class BlogViews:
                 after = datetime(year=year, month=1, day=1)
                 before = datetime(year=year, month=12, day=31)
 
-        articles, metadata = self.api.get_articles(
-            tags=self.tag_ids,
-            tags_exclude=self.excluded_tags,
-            page=page,
-            per_page=self.per_page,
-            groups=groups,
-            categories=categories,
-            after=after,
-            before=before,
+        return after, before
+
+    def _can_merge_index_queries(self):
+        # Wordpress returns at most 100 articles at once
+        return self.merge_queries and self.per_page + FEATURED_COUNT <= 100
+
+    def _get_merged_index_lists(
+        self,
+        get_featured,
+        get_articles,
+        get_events_and_webinars,
+        categories,
+        event_category_ids,
+    ):
+        """
+        Get the lists of the first page of the index in fewer round trips,
+        with the same results as the separate queries
+
+        The articles are fetched along with the featured articles,
+        and a few more of them, to drop the featured ones from locally.
+        Without an executor, where queries run one after the other, the
+        events and webinars are picked from the same articles if the
+        newest ones are among them.
+
+        :returns: featured articles, (articles, metadata),
+            events and webinars
+        """
+
+        featured, (window, metadata), events_and_webinars = self._run_all(
+            get_featured,
+            partial(get_articles, per_page=self.per_page + FEATURED_COUNT),
+            get_events_and_webinars if self.executor is not None else None,
+        )
+        featured_articles, _ = featured
+        articles, metadata = self._exclude_articles(
+            window, metadata, featured_articles, categories
         )
 
-        total_pages = metadata["total_pages"]
-        total_posts = metadata["total_posts"]
+        if events_and_webinars is not None:
+            events_and_webinars, _ = events_and_webinars
+        else:
+            # Only the articles of any category, published, hold them all
+            events_and_webinars = None
+            if not categories and list(self.status) == ["publish"]:
+                events_and_webinars = self._pick_articles(
+                    window,
+                    self.per_page + FEATURED_COUNT,
+                    3,
+                    lambda article: set(event_category_ids).intersection(
+                        article.get("categories") or []
+                    ),
+                )
+
+            if events_and_webinars is None:
+                events_and_webinars, _ = get_events_and_webinars()
+
+        return featured_articles, (articles, metadata), events_and_webinars
+
+    def _get_merged_latest_news(self, get_pinned, get_latest, limit):
+        """
+        Get the latest news in one query instead of two, when the
+        queries would run one after the other
 
-        context = {
-            "current_page": int(page),
-            "total_pages": int(total_pages),
-            "articles": articles,
-            "title": self.blog_title,
-            "total_posts": total_posts,
+        The latest articles aren't filtered by sticky, so the newest
+        pinned article is the first sticky one among them, if any.
+        It is only fetched on its own when none of them are sticky.
+
+        :returns: pinned articles, latest articles
+        """
+
+        latest_articles, _ = get_latest(fields=MERGED_LATEST_FIELDS)
+        latest_pinned_articles = self._pick_pinned_articles(
+            latest_articles, limit
+        )
+
+        if latest_pinned_articles is None:
+            latest_pinned_articles, _ = get_pinned()
+
+        return latest_pinned_articles, latest_articles
+
+    def _pick_pinned_articles(self, latest_articles, limit):
+        """
+        Pick the newest pinned article out of the latest articles,
+        fetched with MERGED_LATEST_FIELDS
+
+        :returns: List of the pinned article, or None if it might not
+            be among them
+        """
+
+        # Leave the articles as the separate queries would
+        sticky_ids = {
+            article["id"]
+            for article in latest_articles
+            if article.pop("sticky", False)
         }
 
-        if group:
-            context["group"] = group
+        return self._pick_articles(
+            latest_articles,
+            limit + 1,
+            1,
+            lambda article: article["id"] in sticky_ids,
+        )
 
-        return context
+    def _exclude_articles(self, window, metadata, excluded, categories):
+        """
+        Drop articles from a page fetched with extra articles, as if
+        they had been excluded from the query, recounting the totals
 
-    def get_tag(self, slug, page=1):
-        tag = self.api.get_tag_by_slug(slug)
+        :param window: The page, with as many extra articles
+            as there are articles to exclude
+        :param metadata: The metadata of the page
+        :param excluded: Articles to exclude
+        :param categories: Category ids the page was filtered by
 
-        if not tag:
-            return None
+        :returns: articles, metadata
+        """
 
-        articles, metadata = self.api.get_articles(
-            tags=[tag["id"]],
-            tags_exclude=self.excluded_tags,
-            page=page,
-            per_page=self.per_page,
-            status=self.status,
+        excluded_ids = {article["id"] for article in excluded}
+        articles = [
+            article for article in window if article["id"] not in excluded_ids
+        ][: self.per_page]
+
+        if metadata.get("total_posts") is None:
+            return articles, metadata
+
+        # Excluded articles would have been counted if they match
+        category_ids = {int(id) for id in categories}
+        total_posts = int(metadata["total_posts"]) - len(
+            [
+                article
+                for article in excluded
+                if "publish" in self.status
+                and (
+                    not category_ids
+                    or category_ids.intersection(article.get("categories", []))
+                )
+            ]
         )
-        total_pages = metadata["total_pages"]
 
-        return {
-            "current_page": int(page),
-            "total_pages": int(total_pages),
-            "total_posts": metadata.get("total_posts", 0),
-            "articles": articles,
-            "title": self.blog_title,
-            "tag": tag,
+        return articles, {
+            **metadata,
+            "total_posts": str(total_posts),
+            "total_pages": str(math.ceil(total_posts / self.per_page)),
         }
 
+    def _pick_articles(self, window, window_size, count, match):
+        """
+        Pick the newest articles matching a narrower query out of the
+        newest articles of a broader one
+
+        :param window: The newest articles of the broader query
+        :param window_size: How many articles were asked for
+        :param count: How many articles to pick
+        :param match: Callable telling if an article matches
+
+        :returns: List of articles, or None if the window might not
+            hold all of them
+        """
+
+        picked = [article for article in window if match(article)][:count]
+
+        if len(picked) == count or len(window) < window_size:
+            return picked
+
+        return None
+
+    def _run_all(self, *calls):
+        """
+        Make independent API calls, concurrently if the views were given
+        an executor, and wait for all of them
+
+        :param calls: Callables taking no arguments, or None to skip
+
+        :returns: List of the results in the same order, None for skipped
+        """
+
+        # Prefetches leave the executor to the requests being served
+        if self.executor is None or self._is_prefetching():
+            return [call() if call else None for call in calls]
+
+        futures = [
+            self.executor.submit(call) if call else None for call in calls
+        ]
+
+        return [future.result() if future else None for future in futures]
+
+    def _is_prefetching(self):
+        return self.prefetcher is not None and self.prefetcher.is_prefetching()
+
     def _get_article_context(
         self, article, related_tag_ids=[], excluded_tags=[]
     ):
@@ -413,15 +873,59 @@ class BlogViews:
         """
 
         tags = article["_embedded"].get("wp:term", [{}, {}])[1]
-        current_tag_ids = set([tag["id"] for tag in tags])
 
-        all_related_articles, _ = self.api.get_articles(
-            tags=[tag["id"] for tag in tags],
-            tags_exclude=excluded_tags,
-            per_page=20,
+        all_related_articles = self._get_local_related_articles(
+            article, tags, related_tag_ids, excluded_tags
+        )
+
+        if all_related_articles is None:
+            all_related_articles, _ = self._get_related_query(
+                article, tags, excluded_tags
+            )()
+
+        return self._build_article_context(
+            article, tags, all_related_articles, related_tag_ids
+        )
+
+    def _get_local_related_articles(
+        self, article, tags, related_tag_ids, excluded_tags
+    ):
+        """
+        Get the most related articles from the related table,
+        or the related index, as candidates for _build_article_context
+
+        :returns: List of articles, or None to fetch them from the API
+        """
+
+        if self.related_table is not None:
+            related_articles = self.related_table.get_related(
+                article["id"], related_tag_ids, excluded_tags
+            )
+
+            if related_articles is not None:
+                return related_articles
+
+        # An index that isn't loaded yet would find nothing
+        if self.related_index is None or not len(self.related_index):
+            return None
+
+        return self.related_index.get_related(
+            [tag["id"] for tag in tags],
+            required_tag_ids=related_tag_ids,
+            excluded_tag_ids=excluded_tags,
             exclude=[article["id"]],
+            count=3,
         )
 
+    def _build_article_context(
+        self, article, tags, all_related_articles, related_tag_ids
+    ):
+        """
+        Pick the most related articles out of the candidates
+        and build the context for the article page
+        """
+
+        current_tag_ids = set([tag["id"] for tag in tags])
         related_articles = []
         for related_article in all_related_articles:
             if set(related_tag_ids) <= set(related_article["tags"]):
@@ -461,50 +965,165 @@ class BlogViews:
 
         return False
 
-    def _build_feed(
-        self, blog_url, feed_url, feed_title, feed_description, articles
-    ):
+    def render_feed(self, context):
+        """
+        Render the RSS for the context of a feed
+
+        :param context: Dictionary from one of the get_*_feed_context methods
         """
-        Build the content for the feed
-        :blog_url: string blog url
-        :feed_url: string url
-        :feed_title: string title
-        :feed_description: string description
-        :param articles: Articles to create feed from
-        """
-        feed = FeedGenerator()
-        feed.generator("Python Feedgen")
-        feed.title(feed_title)
-        feed.description(feed_description)
-        feed.link(href=feed_url, rel="self")
-
-        for article in articles:
-            title = article["title"]["rendered"]
-            slug = article["slug"]
-            author = article["_embedded"]["author"][0]
-            description = article["excerpt"]["rendered"]
-            content = article["content"]["rendered"]
-            published = f'{article["date_gmt"]} GMT'
-            updated = f'{article["modified_gmt"]} GMT'
-            link = f"{blog_url}/{slug}"
-
-            categories = []
-
-            if "wp:term" in article["_embedded"]:
-                for category in article["_embedded"]["wp:term"][1]:
-                    categories.append(
-                        dict(term=category["slug"], label=category["name"])
-                    )
-
-            entry = FeedEntry()
-            entry.title(title)
-            entry.description(description)
-            entry.content(content)
-            entry.author(name=author["name"], email=author["name"])
-            entry.link(href=link)
-            entry.category(categories)
-            entry.published(published)
-            entry.updated(updated)
-            feed.add_entry(entry, order="append")
-
-        return feed
+
+        return b"".join(self.stream_feed(context))
+
+    def stream_feed(self, context):
+        """
+        Write the RSS for the context of a feed one item at a time,
+        e.g. for a streamed flask.Response
+
+        :param context: Dictionary from one of the get_*_feed_context methods
+
+        :returns: Generator of bytes
+        """
+
+        articles = context["articles"]
+        last_build_date = None
+
+        # Rather than the time of the request, so the same articles
+        # always give the same feed
+        if articles:
+            last_build_date = datetime.strptime(
+                max(article["modified_gmt"] for article in articles),
+                "%Y-%m-%dT%H:%M:%S",
+            ).replace(tzinfo=timezone.utc)
+
+        return stream_rss(
+            title=context["title"],
+            link=context["feed_url"],
+            description=self.feed_description,
+            items=(
+                self._get_fragment(
+                    f"rss-item:{self.feed_summary_only}:{context['blog_url']}",
+                    article,
+                    lambda article=article: self._build_feed_item_xml(
+                        article, context["blog_url"]
+                    ),
+                )
+                for article in articles
+            ),
+            last_build_date=last_build_date,
+        )
+
+    def render_card(self, article, template):
+        """
+        Render the card for an article, as shown in lists of articles,
+        from the fragment cache if it has the same revision. Templates
+        rendered by build_blueprint can call it as render_blog_card.
+
+        :param article: The article to render
+        :param template: The template for the card, given the article
+        """
+
+        return Markup(
+            self._get_fragment(
+                f"card:{template}",
+                article,
+                lambda: flask.render_template(template, article=article),
+            )
+        )
+
+    def _get_fragment(self, kind, article, render):
+        """
+        Get a fragment rendered for one revision of an article from the
+        fragment cache, or render it and store it there
+
+        :param kind: What the fragment is, e.g. "card:blog/card.html"
+        :param article: The article the fragment is for
+        :param render: Callable rendering the fragment, as str or bytes
+        """
+
+        if self.fragment_cache is None or not article.get("modified_gmt"):
+            return render()
+
+        key = f"{kind}:{article['id']}:{article['modified_gmt']}"
+        fragment = self.fragment_cache.get(key)
+
+        if fragment is None:
+            fragment = render()
+
+            # In bytes, like the other cached entries
+            size = len(fragment)
+            if isinstance(fragment, str):
+                size = len(fragment.encode())
+
+            self.fragment_cache.set(
+                key,
+                fragment,
+                size=size,
+                tags=[f"post:{article['id']}"],
+            )
+
+        return fragment
+
+    def _get_feed_fields(self):
+        if self.feed_summary_only:
+            return DEFAULT_POST_FIELDS
+
+        return POST_DETAILS_FIELDS
+
+    def _get_feed_context(self, title, articles, url_root, **subject):
+        """
+        Build the context for a feed, so it can be checked against
+        what a client already has before rendering it
+
+        :param subject: The group, tag or author the feed is for
+        """
+
+        return {
+            "title": title,
+            "articles": articles,
+            "blog_url": f"{url_root}/{self.blog_path}",
+            "feed_url": f"{url_root}/{flask.request.path.strip('/')}",
+            **subject,
+        }
+
+    def _build_feed_item_xml(self, article, blog_url):
+        """
+        Serialize the <item> for an article on its own, using the
+        namespace prefixes declared on the feed's <rss> element
+        """
+
+        rss = etree.Element("rss", nsmap=FEED_NAMESPACES)
+        rss.append(self._build_feed_entry(article, blog_url).rss_entry())
+        xml = etree.tostring(rss)
+
+        return xml[xml.index(b">") + 1 : -len(b"</rss>")]  # noqa: E203
+
+    def _build_feed_entry(self, article, blog_url):
+        title = article["title"]["rendered"]
+        slug = article["slug"]
+        author = article["_embedded"]["author"][0]
+        description = article["excerpt"]["rendered"]
+        published = f'{article["date_gmt"]} GMT'
+        updated = f'{article["modified_gmt"]} GMT'
+        link = f"{blog_url}/{slug}"
+
+        categories = []
+
+        if "wp:term" in article["_embedded"]:
+            for category in article["_embedded"]["wp:term"][1]:
+                categories.append(
+                    dict(term=category["slug"], label=category["name"])
+                )
+
+        entry = FeedEntry()
+        entry.title(title)
+        entry.description(description)
+        if not self.feed_summary_only:
+            entry.content(article["content"]["rendered"])
+
+        entry.author(name=author["name"], email=author["name"])
+        entry.link(href=link)
+        entry.category(categories)
+        entry.published(published)
+        entry.updated(updated)
+
+        return entry
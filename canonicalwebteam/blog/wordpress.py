@@ -1,3 +1,4 @@
+from .cache import SingleFlight
 from .constants import (
     CATEGORY_FIELDS,
     TAG_FIELDS,
@@ -5,7 +6,17 @@ from .constants import (
     DEFAULT_POST_FIELDS,
     POST_DETAILS_FIELDS,
 )
+from .cursor import (
+    MAX_CURSOR_LIMIT,
+    get_cursor_bounds,
+    get_cursor_limit,
+    get_cursor_page,
+    needs_wider_fetch,
+)
+from .dependencies import get_response_tags
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
 
 
@@ -20,32 +31,52 @@ class Wordpress:
         api_url="https://admin.insights.ubuntu.com/wp-json/wp/v2",
         wordpress_username=None,
         wordpress_password=None,
+        cache=None,
     ):
         """
         Wordpress API object, for making calls to the wordpress API
+
+        :param cache: Optional ResponseCache to keep GET responses in
         """
 
         self.session = session
         self.api_url = api_url
         self.wordpress_username = wordpress_username
         self.wordpress_password = wordpress_password
+        self.cache = cache
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor = None
+        self._in_flight = SingleFlight()
+
+        if self.session is not None:
+            self._prepare_session(self.session)
+
+    def _prepare_session(self, session):
+        """
+        Set the credentials and default headers on a session
+        """
 
         if self.wordpress_username and self.wordpress_password:
             creds = f"{self.wordpress_username}:{self.wordpress_password}"
             encoded_credentials = base64.b64encode(creds.encode()).decode()
-            self.session.headers.update(
+            session.headers.update(
                 {"Authorization": f"Basic {encoded_credentials}"}
             )
         # Encourage compressed responses for performance
-        if "Accept-Encoding" not in self.session.headers:
-            self.session.headers.update(
-                {"Accept-Encoding": "gzip, deflate, br"}
-            )
-        if "Accept" not in self.session.headers:
-            self.session.headers.update({"Accept": "application/json"})
+        if "Accept-Encoding" not in session.headers:
+            session.headers.update({"Accept-Encoding": "gzip, deflate, br"})
+        if "Accept" not in session.headers:
+            session.headers.update({"Accept": "application/json"})
 
     def request(
-        self, endpoint, params={}, method="get", embed=True, fields=None
+        self,
+        endpoint,
+        params={},
+        method="get",
+        embed=True,
+        fields=None,
+        cached=True,
     ):
         """
         Build url to fetch articles from Wordpress api
@@ -54,10 +85,45 @@ class Wordpress:
         :param embed: Whether to request embedded resources via _embed=true
         :param fields: Optional list or comma-separated
                         string of fields to include
+        :param cached: Whether the response can come from, and be stored
+                        in, the cache
 
         :returns: Response from Wordpress api
         """
 
+        url, key = self._build_url(endpoint, params, embed, fields)
+
+        if method.lower() != "get" or not cached:
+            return self._fetch(method, url)
+
+        if self.cache is None:
+            return self._in_flight.do(key, lambda: self._fetch(method, url))
+
+        entry = self.cache.get_entry(key, include_expired=True)
+
+        if entry is None or not entry.is_usable():
+            return self._in_flight.do(
+                key,
+                lambda: self._fetch_into_cache(
+                    key, endpoint, params, method, url, entry
+                ),
+            )
+
+        if not entry.is_fresh():
+            self._refresh_in_background(
+                key, endpoint, params, method, url, entry
+            )
+
+        return entry.value
+
+    def _build_url(self, endpoint, params, embed, fields):
+        """
+        Build the url for a request, and the key identifying it
+        in the cache, which is the same whatever the parameter order
+
+        :returns: url, key
+        """
+
         clean_params = {}
         for key, value in params.items():
             if value:
@@ -78,14 +144,117 @@ class Wordpress:
             clean_params["_embed"] = "true"
 
         query = urlencode(clean_params)
+        sorted_query = urlencode(sorted(clean_params.items()))
 
-        response = self.session.request(
-            method, f"{self.api_url}/{endpoint}?{query}"
+        return (
+            f"{self.api_url}/{endpoint}?{query}",
+            f"{self.api_url}/{endpoint}?{sorted_query}",
         )
+
+    def _conditional_headers(self, previous):
+        """
+        Headers to revalidate a previously cached response with
+        """
+
+        headers = {}
+
+        if previous is not None:
+            etag = previous.value.headers.get("ETag")
+            last_modified = previous.value.headers.get("Last-Modified")
+
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        return headers
+
+    def _fetch(self, method, url, headers=None):
+        if headers:
+            response = self.session.request(method, url, headers=headers)
+        else:
+            response = self.session.request(method, url)
+
         response.raise_for_status()
 
         return response
 
+    def _fetch_into_cache(
+        self, key, endpoint, params, method, url, previous=None
+    ):
+        """
+        Fetch a response and store it in the cache, tagged with what
+        it depends on. If a previous response is given, revalidate it
+        with its ETag and Last-Modified headers, and keep it if
+        Wordpress answers 304 Not Modified.
+        """
+
+        response = self._fetch(
+            method, url, self._conditional_headers(previous)
+        )
+
+        if response.status_code == 304 and previous is not None:
+            response = previous.value
+
+        self.cache.set(
+            key,
+            response,
+            size=len(response.content),
+            ttl=self.cache.get_ttl(endpoint),
+            tags=get_response_tags(endpoint, params, response.json()),
+        )
+
+        return response
+
+    def invalidate(self, tags):
+        """
+        Remove the cached responses depending on any of the tags,
+        e.g. from dependencies.get_post_tags for a changed post
+
+        :returns: Number of responses removed
+        """
+
+        if self.cache is None:
+            return 0
+
+        return self.cache.invalidate_tags(tags)
+
+    def _refresh_in_background(
+        self, key, endpoint, params, method, url, previous
+    ):
+        """
+        Refetch an expired response on a worker thread, so the stale copy
+        can be served in the meantime. Only one refresh runs per key.
+        """
+
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+
+            self._refreshing.add(key)
+
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="blog-refresh"
+                )
+
+        def refresh():
+            try:
+                self._in_flight.do(
+                    key,
+                    lambda: self._fetch_into_cache(
+                        key, endpoint, params, method, url, previous
+                    ),
+                )
+            except Exception:
+                # Keep serving the stale copy until it runs out
+                pass
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_executor.submit(refresh)
+
     def get_first_item(self, endpoint, params={}, embed=True, fields=None):
         response = self.request(endpoint, params, embed=embed, fields=fields)
 
@@ -94,6 +263,35 @@ class Wordpress:
 
         return response.json()[0]
 
+    def get_all_pages(
+        self, endpoint, params={}, embed=False, fields=None, cached=True
+    ):
+        """
+        Page through every item of an endpoint, 100 at a time
+
+        :returns: List of all the items
+        """
+
+        items = []
+        page = 1
+
+        while True:
+            response = self.request(
+                endpoint,
+                {**params, "per_page": 100, "page": page},
+                embed=embed,
+                fields=fields,
+                cached=cached,
+            )
+            items.extend(response.json())
+
+            total_pages = int(response.headers.get("X-WP-TotalPages") or 1)
+
+            if page >= total_pages:
+                return items
+
+            page += 1
+
     def get_articles(
         self,
         tags=None,
@@ -109,6 +307,8 @@ class Wordpress:
         page=1,
         status=None,
         fields=None,
+        cursor=None,
+        include=None,
     ):
         """
         Get articles from Wordpress api
@@ -125,36 +325,123 @@ class Wordpress:
         :param author: Name of the author to fetch articles from
         :param status: Array of post statuses to include
             (e.g., ['publish', 'draft'])
+        :param cursor: Cursor from the "next_cursor" or "previous_cursor"
+            of earlier metadata, to get the page past it by date instead
+            of by page number, so deep pages cost as little as the first
+        :param include: Array of article IDs to only get
 
         :returns: response, metadata dictionary
         """
-        response = self.request(
-            "posts",
-            {
-                "tags": tags,
-                "per_page": per_page,
-                "page": page,
-                "tags_exclude": tags_exclude,
-                "exclude": exclude,
-                "categories": categories,
-                "group": groups,
-                "sticky": sticky,
-                "before": before,
-                "after": after,
-                "author": author,
-                "status": status,
-            },
-            fields=(fields if fields else DEFAULT_POST_FIELDS),
+        params = self._get_articles_params(
+            tags,
+            tags_exclude,
+            exclude,
+            categories,
+            sticky,
+            before,
+            after,
+            author,
+            groups,
+            per_page,
+            page,
+            status,
+            cursor,
+            include,
+        )
+        fields = fields if fields else DEFAULT_POST_FIELDS
+        response = self.request("posts", params, fields=fields)
+        articles, metadata = self._parse_articles_response(
+            response, per_page, cursor, params["per_page"]
         )
+        wider_params = self._get_wider_params(
+            response, articles, per_page, cursor, params
+        )
+
+        if wider_params:
+            response = self.request("posts", wider_params, fields=fields)
+            articles, metadata = self._parse_articles_response(
+                response, per_page, cursor, wider_params["per_page"]
+            )
+
+        return articles, metadata
+
+    def _get_articles_params(
+        self,
+        tags,
+        tags_exclude,
+        exclude,
+        categories,
+        sticky,
+        before,
+        after,
+        author,
+        groups,
+        per_page,
+        page,
+        status,
+        cursor,
+        include=None,
+    ):
+        order = None
+
+        # More articles than a page, past ties on the cursor's second
+        if cursor:
+            before, after, order = get_cursor_bounds(cursor, before, after)
+            per_page = get_cursor_limit(per_page)
+            page = None
+
+        return {
+            "tags": tags,
+            "per_page": per_page,
+            "page": page,
+            "tags_exclude": tags_exclude,
+            "exclude": exclude,
+            "categories": categories,
+            "group": groups,
+            "sticky": sticky,
+            "before": before,
+            "after": after,
+            "author": author,
+            "status": status,
+            "order": order,
+            "include": include,
+        }
+
+    def _parse_articles_response(
+        self, response, per_page=None, cursor=None, limit=None
+    ):
         total_pages = response.headers.get("X-WP-TotalPages")
         total_posts = response.headers.get("X-WP-Total")
 
         articles = response.json()
+        metadata = {"total_pages": total_pages, "total_posts": total_posts}
 
-        return (
-            articles,
-            {"total_pages": total_pages, "total_posts": total_posts},
-        )
+        if cursor:
+            articles, cursors = get_cursor_page(
+                articles, cursor, per_page, total_posts, limit
+            )
+            metadata.update(cursors)
+
+            # The bounded query counts pages of another size,
+            # from the cursor on
+            metadata["total_pages"] = None
+
+        return articles, metadata
+
+    def _get_wider_params(self, response, articles, per_page, cursor, params):
+        """
+        Get the parameters to fetch a page past a cursor again with,
+        if articles sharing a second crowded it out of the response
+
+        :returns: The parameters, or None if the page is complete
+        """
+
+        if cursor and needs_wider_fetch(
+            len(response.json()), articles, per_page, params["per_page"]
+        ):
+            return {**params, "per_page": MAX_CURSOR_LIMIT}
+
+        return None
 
     def get_article(
         self,
@@ -259,3 +546,60 @@ class Wordpress:
         return self.request(
             (f"users/{str(id)}"), embed=False, fields=USER_FIELDS
         ).json()
+
+    def get_categories_by_slugs(self, slugs):
+        return self._get_items_by("categories", "slug", slugs, CATEGORY_FIELDS)
+
+    def get_categories_by_ids(self, ids):
+        return self._get_items_by("categories", "id", ids, CATEGORY_FIELDS)
+
+    def get_tags_by_slugs(self, slugs):
+        return self._get_items_by("tags", "slug", slugs, TAG_FIELDS)
+
+    def get_tags_by_ids(self, ids):
+        return self._get_items_by("tags", "id", ids, TAG_FIELDS)
+
+    def get_groups_by_ids(self, ids):
+        return self._get_items_by("group", "id", ids, CATEGORY_FIELDS)
+
+    def get_users_by_ids(self, ids):
+        return self._get_items_by("users", "id", ids, USER_FIELDS)
+
+    def get_media_by_ids(self, ids):
+        return self._get_items_by("media", "id", ids)
+
+    def _get_items_by(self, endpoint, key, values, fields=None):
+        """
+        Get many items in as few requests as possible, using the "include"
+        (for ids) or "slug" filters with up to 100 values each
+
+        :param endpoint: The REST endpoint to fetch the items from
+        :param key: "id" or "slug"
+        :param values: The ids or slugs to fetch
+        :param fields: Optional list of fields to include
+
+        :returns: The items found, in the order of values
+        """
+
+        if key == "id":
+            values = [int(value) for value in values]
+
+        values = list(dict.fromkeys(values))
+        items = {}
+
+        for start in range(0, len(values), 100):
+            chunk = values[start : start + 100]  # noqa: E203
+            params = {"include" if key == "id" else "slug": chunk}
+
+            # Wordpress returns 10 items per page by default
+            if len(chunk) > 10:
+                params["per_page"] = len(chunk)
+
+            response = self.request(
+                endpoint, params, embed=False, fields=fields
+            )
+
+            for item in response.json():
+                items[item[key]] = item
+
+        return [items[value] for value in values if value in items]
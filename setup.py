@@ -5,7 +5,7 @@ from setuptools import find_packages, setup
 
 setup(
     name="canonicalwebteam.blog",
-    version="6.7.0",
+    version="6.32.0",
     description=("Flask extension to add a nice blog to your website"),
     long_description=open("README.md").read(),
     long_description_content_type="text/markdown",
@@ -16,7 +16,7 @@ setup(
         "flask",
         "feedgen",
         "requests",
-        "beautifulsoup4",
         "canonicalwebteam.image-template",
     ],
+    extras_require={"async": ["flask[async]"]},
 )
@@ -0,0 +1,174 @@
+# Standard library
+import json
+import threading
+from urllib.parse import parse_qs, urlparse
+
+# Packages
+import requests
+
+# Local
+from canonicalwebteam.blog import LocalMirror
+
+
+def make_post(
+    id, date_gmt=None, tags=(), categories=(), sticky=False, **extra
+):
+    """
+    Build a post as Wordpress returns it, with its tags embedded
+
+    :param date_gmt: Defaults to the id-th of January 2020
+    :param extra: Other fields, replacing the defaults
+    """
+
+    date_gmt = date_gmt or f"2020-01-{id:02}T10:00:00"
+
+    return {
+        "id": id,
+        "slug": f"post-{id}",
+        "date_gmt": date_gmt,
+        "modified_gmt": date_gmt,
+        "author": 1,
+        "tags": list(tags),
+        "categories": list(categories),
+        "group": [],
+        "sticky": sticky,
+        "status": "publish",
+        "title": {"rendered": f"Post {id}"},
+        "excerpt": {"rendered": "Excerpt"},
+        "content": {"rendered": "<p>Content</p>"},
+        "_embedded": {
+            "wp:term": [[], [{"id": tag, "name": str(tag)} for tag in tags]]
+        },
+        **extra,
+    }
+
+
+class FakeAPI:
+    """
+    Answer queries from a LocalMirror of fixed posts, and term lookups
+    from fixed terms, recording every call
+    """
+
+    def __init__(self, posts=(), terms=None, page_size=None):
+        """
+        :param posts: Posts built with make_post
+        :param terms: Lists of terms by endpoint, e.g. {"tags": [...]}
+        :param page_size: Most articles to return at once, if any
+        """
+
+        self.posts = {}
+        self.terms = terms or {}
+        self.page_size = page_size
+        self.mirror = LocalMirror()
+        self.calls = []
+        self.lock = threading.Lock()
+
+        self.update_posts(posts)
+
+    def update_posts(self, posts):
+        self.posts.update({post["id"]: post for post in posts})
+        self.mirror.update_posts(posts)
+
+    def delete_posts(self, ids):
+        for id in ids:
+            self.posts.pop(id, None)
+
+        self.mirror.delete_posts(ids)
+
+    def get_calls(self, name):
+        """
+        :returns: The arguments of each call to a method
+        """
+
+        with self.lock:
+            return [kwargs for method, kwargs in self.calls if method == name]
+
+    def get_articles(self, per_page=12, **kwargs):
+        self._record("get_articles", per_page=per_page, **kwargs)
+
+        if self.page_size:
+            per_page = min(int(per_page), self.page_size)
+
+        return self.mirror.get_articles(per_page=per_page, **kwargs)
+
+    def get_article(self, slug, tags=None, tags_exclude=None, status=None):
+        self._record("get_article", slug=slug)
+
+        return self.mirror.get_article(slug, tags, tags_exclude, status)
+
+    def get_all_pages(
+        self, endpoint, params={}, embed=False, fields=None, cached=True
+    ):
+        if endpoint == "posts":
+            return list(self.posts.values())
+
+        return list(self.terms.get(endpoint, []))
+
+    def get_category_by_slug(self, slug):
+        return self._get_term("get_category_by_slug", "categories", slug)
+
+    def get_tag_by_slug(self, slug):
+        return self._get_term("get_tag_by_slug", "tags", slug)
+
+    def get_group_by_slug(self, slug):
+        return self._get_term("get_group_by_slug", "group", slug)
+
+    def get_user_by_username(self, username):
+        return self._get_term("get_user_by_username", "users", username)
+
+    def _get_term(self, method, endpoint, slug):
+        self._record(method, slug=slug)
+
+        for term in self.terms.get(endpoint, []):
+            if term["slug"] == slug:
+                return term
+
+        return {}
+
+    def _record(self, method, **kwargs):
+        with self.lock:
+            self.calls.append((method, kwargs))
+
+
+class PagedSession(requests.Session):
+    """
+    Serve a fixed list of items for each endpoint,
+    with at most page_size items per page
+    """
+
+    def __init__(self, items, page_size=2):
+        super().__init__()
+        self.items = items
+        self.page_size = page_size
+        self.requested_urls = []
+
+    def request(self, method, url, *args, **kwargs):
+        self.requested_urls.append(url)
+
+        parsed_url = urlparse(url)
+        endpoint = parsed_url.path.split("/wp/v2/")[1]
+        query = parse_qs(parsed_url.query)
+        page = int(query.get("page", ["1"])[0])
+        per_page = min(int(query.get("per_page", ["10"])[0]), self.page_size)
+
+        items = self.items.get(endpoint, [])
+
+        if "slug" in query:
+            slugs = query["slug"][0].split(",")
+            items = [item for item in items if item["slug"] in slugs]
+
+        if "include" in query:
+            ids = query["include"][0].split(",")
+            items = [item for item in items if str(item["id"]) in ids]
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers["X-WP-TotalPages"] = str(
+            max(1, -(-len(items) // per_page))
+        )
+        response._content = json.dumps(
+            items[(page - 1) * per_page : page * per_page]  # noqa: E203
+        ).encode()
+
+        return response
@@ -0,0 +1,106 @@
+# Standard library
+import copy
+import json
+import unittest
+
+# Packages
+import flask
+
+# Local
+from canonicalwebteam.blog import LazyArticle
+
+
+class TestLazyArticle(unittest.TestCase):
+    def setUp(self):
+        self.transformed = []
+        self.article = LazyArticle(
+            {"id": 1, "content": {"rendered": "<p>Content</p>"}}
+        )
+        self.article.defer("content", self.transform)
+        self.article.defer("meta_description", lambda value: "Description")
+
+    def transform(self, content):
+        self.transformed.append(content["rendered"])
+
+        return {"rendered": content["rendered"].upper()}
+
+    def test_transforms_on_first_read(self):
+        self.assertEqual(self.article["id"], 1)
+        self.assertIn("content", self.article)
+        self.assertEqual(len(self.article), 3)
+        self.assertEqual(self.transformed, [])
+
+        self.assertEqual(self.article["content"]["rendered"], "<P>CONTENT</P>")
+        self.assertEqual(
+            self.article.get("content"), {"rendered": "<P>CONTENT</P>"}
+        )
+        self.assertEqual(self.transformed, ["<p>Content</p>"])
+
+    def test_set_before_read(self):
+        self.article["content"] = {"rendered": "Replaced"}
+
+        self.assertEqual(self.article["content"]["rendered"], "Replaced")
+        self.assertEqual(self.transformed, [])
+
+    def test_whole_article(self):
+        expected = {
+            "id": 1,
+            "content": {"rendered": "<P>CONTENT</P>"},
+            "meta_description": "Description",
+        }
+
+        self.assertEqual(json.loads(json.dumps(self.article)), expected)
+        self.assertEqual(dict(self.article), expected)
+        self.assertEqual(self.article, expected)
+        self.assertEqual(copy.deepcopy(self.article), expected)
+        self.assertEqual(self.transformed, ["<p>Content</p>"])
+
+    def test_unpacking(self):
+        expected = {
+            "id": 1,
+            "content": {"rendered": "<P>CONTENT</P>"},
+            "meta_description": "Description",
+        }
+
+        def keywords(**kwargs):
+            return kwargs
+
+        # Before anything else has read the article
+        self.assertEqual(dict(self.article), expected)
+        self.assertEqual(self.transformed, ["<p>Content</p>"])
+
+        for unpack in (
+            lambda article: {**article},
+            lambda article: keywords(**article),
+            lambda article: {} | article,
+        ):
+            article = LazyArticle({"id": 1, "content": {"rendered": "<p>"}})
+            article.defer("content", self.transform)
+            article.defer("meta_description", lambda value: "Description")
+
+            self.assertEqual(
+                unpack(article),
+                {**expected, "content": {"rendered": "<P>"}},
+            )
+
+    def test_fork(self):
+        fork = self.article.fork()
+        fork["id"] = 2
+
+        self.assertEqual(self.article["id"], 1)
+        self.assertEqual(self.transformed, [])
+
+        self.assertEqual(fork["content"]["rendered"], "<P>CONTENT</P>")
+        self.assertEqual(self.article.fork()["content"], fork["content"])
+        self.assertEqual(self.article["content"], fork["content"])
+        self.assertEqual(self.transformed, ["<p>Content</p>"])
+
+    def test_template(self):
+        with flask.Flask("main").app_context():
+            html = flask.render_template_string(
+                "{{ article.content.rendered }} "
+                "{{ article.meta_description }}",
+                article=self.article,
+            )
+
+        self.assertEqual(html, "&lt;P&gt;CONTENT&lt;/P&gt; Description")
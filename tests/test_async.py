@@ -0,0 +1,368 @@
+# Standard library
+import asyncio
+import json
+import os
+import time
+import unittest
+
+# Packages
+import flask
+import requests
+from flask_reggie import Reggie
+from vcr_unittest import VCRTestCase
+
+# Local
+from canonicalwebteam.blog import (
+    AsyncBlogAPI,
+    AsyncBlogViews,
+    AsyncWordpress,
+    Prefetcher,
+    ResponseCache,
+    TaxonomyIndex,
+    build_async_blueprint,
+)
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+
+try:
+    import asgiref  # noqa: F401
+
+    has_asgiref = True
+except ImportError:
+    has_asgiref = False
+
+
+class AsyncSession:
+    """
+    Make requests through a requests session from a coroutine,
+    so the recorded cassettes can be replayed
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.headers = self.session.headers
+        self.requested_urls = []
+
+    async def request(self, method, url, **kwargs):
+        self.requested_urls.append(url)
+
+        # Let other coroutines run, like a real asynchronous client
+        await asyncio.sleep(0)
+
+        return self.session.request(method, url, **kwargs)
+
+
+class StrictResponse(requests.Response):
+    """
+    A response raising for anything but a 2xx, like httpx responses
+    """
+
+    def raise_for_status(self):
+        if not 200 <= self.status_code < 300:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}")
+
+
+class RevalidatingSession:
+    """
+    An asynchronous session answering every request with a fixed JSON
+    body and ETag, or 304 Not Modified when the ETag is sent back
+    """
+
+    def __init__(self, body=None, etag='"abc"'):
+        self.headers = {}
+        self.body = body if body is not None else [{"id": 1}]
+        self.etag = etag
+        self.requested_urls = []
+        self.sent_headers = []
+
+    async def request(self, method, url, headers=None):
+        self.requested_urls.append(url)
+        self.sent_headers.append(headers or {})
+
+        response = StrictResponse()
+        response.url = url
+
+        if self.etag:
+            response.headers["ETag"] = self.etag
+
+        if self.etag and (headers or {}).get("If-None-Match") == self.etag:
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = json.dumps(self.body).encode()
+
+        return response
+
+
+class FakeAsyncAPI:
+    """
+    An asynchronous API with two pages of one article for any query,
+    the first pinned, recording the calls made to it
+    """
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory
+        self.calls = []
+
+    async def get_tag_by_slug(self, slug):
+        self.calls.append(("get_tag_by_slug", slug))
+
+        return {"id": 2, "slug": slug}
+
+    async def get_articles(self, page=1, **kwargs):
+        self.calls.append(("get_articles", page, kwargs))
+
+        return (
+            [
+                {
+                    "id": page,
+                    "slug": f"article-{page}",
+                    "date_gmt": f"2020-01-0{page}T10:00:00",
+                    "sticky": page == 1,
+                }
+            ],
+            {"total_pages": "2", "total_posts": "2"},
+        )
+
+
+class TermsAPI:
+    """
+    A synchronous API to load a TaxonomyIndex with a single tag from
+    """
+
+    def get_all_pages(self, taxonomy, fields=None):
+        if taxonomy == "tags":
+            return [{"id": 10, "slug": "design", "name": "Design"}]
+
+        return []
+
+
+def first_key(api):
+    return next(iter(api.cache._entries))
+
+
+class TestAsyncBlogAPI(VCRTestCase):
+    def _get_vcr_kwargs(self):
+        return {
+            "record_mode": "new_episodes",
+        }
+
+    def _get_cassette_name(self):
+        # Make the same requests as the synchronous tests
+        return f"TestBlogAPI.{self._testMethodName}.yaml"
+
+    def test_get_articles(self):
+        api = AsyncBlogAPI(session=AsyncSession())
+
+        articles, metadata = asyncio.run(api.get_articles())
+
+        self.assertTrue(int(metadata["total_pages"]) >= 258)
+        self.assertTrue(len(articles) > 0)
+
+        for article in articles:
+            self.assertIn("date", article)
+            self.assertIn("raw", article["excerpt"])
+
+        no_article = asyncio.run(api.get_article(slug="nonexistent-slug"))
+        self.assertEqual(no_article, {})
+
+    def test_it_transforms_article_image(self):
+        api = AsyncBlogAPI(session=AsyncSession(), use_image_template=True)
+
+        article = asyncio.run(
+            api.get_article(
+                slug="/dell-xps-13-developer-edition-with-ubuntu-20-04"
+                + "-lts-pre-installed-is-now-available"
+            )
+        )
+
+        self.assertIn(
+            "https://res.cloudinary.com/canonical/image/fetch/f_auto,q_auto,fl_sanitize,c_fill,w_902,h_529/https://ubuntu.com/wp-content/uploads/2e4c/dell-xps-2004.jpg",  # noqa: E501
+            article["content"]["rendered"],
+        )
+
+
+class TestAsyncWordpress(VCRTestCase):
+    def _get_vcr_kwargs(self):
+        return {
+            "record_mode": "new_episodes",
+        }
+
+    def _get_cassette_name(self):
+        return "TestWordpress.test_get_tags.yaml"
+
+    def test_concurrent_requests_are_coalesced(self):
+        session = AsyncSession()
+        api = AsyncWordpress(session=session)
+
+        async def get_tags():
+            return await asyncio.gather(
+                *[api.get_tag_by_slug(slug="design") for _ in range(5)]
+            )
+
+        tags = asyncio.run(get_tags())
+
+        self.assertEqual(len(session.requested_urls), 1)
+        for tag in tags:
+            self.assertEqual(tag["id"], 1239)
+
+
+class TestAsyncWordpressCache(unittest.TestCase):
+    def test_expired_responses_are_revalidated(self):
+        session = RevalidatingSession()
+        api = AsyncWordpress(session=session, cache=ResponseCache())
+
+        first = asyncio.run(api.request("posts"))
+
+        # Let the cached copy run out
+        entry = api.cache.get_entry(first_key(api))
+        entry.expires_at = entry.stale_until = 0
+
+        second = asyncio.run(api.request("posts"))
+
+        self.assertEqual(len(session.requested_urls), 2)
+        self.assertEqual(session.sent_headers[1], {"If-None-Match": '"abc"'})
+        self.assertIs(second, first)
+        self.assertEqual(second.json(), [{"id": 1}])
+
+        # The 304 makes the cached copy fresh again
+        third = asyncio.run(api.request("posts"))
+
+        self.assertIs(third, first)
+        self.assertEqual(len(session.requested_urls), 2)
+
+    def test_stale_responses_are_refreshed_in_background(self):
+        sessions = []
+
+        def session_factory():
+            sessions.append(RevalidatingSession(etag=None))
+            return sessions[-1]
+
+        api = AsyncWordpress(
+            session_factory=session_factory,
+            cache=ResponseCache(default_ttl=0, max_stale=60),
+        )
+
+        first = asyncio.run(api.request("posts"))
+        stale = asyncio.run(api.request("posts"))
+
+        # The stale copy is served straight away, and refetched once
+        # on the refresh loop, which outlives the loops of the requests
+        self.assertIs(stale, first)
+
+        deadline = time.monotonic() + 5
+        while api._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertFalse(api._refreshing)
+        self.assertIsNot(api.cache.get_entry(first_key(api)).value, first)
+
+        # Each loop making requests gets its own client
+        self.assertEqual(
+            [len(session.requested_urls) for session in sessions], [1, 1]
+        )
+        self.assertEqual(sessions[0].headers["Accept"], "application/json")
+
+    def test_stale_responses_are_refreshed_in_loop_of_session(self):
+        session = RevalidatingSession(etag=None)
+        api = AsyncWordpress(
+            session=session,
+            cache=ResponseCache(default_ttl=0, max_stale=60),
+        )
+
+        first = asyncio.run(api.request("posts"))
+        second = asyncio.run(api.request("posts"))
+
+        # Without a session factory, there is no other loop to refresh
+        # in, so the stale copy is refetched before responding
+        self.assertIsNot(second, first)
+        self.assertEqual(len(session.requested_urls), 2)
+        self.assertIsNone(api._refresh_loop)
+
+
+class TestAsyncBlogViews(VCRTestCase):
+    def _get_vcr_kwargs(self):
+        return {
+            "record_mode": "new_episodes",
+        }
+
+    def _get_cassette_name(self):
+        return f"TestBlueprint.{self._testMethodName}.yaml"
+
+    def test_homepage(self):
+        views = AsyncBlogViews(api=AsyncBlogAPI(session=AsyncSession()))
+
+        context = asyncio.run(views.get_index())
+
+        self.assertEqual(context["current_page"], 1)
+        self.assertEqual(len(context["articles"]), 12)
+        self.assertEqual(len(context["events_and_webinars"]), 3)
+
+    @unittest.skipUnless(has_asgiref, "Flask async views need asgiref")
+    def test_tag(self):
+        app = flask.Flask(
+            "main", template_folder=f"{this_dir}/fixtures/templates"
+        )
+        Reggie().init_app(app)
+        app.register_blueprint(
+            build_async_blueprint(
+                AsyncBlogViews(api=AsyncBlogAPI(session=AsyncSession()))
+            ),
+            url_prefix="/",
+        )
+
+        response = app.test_client().get("/tag/design")
+
+        self.assertEqual(response.status_code, 200)
+
+
+class TestAsyncBlogViewsHelpers(unittest.TestCase):
+    def test_terms_from_taxonomy(self):
+        api = FakeAsyncAPI()
+        taxonomy = TaxonomyIndex(TermsAPI())
+        taxonomy.load()
+        views = AsyncBlogViews(api=api, taxonomy=taxonomy)
+
+        context = asyncio.run(views.get_tag("design"))
+
+        self.assertEqual(context["tag"]["id"], 10)
+        self.assertEqual(api.calls[0][2]["tags"], [10])
+
+        # Terms missing from the index are awaited from the API
+        context = asyncio.run(views.get_tag("snaps"))
+
+        self.assertEqual(context["tag"]["id"], 2)
+        self.assertIn(("get_tag_by_slug", "snaps"), api.calls)
+
+    def test_merged_latest_news(self):
+        api = FakeAsyncAPI()
+        views = AsyncBlogViews(api=api, merge_queries=True)
+
+        context = asyncio.run(views.get_latest_news(limit=3))
+
+        self.assertEqual(len(api.calls), 1)
+        self.assertIn("sticky", api.calls[0][2]["fields"])
+        self.assertEqual(context["latest_pinned_articles"][0]["id"], 1)
+        self.assertEqual(context["latest_articles"], [])
+
+    def test_prefetch(self):
+        api = FakeAsyncAPI(session_factory=object)
+        prefetcher = Prefetcher(article_count=0)
+        views = AsyncBlogViews(api=api, prefetcher=prefetcher)
+
+        asyncio.run(views.get_tag("snaps"))
+        prefetcher._executor.shutdown(wait=True)
+
+        self.assertEqual(
+            [call[1] for call in api.calls if call[0] == "get_articles"],
+            [1, 2],
+        )
+
+    def test_no_prefetch_without_session_factory(self):
+        prefetcher = Prefetcher(article_count=0)
+        views = AsyncBlogViews(api=FakeAsyncAPI(), prefetcher=prefetcher)
+
+        asyncio.run(views.get_tag("snaps"))
+
+        self.assertIsNone(prefetcher._executor)
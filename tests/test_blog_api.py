@@ -3,6 +3,7 @@ import requests
 from vcr_unittest import VCRTestCase
 
 # Local
+from canonicalwebteam.blog import ResponseCache
 from canonicalwebteam.blog.blog_api import BlogAPI
 
 
@@ -132,3 +133,105 @@ class TestBlogAPI(VCRTestCase):
             "w_354",
             article["image"]["rendered"],
         )
+
+    def test_transform_cache(self):
+        self.api = BlogAPI(
+            session=requests.Session(), transform_cache=ResponseCache()
+        )
+        transformed = []
+        transform_article = self.api._transform_article
+
+        def counting_transform(article):
+            transformed.append(article["id"])
+            return transform_article(article)
+
+        self.api._transform_article = counting_transform
+
+        def raw_article(modified_gmt):
+            return {
+                "id": 1,
+                "modified_gmt": modified_gmt,
+                "date_gmt": "2020-01-01T10:00:00",
+                "excerpt": {"rendered": "<p>Excerpt</p>"},
+                "content": {
+                    "rendered": '<img src="https://admin.insights.ubuntu.com'
+                    '/wp-content/uploads/image.png" width="100">'
+                },
+            }
+
+        first = self.api._get_transformed_article(
+            raw_article("2020-01-01T10:00:00")
+        )
+        first["date"] = "Modified by the caller"
+        second = self.api._get_transformed_article(
+            raw_article("2020-01-01T10:00:00")
+        )
+        third = self.api._get_transformed_article(
+            raw_article("2020-01-02T10:00:00")
+        )
+
+        self.assertEqual(transformed, [1, 1])
+        self.assertEqual(second["date"], "1 January 2020")
+        self.assertIn("res.cloudinary.com", second["content"]["rendered"])
+        self.assertEqual(third["content"], second["content"])
+
+        self.api.invalidate(["post:1"])
+        self.assertEqual(len(self.api.transform_cache), 0)
+
+    def test_transform_cache_stays_lazy(self):
+        self.api = BlogAPI(
+            session=requests.Session(), transform_cache=ResponseCache()
+        )
+        transformed = []
+        transform_content = self.api._transform_content
+
+        def counting_transform(content):
+            transformed.append(content["rendered"])
+            return transform_content(content)
+
+        self.api._transform_content = counting_transform
+        raw_article = {
+            "id": 1,
+            "modified_gmt": "2020-01-01T10:00:00",
+            "content": {"rendered": "<p>Content</p>"},
+        }
+
+        first = self.api._get_transformed_article(dict(raw_article))
+        second = self.api._get_transformed_article(dict(raw_article))
+
+        # Cache hits don't transform anything until it is read,
+        # and then only once for all of them
+        self.assertEqual(transformed, [])
+        self.assertEqual(second["content"]["rendered"], "<p>Content</p>")
+        self.assertEqual(first["content"], second["content"])
+        self.assertEqual(transformed, ["<p>Content</p>"])
+
+    def test_image_cache(self):
+        self.api = BlogAPI(session=requests.Session())
+
+        def raw_article(id):
+            return {
+                "id": id,
+                "excerpt": {"rendered": "<p>Excerpt</p>"},
+                "content": {
+                    "rendered": '<img src="https://ubuntu.com/image.png">'
+                },
+                "_embedded": {
+                    "wp:featuredmedia": [
+                        {"source_url": "https://ubuntu.com/thumbnail.png"}
+                    ]
+                },
+            }
+
+        first = self.api._transform_article(raw_article(1))
+        second = self.api._transform_article(raw_article(2))
+
+        self.assertEqual(
+            first["image"]["rendered"], second["image"]["rendered"]
+        )
+        self.assertEqual(first["content"], second["content"])
+        self.assertIn("e_sharpen", first["image"]["rendered"])
+        self.assertNotIn("e_sharpen", first["content"]["rendered"])
+
+        # One thumbnail and one content image
+        self.assertEqual(len(self.api.image_cache), 2)
@@ -1,5 +1,7 @@
 # Standard library
 import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 # Packages
 import flask
@@ -9,13 +11,15 @@ from bs4 import BeautifulSoup
 from vcr_unittest import VCRTestCase
 
 # Local
-from canonicalwebteam.blog import build_blueprint, BlogViews
+from canonicalwebteam.blog import build_blueprint, BlogViews, ResponseCache
 from canonicalwebteam.blog.blog_api import BlogAPI
 
 this_dir = os.path.dirname(os.path.realpath(__file__))
 
 
 class TestBlueprint(VCRTestCase):
+    executor = None
+
     def _get_vcr_kwargs(self):
         """
         This removes the authorization header
@@ -38,6 +42,7 @@ class TestBlueprint(VCRTestCase):
                 blog_title="Snapcraft Blog",
                 blog_path="/",
                 api=BlogAPI(session=requests.Session()),
+                executor=self.executor,
             )
         )
         app.register_blueprint(blog, url_prefix="/")
@@ -55,6 +60,10 @@ class TestBlueprint(VCRTestCase):
         self.assertIn(b"<time>10 February 2020</time>", response.data)
         self.assertIn(b'<a rel="author">Jeff Pihach</a>', response.data)
 
+        surrogate_keys = response.headers["Surrogate-Key"].split(" ")
+        self.assertIn("slug:testing-your-user-contract", surrogate_keys)
+        self.assertNotIn("posts:all", surrogate_keys)
+
     def test_article_not_exist(self):
         response = self.test_client.get("/not-exist")
 
@@ -107,6 +116,10 @@ class TestBlueprint(VCRTestCase):
 
         self.assertEqual(soup.find(id="current-page").text, "1")
 
+        # Crawlers can go on by cursor
+        self.assertIn('rel="next"', response.headers["Link"])
+        self.assertNotIn('rel="prev"', response.headers["Link"])
+
         articles = soup.find(id="articles").findAll("li")
         featured = soup.find(id="featured").findAll("li")
         events = soup.find(id="events").findAll("li")
@@ -140,6 +153,11 @@ class TestBlueprint(VCRTestCase):
                     image.get("src"),
                 )
 
+    def test_invalid_cursor(self):
+        response = self.test_client.get("/?cursor=invalid")
+
+        self.assertEqual(response.status_code, 400)
+
     def test_category_not_exist(self):
         response = self.test_client.get("/archives?category=not-exist")
 
@@ -156,6 +174,7 @@ class TestBlueprint(VCRTestCase):
         response = self.test_client.get("/feed")
 
         self.assertEqual(response.status_code, 200)
+        self.assertIn("posts:all", response.headers["Surrogate-Key"])
 
     def test_author(self):
         response = self.test_client.get("/author/nottrobin")
@@ -174,6 +193,7 @@ class TestBlueprint(VCRTestCase):
         self.assertTrue(
             response.headers["Content-Type"], "application/rss+xml"
         )
+        self.assertNotIn("posts:all", response.headers["Surrogate-Key"])
 
     def test_author_feed_not_exist(self):
         response = self.test_client.get("/author/not-exist/feed")
@@ -236,6 +256,7 @@ class TestBlueprint(VCRTestCase):
         response = self.test_client.get("/tag/design")
 
         self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.headers["Surrogate-Key"], r"\btag:\d+")
 
     def test_tag_not_exist(self):
 
@@ -252,3 +273,396 @@ class TestBlueprint(VCRTestCase):
         response = self.test_client.get("/archives")
 
         self.assertEqual(response.status_code, 200)
+
+
+class TestBlueprintWithExecutor(TestBlueprint):
+    """
+    Run the same tests again, making independent API calls through an
+    executor. A single worker keeps the cassette playback in order.
+    """
+
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def _get_cassette_name(self):
+        return f"TestBlueprint.{self._testMethodName}.yaml"
+
+
+class TestConditionalRequests(VCRTestCase):
+    """
+    Fetch pages twice, the second time with the validators from the
+    first. API responses are cached, so the cassettes are played once.
+    """
+
+    def _get_vcr_kwargs(self):
+        return {
+            "record_mode": "new_episodes",
+        }
+
+    def _get_cassette_name(self):
+        return f"TestBlueprint.{self._testMethodName}.yaml"
+
+    def setUp(self):
+        super().setUp()
+
+        app = flask.Flask(
+            "main", template_folder=f"{this_dir}/fixtures/templates"
+        )
+        Reggie().init_app(app)
+
+        blog = build_blueprint(
+            blog_views=BlogViews(
+                blog_title="Snapcraft Blog",
+                blog_path="/",
+                api=BlogAPI(
+                    session=requests.Session(), cache=ResponseCache()
+                ),
+            ),
+            conditional_requests=True,
+            cache_control="public, max-age=60",
+        )
+        app.register_blueprint(blog, url_prefix="/")
+
+        app.testing = True
+
+        self.test_client = app.test_client()
+
+    def test_article(self):
+        response = self.test_client.get("/testing-your-user-contract")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.headers["Cache-Control"], "public, max-age=60"
+        )
+        self.assertIsNotNone(response.last_modified)
+
+        not_modified = self.test_client.get(
+            "/testing-your-user-contract",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.data, b"")
+        self.assertEqual(
+            not_modified.headers["ETag"], response.headers["ETag"]
+        )
+
+    def test_feed(self):
+        response = self.test_client.get("/feed")
+
+        self.assertEqual(response.status_code, 200)
+
+        not_modified = self.test_client.get(
+            "/feed", headers={"If-None-Match": response.headers["ETag"]}
+        )
+        modified = self.test_client.get(
+            "/feed", headers={"If-None-Match": '"outdated"'}
+        )
+
+        # Only the ETag follows articles leaving the feed
+        modified_since = self.test_client.get(
+            "/feed",
+            headers={
+                "If-Modified-Since": response.headers["Last-Modified"]
+            },
+        )
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(modified.status_code, 200)
+        self.assertEqual(modified.data, response.data)
+        self.assertEqual(modified_since.status_code, 200)
+
+
+class TestPageCache(VCRTestCase):
+    """
+    Fetch pages twice. The API responses aren't cached, so the cassette
+    would run out if the second page wasn't served from the page cache.
+    """
+
+    def _get_vcr_kwargs(self):
+        return {
+            "record_mode": "new_episodes",
+        }
+
+    def _get_cassette_name(self):
+        return f"TestBlueprint.{self._testMethodName}.yaml"
+
+    def setUp(self):
+        super().setUp()
+
+        app = flask.Flask(
+            "main", template_folder=f"{this_dir}/fixtures/templates"
+        )
+        Reggie().init_app(app)
+
+        self.blog_views = BlogViews(
+            blog_title="Snapcraft Blog",
+            blog_path="/",
+            api=BlogAPI(session=requests.Session()),
+            page_cache=ResponseCache(),
+        )
+        blog = build_blueprint(
+            blog_views=self.blog_views, conditional_requests=True
+        )
+        app.register_blueprint(blog, url_prefix="/")
+
+        app.testing = True
+
+        self.test_client = app.test_client()
+
+    def test_article(self):
+        response = self.test_client.get("/testing-your-user-contract")
+        cached_response = self.test_client.get("/testing-your-user-contract")
+
+        self.assertEqual(cached_response.status_code, 200)
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(
+            cached_response.headers["Content-Type"],
+            response.headers["Content-Type"],
+        )
+        self.assertEqual(
+            cached_response.headers["Surrogate-Key"],
+            response.headers["Surrogate-Key"],
+        )
+
+        not_modified = self.test_client.get(
+            "/testing-your-user-contract",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        removed = self.blog_views.invalidate(
+            ["slug:testing-your-user-contract"]
+        )
+        self.assertEqual(removed, 1)
+        self.assertEqual(len(self.blog_views.page_cache), 0)
+
+    def test_article_not_exist(self):
+        self.test_client.get("/not-exist")
+
+        self.assertEqual(len(self.blog_views.page_cache), 0)
+
+
+class TestFragmentCache(VCRTestCase):
+    def _get_vcr_kwargs(self):
+        return {
+            "record_mode": "new_episodes",
+        }
+
+    def _get_cassette_name(self):
+        return f"TestBlueprint.{self._testMethodName}.yaml"
+
+    def setUp(self):
+        super().setUp()
+
+        self.app = flask.Flask(
+            "main", template_folder=f"{this_dir}/fixtures/templates"
+        )
+        Reggie().init_app(self.app)
+
+        self.blog_views = BlogViews(
+            blog_title="Snapcraft Blog",
+            blog_path="/",
+            api=BlogAPI(session=requests.Session(), cache=ResponseCache()),
+            fragment_cache=ResponseCache(),
+        )
+        blog = build_blueprint(blog_views=self.blog_views)
+        self.app.register_blueprint(blog, url_prefix="/")
+
+        self.app.testing = True
+
+        self.test_client = self.app.test_client()
+
+    def test_feed(self):
+        # Feeds are streamed, so read them to render every item
+        response = self.test_client.get("/feed")
+        response.get_data()
+        items = len(self.blog_views.fragment_cache)
+        cached_response = self.test_client.get("/feed")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(items, 0)
+        self.assertEqual(response.data.count(b"<item>"), items)
+        self.assertEqual(len(self.blog_views.fragment_cache), items)
+        self.assertEqual(cached_response.data, response.data)
+        self.assertTrue(response.data.endswith(b"</channel></rss>"))
+
+    def test_render_card(self):
+        article = {
+            "id": 1,
+            "modified_gmt": "2020-01-01T10:00:00",
+            "title": {"rendered": "First"},
+        }
+
+        with self.app.test_request_context():
+            card = self.blog_views.render_card(article, "blog/card.html")
+
+            # Same revision, so the cached card is used
+            article["title"]["rendered"] = "Changed"
+            cached_card = self.blog_views.render_card(
+                article, "blog/card.html"
+            )
+
+            article["modified_gmt"] = "2020-01-02T10:00:00"
+            new_card = self.blog_views.render_card(article, "blog/card.html")
+
+        self.assertEqual(card, '<li class="card">First</li>')
+        self.assertEqual(cached_card, card)
+        self.assertEqual(new_card, '<li class="card">Changed</li>')
+
+
+class InvalidatingAPI:
+    """
+    Records the dependency tags invalidated, and has no articles
+    """
+
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, tags):
+        self.invalidated.append(tags)
+
+        return len(tags)
+
+    def get_article(self, *args, **kwargs):
+        return {}
+
+
+class ListingAPI:
+    """
+    Lists the articles left of two, for any tag
+    """
+
+    def __init__(self):
+        self.articles = [
+            {
+                "id": id,
+                "slug": f"article-{id}",
+                "date_gmt": f"2020-01-0{id}T10:00:00",
+                "modified_gmt": f"2020-01-0{id}T10:00:00",
+            }
+            for id in (2, 1)
+        ]
+
+    def get_tag_by_slug(self, slug):
+        return {"id": 1, "slug": slug}
+
+    def get_articles(self, **kwargs):
+        return (
+            list(self.articles),
+            {"total_pages": "1", "total_posts": str(len(self.articles))},
+        )
+
+
+class TestConditionalListings(unittest.TestCase):
+    def setUp(self):
+        app = flask.Flask(
+            "main", template_folder=f"{this_dir}/fixtures/templates"
+        )
+        Reggie().init_app(app)
+
+        self.api = ListingAPI()
+        blog = build_blueprint(
+            blog_views=BlogViews(api=self.api), conditional_requests=True
+        )
+        app.register_blueprint(blog, url_prefix="/")
+        app.testing = True
+
+        self.test_client = app.test_client()
+
+    def test_removed_article(self):
+        response = self.test_client.get("/tag/snaps")
+
+        # The older article is unpublished, which leaves the newest
+        # article, and so the Last-Modified of the listing, the same
+        self.api.articles.pop()
+
+        for headers in (
+            {"If-Modified-Since": response.headers["Last-Modified"]},
+            {"If-None-Match": response.headers["ETag"]},
+        ):
+            changed = self.test_client.get("/tag/snaps", headers=headers)
+
+            self.assertEqual(changed.status_code, 200)
+            self.assertEqual(
+                changed.headers["Last-Modified"],
+                response.headers["Last-Modified"],
+            )
+            self.assertNotEqual(
+                changed.headers["ETag"], response.headers["ETag"]
+            )
+
+        not_modified = self.test_client.get(
+            "/tag/snaps", headers={"If-None-Match": changed.headers["ETag"]}
+        )
+
+        self.assertEqual(not_modified.status_code, 304)
+
+
+class TestInvalidationRoute(unittest.TestCase):
+    def setUp(self):
+        app = flask.Flask(
+            "main", template_folder=f"{this_dir}/fixtures/templates"
+        )
+        Reggie().init_app(app)
+
+        self.api = InvalidatingAPI()
+        blog = build_blueprint(
+            blog_views=BlogViews(api=self.api),
+            invalidation_secret="s3cret",
+        )
+        app.register_blueprint(blog, url_prefix="/")
+        app.testing = True
+
+        self.test_client = app.test_client()
+
+    def test_invalidate(self):
+        response = self.test_client.post(
+            "/invalidate",
+            json={
+                "post": {"id": 12, "slug": "hello", "tags": [3]},
+                "previous": {"id": 12, "tags": [4]},
+                "terms": {"categories": [7]},
+            },
+            headers={"Authorization": "Bearer s3cret"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.api.invalidated,
+            [
+                {
+                    "posts:all",
+                    "post:12",
+                    "slug:hello",
+                    "tag:3",
+                    "tag:4",
+                    "terms:categories",
+                    "category:7",
+                }
+            ],
+        )
+        self.assertEqual(response.json, {"invalidated": 7})
+
+    def test_invalidate_needs_secret(self):
+        response = self.test_client.post(
+            "/invalidate",
+            json={"post": {"id": 12}},
+            headers={"Authorization": "Bearer wrong"},
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.api.invalidated, [])
+
+    def test_invalidate_bad_payload(self):
+        response = self.test_client.post(
+            "/invalidate",
+            json={"post": {"slug": "no-id"}},
+            headers={"Authorization": "Bearer s3cret"},
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_articles_are_still_routed(self):
+        response = self.test_client.get("/invalidate")
+
+        self.assertEqual(response.status_code, 404)
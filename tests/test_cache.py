@@ -0,0 +1,219 @@
+# Standard library
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Packages
+import requests
+
+# Local
+from canonicalwebteam.blog import ResponseCache, Wordpress
+from canonicalwebteam.blog.cache import SingleFlight
+
+
+class FakeSession(requests.Session):
+    """
+    A session that answers every request with a fixed JSON body
+    and records the URLs requested
+    """
+
+    def __init__(self, body=None, etag=None):
+        super().__init__()
+        self.body = body if body is not None else [{"id": 1}]
+        self.etag = etag
+        self.requested_urls = []
+        self.sent_headers = []
+
+    def request(self, method, url, *args, headers=None, **kwargs):
+        self.requested_urls.append(url)
+        self.sent_headers.append(headers or {})
+
+        response = requests.Response()
+        response.url = url
+
+        if self.etag:
+            response.headers["ETag"] = self.etag
+
+        if self.etag and (headers or {}).get("If-None-Match") == self.etag:
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = json.dumps(self.body).encode()
+
+        return response
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache = ResponseCache()
+        cache.set("key", "value", size=5)
+
+        self.assertEqual(cache.get("key"), "value")
+        self.assertIsNone(cache.get("missing"))
+
+    def test_expired_entries_are_dropped(self):
+        cache = ResponseCache(default_ttl=0)
+        cache.set("key", "value", size=5)
+
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_endpoint_ttls(self):
+        cache = ResponseCache(default_ttl=60, ttls={"tags": 3600})
+
+        self.assertEqual(cache.get_ttl("tags/12"), 3600)
+        self.assertEqual(cache.get_ttl("posts"), 60)
+
+    def test_evicts_least_recently_used_by_count(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", 1, size=1)
+        cache.set("b", 2, size=1)
+        cache.get("a")
+        cache.set("c", 3, size=1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_evicts_least_recently_used_by_size(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.set("a", 1, size=6)
+        cache.set("b", 2, size=6)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.total_bytes, 6)
+
+        # Values bigger than the whole cache are never stored
+        cache.set("c", 3, size=11)
+        self.assertIsNone(cache.get("c"))
+
+    def test_invalidate_tags(self):
+        cache = ResponseCache()
+        cache.set("a", "value", size=5, tags=["post:1", "posts:all"])
+        cache.set("b", "value", size=5, tags=["post:2"])
+        cache.set("c", "value", size=5)
+
+        self.assertEqual(cache.invalidate_tags(["post:1", "post:3"]), 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "value")
+        self.assertEqual(cache.total_bytes, 10)
+
+        # Evicted or replaced entries are dropped from the tag index
+        cache.set("b", "value", size=5)
+        self.assertEqual(cache.invalidate_tags(["post:2"]), 0)
+        self.assertEqual(cache.get("b"), "value")
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_are_coalesced(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            release.wait()
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [
+                executor.submit(flight.do, "key", slow_call)
+                for _ in range(5)
+            ]
+            time.sleep(0.1)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["result"] * 5)
+
+        # Once the call has finished, the next one runs again
+        flight.do("key", slow_call)
+        self.assertEqual(len(calls), 2)
+
+    def test_errors_are_raised(self):
+        flight = SingleFlight()
+
+        def failing_call():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            flight.do("key", failing_call)
+
+
+class TestWordpressCache(unittest.TestCase):
+    def test_requests_are_cached(self):
+        session = FakeSession()
+        api = Wordpress(session=session, cache=ResponseCache())
+
+        first = api.request("posts", {"tags": [1, 2], "page": 1})
+        second = api.request("posts", {"page": 1, "tags": [1, 2]})
+
+        self.assertEqual(len(session.requested_urls), 1)
+        self.assertEqual(first.json(), second.json())
+
+        api.request("posts", {"page": 2, "tags": [1, 2]})
+        self.assertEqual(len(session.requested_urls), 2)
+
+    def test_requests_are_not_cached_by_default(self):
+        session = FakeSession()
+        api = Wordpress(session=session)
+
+        api.request("posts")
+        api.request("posts")
+
+        self.assertEqual(len(session.requested_urls), 2)
+
+    def test_stale_responses_are_refreshed_in_background(self):
+        session = FakeSession()
+        api = Wordpress(
+            session=session, cache=ResponseCache(default_ttl=0, max_stale=60)
+        )
+
+        first = api.request("posts")
+        stale = api.request("posts")
+
+        # The stale copy is served straight away, and refetched once
+        self.assertIs(stale, first)
+        api._refresh_executor.shutdown(wait=True)
+        self.assertEqual(len(session.requested_urls), 2)
+
+    def test_expired_responses_are_revalidated(self):
+        session = FakeSession(etag='"abc"')
+        api = Wordpress(session=session, cache=ResponseCache(default_ttl=0))
+
+        first = api.request("posts")
+        second = api.request("posts")
+
+        self.assertEqual(len(session.requested_urls), 2)
+        self.assertEqual(session.sent_headers[1], {"If-None-Match": '"abc"'})
+        self.assertIs(second, first)
+        self.assertEqual(second.json(), [{"id": 1}])
+
+    def test_responses_are_tagged_with_dependencies(self):
+        session = FakeSession(body=[{"id": 1}, {"id": 2}])
+        api = Wordpress(session=session, cache=ResponseCache())
+
+        api.request("posts", {"tags": [5, 6]})
+        api.request("posts")
+        api.request("tags", {"slug": "design"})
+
+        self.assertEqual(api.invalidate(["tag:6"]), 1)
+        self.assertEqual(api.invalidate(["post:2"]), 1)
+        self.assertEqual(api.invalidate(["terms:tags"]), 1)
+        self.assertEqual(len(api.cache), 0)
+
+    def test_uncached_requests(self):
+        session = FakeSession()
+        api = Wordpress(session=session, cache=ResponseCache())
+
+        api.request("posts", cached=False)
+        api.request("posts", cached=False)
+
+        self.assertEqual(len(session.requested_urls), 2)
+        self.assertEqual(len(api.cache), 0)
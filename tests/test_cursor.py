@@ -0,0 +1,215 @@
+# Standard library
+import json
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+# Packages
+import requests
+
+# Local
+from canonicalwebteam.blog import BlogViews, Wordpress
+from canonicalwebteam.blog.cursor import (
+    decode_cursor,
+    encode_cursor,
+    get_cursor_bounds,
+    get_cursor_page,
+)
+from tests.helpers import FakeAPI, make_post
+
+
+def make_article(id, date_gmt):
+    return {"id": id, "date_gmt": date_gmt}
+
+
+class WordpressSession(requests.Session):
+    """
+    Serves posts like Wordpress would on a site in another timezone,
+    comparing date filters with local dates, and ordering by date alone
+    """
+
+    def __init__(self, articles, utc_offset):
+        super().__init__()
+        self.articles = articles
+        self.site_timezone = timezone(timedelta(hours=utc_offset))
+
+    def request(self, method, url, *args, **kwargs):
+        query = {
+            key: values[0]
+            for key, values in parse_qs(urlparse(url).query).items()
+        }
+        before = query.get("before")
+        after = query.get("after")
+        matching = [
+            article
+            for article in self.articles
+            if (
+                before is None
+                or self.get_date(article) < self.get_local(before)
+            )
+            and (
+                after is None or self.get_date(article) > self.get_local(after)
+            )
+        ]
+
+        # Articles of the same second come back in any order
+        random.Random(url).shuffle(matching)
+        matching.sort(key=self.get_date, reverse=query["order"] == "desc")
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers["X-WP-Total"] = str(len(matching))
+        response._content = json.dumps(
+            matching[: int(query["per_page"])]
+        ).encode()
+
+        return response
+
+    def get_local(self, value):
+        date = datetime.fromisoformat(value)
+
+        if date.tzinfo is None:
+            return date
+
+        return date.astimezone(self.site_timezone).replace(tzinfo=None)
+
+    def get_date(self, article):
+        return self.get_local(article["date_gmt"] + "+00:00")
+
+
+class TestCursor(unittest.TestCase):
+    def test_encode_and_decode(self):
+        cursor = encode_cursor(make_article(12, "2020-01-01T10:00:00"))
+
+        self.assertNotIn("=", cursor)
+        self.assertEqual(
+            decode_cursor(cursor), ("next", "2020-01-01T10:00:00", 12)
+        )
+
+    def test_invalid(self):
+        for cursor in ["", "not a cursor", "WyJuZXh0Il0", "WzEsMiwzXQ"]:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_bounds(self):
+        article = make_article(12, "2020-01-01T10:00:00")
+
+        self.assertEqual(
+            get_cursor_bounds(encode_cursor(article)),
+            ("2020-01-01T10:00:01+00:00", None, "desc"),
+        )
+        self.assertEqual(
+            get_cursor_bounds(encode_cursor(article), "2019-12-01"),
+            ("2019-12-01", None, "desc"),
+        )
+        self.assertEqual(
+            get_cursor_bounds(encode_cursor(article), "2020-01-01T12:00:00"),
+            ("2020-01-01T10:00:01+00:00", None, "desc"),
+        )
+        self.assertEqual(
+            get_cursor_bounds(encode_cursor(article, "previous")),
+            (None, "2020-01-01T09:59:59+00:00", "asc"),
+        )
+
+    def test_page_past_ties(self):
+        # Fetched for a page of 2, including the cursor's second
+        articles = [
+            make_article(5, "2020-01-01T10:00:00"),
+            make_article(4, "2020-01-01T10:00:00"),
+            make_article(3, "2020-01-01T10:00:00"),
+        ]
+        cursor = encode_cursor(articles[1])
+
+        page, cursors = get_cursor_page(articles, cursor, 2, total_posts=3)
+
+        self.assertEqual(page, [articles[2]])
+        self.assertIsNone(cursors["next_cursor"])
+        self.assertEqual(
+            decode_cursor(cursors["previous_cursor"])[::2], ("previous", 3)
+        )
+
+        page, cursors = get_cursor_page(articles, cursor, 2, total_posts=9)
+
+        self.assertEqual(decode_cursor(cursors["next_cursor"])[2], 3)
+
+    def test_previous_page(self):
+        # Fetched oldest first for a page of 2
+        articles = [
+            make_article(2, "2020-01-02T10:00:00"),
+            make_article(3, "2020-01-03T10:00:00"),
+            make_article(4, "2020-01-04T10:00:00"),
+        ]
+        cursor = encode_cursor(articles[0], "previous")
+
+        page, cursors = get_cursor_page(articles, cursor, 2)
+
+        self.assertEqual([article["id"] for article in page], [4, 3])
+        self.assertEqual(decode_cursor(cursors["next_cursor"])[2], 3)
+        self.assertIsNone(cursors["previous_cursor"])
+
+    def test_many_in_same_second(self):
+        articles = [
+            make_article(id, date_gmt)
+            for id, date_gmt in [
+                (9, "2020-01-03T10:00:00"),
+                (3, "2020-01-02T10:00:00"),
+                (8, "2020-01-02T10:00:00"),
+                (4, "2020-01-02T10:00:00"),
+                (6, "2020-01-02T10:00:00"),
+                (7, "2020-01-02T10:00:00"),
+                (2, "2020-01-01T23:30:00"),
+                (1, "2020-01-01T10:00:00"),
+            ]
+        ]
+        expected = [[9, 8], [7, 6], [4, 3], [2, 1]]
+
+        for utc_offset in (-5, 0, 2):
+            api = Wordpress(session=WordpressSession(articles, utc_offset))
+            pages = []
+            cursor = encode_cursor(make_article(10, "2020-02-01T00:00:00"))
+
+            while cursor:
+                page, metadata = api.get_articles(per_page=2, cursor=cursor)
+                pages.append([article["id"] for article in page])
+                cursor = metadata["next_cursor"]
+
+                # Counted from the cursor on, in pages of another size
+                self.assertIsNone(metadata["total_pages"])
+
+            self.assertEqual(pages, expected)
+
+            # And back again
+            pages = []
+            cursor = metadata["previous_cursor"]
+
+            while cursor:
+                page, metadata = api.get_articles(per_page=2, cursor=cursor)
+                pages.insert(0, [article["id"] for article in page])
+                cursor = metadata["previous_cursor"]
+
+            self.assertEqual(pages, expected[:-1])
+
+
+class TestCursorViews(unittest.TestCase):
+    def test_no_page_numbers(self):
+        api = FakeAPI(
+            [make_post(id, tags=[1]) for id in range(1, 8)],
+            {"tags": [{"id": 1, "slug": "snaps", "name": "Snaps"}]},
+        )
+        views = BlogViews(api=api, per_page=2)
+
+        context = views.get_tag("snaps")
+
+        self.assertEqual(context["current_page"], 1)
+        self.assertEqual(context["total_pages"], 4)
+
+        context = views.get_tag("snaps", cursor=context["next_cursor"])
+
+        self.assertEqual(
+            [article["id"] for article in context["articles"]], [5, 4]
+        )
+        self.assertIsNone(context["current_page"])
+        self.assertIsNone(context["total_pages"])
+        self.assertIsNotNone(context["next_cursor"])
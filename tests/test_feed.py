@@ -0,0 +1,107 @@
+# Standard library
+import unittest
+
+# Packages
+import flask
+from jinja2 import DictLoader
+from lxml import etree
+
+# Local
+from canonicalwebteam.blog import BlogViews, ResponseCache
+from canonicalwebteam.blog.feed import stream_rss
+
+
+def make_article(id, modified_gmt):
+    return {
+        "id": id,
+        "slug": f"post-{id}",
+        "date_gmt": "2020-01-01T10:00:00",
+        "modified_gmt": modified_gmt,
+        "title": {"rendered": f"Post {id} & more"},
+        "excerpt": {"rendered": "<p>Excerpt</p>"},
+        "content": {"rendered": "<p>Content</p>"},
+        "_embedded": {"author": [{"name": "Author"}]},
+    }
+
+
+class TestStreamRSS(unittest.TestCase):
+    def test_stream_rss(self):
+        chunks = list(
+            stream_rss(
+                title="News & views",
+                link="https://example.com/feed",
+                description="Feed",
+                items=[b"<item><title>One</title></item>"],
+            )
+        )
+
+        self.assertEqual(len(chunks), 3)
+
+        rss = etree.fromstring(b"".join(chunks))
+        self.assertEqual(rss.findtext("channel/title"), "News & views")
+        self.assertEqual(rss.findtext("channel/item/title"), "One")
+
+
+class TestFeedViews(unittest.TestCase):
+    def setUp(self):
+        self.app = flask.Flask("main")
+
+    def render(self, blog_views, articles):
+        with self.app.test_request_context("/blog/feed"):
+            context = blog_views._get_feed_context(
+                "Blog", articles, "https://example.com"
+            )
+
+            return etree.fromstring(blog_views.render_feed(context))
+
+    def test_feed(self):
+        rss = self.render(
+            BlogViews(api=None),
+            [
+                make_article(1, "2020-01-03T10:00:00"),
+                make_article(2, "2020-01-02T10:00:00"),
+            ],
+        )
+
+        items = rss.findall("channel/item")
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[0].findtext("title"), "Post 1 & more")
+        self.assertEqual(
+            items[0].findtext("link"), "https://example.com/blog/post-1"
+        )
+        self.assertEqual(
+            rss.findtext("channel/lastBuildDate"),
+            "Fri, 03 Jan 2020 10:00:00 +0000",
+        )
+        self.assertIsNotNone(
+            items[0].find("{http://purl.org/rss/1.0/modules/content/}encoded")
+        )
+
+    def test_summary_only(self):
+        article = make_article(1, "2020-01-03T10:00:00")
+        del article["content"]
+
+        rss = self.render(
+            BlogViews(api=None, feed_summary_only=True), [article]
+        )
+
+        item = rss.find("channel/item")
+        self.assertEqual(item.findtext("description"), "<p>Excerpt</p>")
+        self.assertIsNone(
+            item.find("{http://purl.org/rss/1.0/modules/content/}encoded")
+        )
+
+    def test_fragment_sizes_in_bytes(self):
+        self.app.jinja_loader = DictLoader(
+            {"card.html": "<p>Café {{ article.id }}</p>"}
+        )
+        cache = ResponseCache()
+        blog_views = BlogViews(api=None, fragment_cache=cache)
+
+        with self.app.test_request_context("/blog"):
+            card = blog_views.render_card(
+                make_article(1, "2020-01-03T10:00:00"), "card.html"
+            )
+
+        self.assertEqual(card, "<p>Café 1</p>")
+        self.assertEqual(cache.total_bytes, len("<p>Café 1</p>".encode()))
@@ -0,0 +1,132 @@
+# Standard library
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Local
+from canonicalwebteam.blog import BlogViews
+from tests.helpers import FakeAPI, make_post
+
+EVENTS = 50
+WEBINARS = 51
+TERMS = {
+    "categories": [
+        {"id": EVENTS, "slug": "events"},
+        {"id": WEBINARS, "slug": "webinars"},
+        {"id": 7, "slug": "other"},
+    ]
+}
+
+
+class TestMergeQueries(unittest.TestCase):
+    def compare(self, posts, view, executor=None, **kwargs):
+        """
+        Get the same view with and without merged queries
+
+        :returns: Contexts, numbers of queries
+        """
+
+        results = []
+
+        for merge_queries in (False, True):
+            api = FakeAPI(posts, TERMS)
+            views = BlogViews(
+                api=api,
+                per_page=4,
+                executor=executor,
+                merge_queries=merge_queries,
+            )
+            context = getattr(views, view)(**kwargs)
+            queries = len(api.get_calls("get_articles"))
+            results.append((context, queries))
+
+        (separate, separate_queries), (merged, merged_queries) = results
+        self.assertEqual(merged, separate)
+
+        return merged, separate_queries, merged_queries
+
+    def test_index(self):
+        posts = [
+            make_post(id, sticky=id in (3, 11, 12), categories=categories)
+            for id, categories in [
+                *[(id, []) for id in range(1, 10)],
+                (10, [EVENTS]),
+                (11, [WEBINARS]),
+                (12, []),
+                (13, [EVENTS]),
+                (14, [7]),
+                (15, [WEBINARS, 7]),
+                (16, []),
+            ]
+        ]
+
+        context, separate, merged = self.compare(posts, "get_index")
+
+        self.assertEqual(
+            [article["id"] for article in context["articles"]],
+            [16, 15, 14, 13],
+        )
+        self.assertEqual(context["total_pages"], 4)
+        self.assertEqual(
+            [article["id"] for article in context["events_and_webinars"]],
+            [15, 13, 11],
+        )
+        self.assertEqual((separate, merged), (3, 2))
+
+        # Events and webinars are fetched on their own with a category
+        _, separate, merged = self.compare(
+            posts, "get_index", category_slug="other"
+        )
+        self.assertEqual((separate, merged), (3, 3))
+
+        # Or concurrently with an executor
+        with ThreadPoolExecutor() as executor:
+            _, separate, merged = self.compare(posts, "get_index", executor)
+        self.assertEqual((separate, merged), (3, 3))
+
+    def test_index_drafts(self):
+        posts = [make_post(id, sticky=id > 8) for id in range(1, 10)]
+        posts.append(make_post(10, status="draft"))
+
+        context, _, _ = self.compare(posts, "get_index")
+
+        self.assertEqual(context["total_pages"], 2)
+
+        context, _, _ = self.compare(posts, "get_index", category_slug="other")
+
+        self.assertEqual(context["total_pages"], 0)
+
+    def test_later_pages(self):
+        posts = [make_post(id, sticky=id == 2) for id in range(1, 20)]
+
+        context, separate, merged = self.compare(posts, "get_index", page=2)
+
+        self.assertEqual(context["current_page"], 2)
+        self.assertEqual((separate, merged), (1, 1))
+
+    def test_latest_news(self):
+        posts = [make_post(id, sticky=id in (1, 4)) for id in range(1, 6)]
+
+        context, separate, merged = self.compare(posts, "get_latest_news")
+
+        self.assertEqual(
+            [article["id"] for article in context["latest_pinned_articles"]],
+            [4],
+        )
+        self.assertEqual(
+            [article["id"] for article in context["latest_articles"]],
+            [5, 3, 2],
+        )
+        self.assertNotIn("sticky", context["latest_articles"][0])
+        self.assertEqual((separate, merged), (2, 1))
+
+        # The pinned article is older than the latest ones
+        posts = [make_post(id, sticky=id == 1) for id in range(1, 6)]
+        context, separate, merged = self.compare(
+            posts, "get_latest_news", limit=1
+        )
+
+        self.assertEqual(
+            [article["id"] for article in context["latest_pinned_articles"]],
+            [1],
+        )
+        self.assertEqual((separate, merged), (2, 2))
@@ -0,0 +1,232 @@
+# Standard library
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+# Local
+from canonicalwebteam.blog import (
+    BlogAPI,
+    LocalMirror,
+    ResponseCache,
+    Wordpress,
+)
+from canonicalwebteam.blog.cursor import get_page_cursors
+from tests.helpers import FakeAPI, PagedSession, make_post
+
+
+class TestLocalMirror(unittest.TestCase):
+    def setUp(self):
+        self.mirror = LocalMirror()
+        self.mirror.update_posts(
+            [
+                make_post(1, "2020-01-01T10:00:00", tags=[10], sticky=True),
+                make_post(2, "2020-02-01T10:00:00", tags=[10, 11]),
+                make_post(3, "2020-03-01T10:00:00", categories=[5]),
+                make_post(4, "2020-04-01T10:00:00", tags=[12], author=2),
+                make_post(5, "2020-05-01T10:00:00", status="draft"),
+            ]
+        )
+
+    def ids(self, **filters):
+        articles, _ = self.mirror.get_articles(**filters)
+
+        return [article["id"] for article in articles]
+
+    def test_get_articles(self):
+        articles, metadata = self.mirror.get_articles(per_page=2)
+
+        self.assertEqual([article["id"] for article in articles], [4, 3])
+        self.assertEqual(metadata, {"total_pages": "2", "total_posts": "4"})
+
+        # Lists leave out the full content, like the API
+        self.assertNotIn("content", articles[0])
+        self.assertIn("title", articles[0])
+
+        self.assertEqual(self.ids(per_page=2, page=2), [2, 1])
+
+    def test_filters(self):
+        self.assertEqual(self.ids(tags=[10, 12]), [4, 2, 1])
+        self.assertEqual(self.ids(tags=[10], tags_exclude=[11]), [1])
+        self.assertEqual(self.ids(exclude=[4, 3]), [2, 1])
+        self.assertEqual(self.ids(include=[1, 3, 5]), [3, 1])
+        self.assertEqual(self.ids(categories=[5]), [3])
+        self.assertEqual(self.ids(sticky="true"), [1])
+        self.assertEqual(self.ids(author=2), [4])
+        self.assertEqual(self.ids(status=["publish", "draft"])[0], 5)
+        self.assertEqual(
+            self.ids(
+                after=datetime(2020, 1, 15), before=datetime(2020, 3, 15)
+            ),
+            [3, 2],
+        )
+
+    def test_archive_boundaries(self):
+        # A site two hours ahead of UTC
+        mirror = LocalMirror()
+        mirror.update_posts(
+            [
+                make_post(
+                    1, "2020-02-29T23:00:00", date="2020-03-01T01:00:00"
+                ),
+                make_post(
+                    2, "2020-02-29T21:30:00", date="2020-02-29T23:30:00"
+                ),
+                make_post(
+                    3, "2020-03-31T21:30:00", date="2020-03-31T23:30:00"
+                ),
+                make_post(
+                    4, "2020-03-31T22:30:00", date="2020-04-01T00:30:00"
+                ),
+            ]
+        )
+
+        def ids(**filters):
+            articles, _ = mirror.get_articles(**filters)
+
+            return [article["id"] for article in articles]
+
+        # Local bounds are compared with the local dates, like Wordpress
+        self.assertEqual(
+            ids(after=datetime(2020, 3, 1), before=datetime(2020, 4, 1)),
+            [3, 1],
+        )
+        self.assertEqual(ids(after="2020-03-31T23:00:00"), [4, 3])
+
+        # Bounds with a UTC offset are compared with date_gmt
+        self.assertEqual(
+            ids(after=datetime(2020, 2, 29, 22, tzinfo=timezone.utc)),
+            [4, 3, 1],
+        )
+        self.assertEqual(ids(before="2020-03-31T22:00:00+00:00"), [3, 1, 2])
+
+    def test_mirror_without_local_dates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "mirror.db")
+            connection = sqlite3.connect(path)
+            connection.execute(
+                "CREATE TABLE posts (id INTEGER PRIMARY KEY, "
+                "slug TEXT NOT NULL, date_gmt TEXT NOT NULL, "
+                "modified_gmt TEXT, author INTEGER, "
+                "sticky INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL, "
+                "data TEXT NOT NULL)"
+            )
+            connection.commit()
+            connection.close()
+
+            mirror = LocalMirror(path)
+            mirror.update_posts(
+                [
+                    make_post(1, "2020-01-01T10:00:00"),
+                    make_post(
+                        2, "2020-02-01T10:00:00", date="2020-02-01T12:00:00"
+                    ),
+                ]
+            )
+            articles, _ = mirror.get_articles(after=datetime(2020, 1, 15))
+
+            self.assertEqual([article["id"] for article in articles], [2])
+            mirror._connection.close()
+
+    def test_cursor(self):
+        first, metadata = self.mirror.get_articles(per_page=2)
+        second, metadata = self.mirror.get_articles(
+            per_page=2,
+            cursor=get_page_cursors(first, True, False)["next_cursor"],
+        )
+
+        self.assertEqual([article["id"] for article in second], [2, 1])
+        self.assertIsNone(metadata["next_cursor"])
+
+        back, metadata = self.mirror.get_articles(
+            per_page=2, cursor=metadata["previous_cursor"]
+        )
+
+        self.assertEqual([article["id"] for article in back], [4, 3])
+        self.assertIsNone(metadata["previous_cursor"])
+
+    def test_get_article(self):
+        article = self.mirror.get_article("/post-2")
+
+        self.assertEqual(article["id"], 2)
+        self.assertEqual(article["content"]["rendered"], "<p>Content</p>")
+        self.assertEqual(self.mirror.get_article("post-5"), {})
+        self.assertEqual(self.mirror.get_article("post-2", tags=[12]), {})
+
+    def test_update_and_delete_posts(self):
+        self.mirror.update_posts([make_post(2, "2020-02-01T10:00:00")])
+        self.assertEqual(self.ids(tags=[10]), [1])
+
+        self.mirror.delete_posts([1])
+        self.assertEqual(self.ids(), [4, 3, 2])
+
+    def test_sync(self):
+        self.mirror.sync(
+            FakeAPI(
+                [make_post(6, "2021-01-01T10:00:00")],
+                {"tags": [{"id": 10, "slug": "design", "name": "Design"}]},
+            )
+        )
+
+        self.assertEqual(self.ids(), [6])
+        self.assertEqual(
+            self.mirror.get_term_by_slug("tags", "design")["id"], 10
+        )
+
+    def test_sync_again(self):
+        cache = ResponseCache()
+        session = PagedSession(
+            {
+                "posts": [make_post(6, "2021-01-01T10:00:00")],
+                "tags": [{"id": 10, "slug": "design", "name": "Design"}],
+            }
+        )
+        api = Wordpress(session=session, cache=cache)
+        self.mirror.sync(api)
+
+        session.items = {
+            "posts": [
+                make_post(6, "2021-01-01T10:00:00", title={"rendered": "New"}),
+                make_post(7, "2021-02-01T10:00:00"),
+            ],
+            "tags": [{"id": 11, "slug": "design", "name": "Design"}],
+        }
+        self.mirror.sync(api)
+
+        articles, _ = self.mirror.get_articles()
+
+        self.assertEqual([article["id"] for article in articles], [7, 6])
+        self.assertEqual(articles[1]["title"]["rendered"], "New")
+        self.assertEqual(
+            self.mirror.get_term_by_slug("tags", "design")["id"], 11
+        )
+        self.assertEqual(len(cache), 0)
+
+    def test_terms_from_mirror(self):
+        self.mirror.sync(
+            FakeAPI(
+                terms={
+                    "tags": [{"id": 10, "slug": "design", "name": "Design"}],
+                    "categories": [{"id": 5, "slug": "news", "name": "News"}],
+                    "group": [{"id": 7, "slug": "cloud", "name": "Cloud"}],
+                    "users": [{"id": 2, "slug": "jane", "name": "Jane"}],
+                }
+            )
+        )
+        session = PagedSession({})
+        api = BlogAPI(session=session, mirror=self.mirror)
+
+        self.assertEqual(api.get_tag_by_slug("design")["id"], 10)
+        self.assertEqual(api.get_tag_by_id(10)["slug"], "design")
+        self.assertEqual(api.get_category_by_slug("news")["id"], 5)
+        self.assertEqual(api.get_category_by_id("5")["slug"], "news")
+        self.assertEqual(api.get_group_by_slug("cloud")["id"], 7)
+        self.assertEqual(api.get_group_by_id(7)["slug"], "cloud")
+        self.assertEqual(api.get_user_by_username("jane")["id"], 2)
+        self.assertEqual(api.get_user_by_id(2)["slug"], "jane")
+        self.assertEqual(session.requested_urls, [])
+
+        # Terms created since the sync are looked up in Wordpress
+        self.assertEqual(api.get_tag_by_slug("new-tag"), {})
+        self.assertEqual(len(session.requested_urls), 1)
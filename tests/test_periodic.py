@@ -0,0 +1,45 @@
+# Standard library
+import threading
+import time
+import unittest
+
+# Local
+from canonicalwebteam.blog.periodic import PeriodicCall
+
+
+class TestPeriodicCall(unittest.TestCase):
+    def test_calls_until_stopped(self):
+        calls = []
+        called_again = threading.Event()
+
+        def function():
+            calls.append(len(calls))
+
+            # An error doesn't stop the next calls
+            if len(calls) == 1:
+                raise ValueError("First call")
+
+            if len(calls) == 3:
+                called_again.set()
+
+        periodic = PeriodicCall(function)
+
+        with self.assertRaises(ValueError):
+            periodic.start(0.01)
+
+        self.assertTrue(called_again.wait(5))
+        periodic.stop()
+        stopped_at = len(calls)
+        time.sleep(0.05)
+
+        self.assertEqual(len(calls), stopped_at)
+        self.assertIsNone(periodic._timer)
+
+    def test_stop_while_running(self):
+        calls = []
+        periodic = PeriodicCall(lambda: calls.append(periodic.stop()))
+
+        periodic.start(0.01)
+
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(periodic._timer)
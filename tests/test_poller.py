@@ -0,0 +1,136 @@
+# Standard library
+import unittest
+
+# Local
+from canonicalwebteam.blog import ChangePoller, PostChanges
+
+
+class FakeAPI:
+    """
+    Serve posts and terms for get_all_pages, filtering posts
+    by modified_after, and record the invalidated tags
+    """
+
+    def __init__(self, posts, terms=None):
+        self.posts = posts
+        self.terms = terms or {}
+        self.invalidated = []
+        self.requests = []
+
+    def get_all_pages(
+        self, endpoint, params={}, embed=False, fields=None, cached=True
+    ):
+        self.requests.append((endpoint, params, cached))
+
+        if endpoint != "posts":
+            return self.terms.get(endpoint, [])
+
+        modified_after = params.get("modified_after")
+
+        return [
+            post
+            for post in self.posts
+            if not modified_after or post["modified"] > modified_after
+        ]
+
+    def invalidate(self, tags):
+        self.invalidated.append(tags)
+
+
+def make_post(id, modified, tags=(), author=1):
+    return {
+        "id": id,
+        "slug": f"post-{id}",
+        "modified": modified,
+        "author": author,
+        "tags": list(tags),
+        "categories": [],
+        "group": [],
+    }
+
+
+class TestChangePoller(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeAPI(
+            [
+                make_post(1, "2020-01-01T10:00:00", tags=[10]),
+                make_post(2, "2020-01-02T10:00:00", tags=[11]),
+            ],
+            {"tags": [{"id": 10, "slug": "design", "name": "Design"}]},
+        )
+        self.poller = ChangePoller(self.api)
+
+    def test_first_poll_records_state(self):
+        changes = self.poller.poll()
+
+        self.assertFalse(changes)
+        self.assertEqual(self.api.invalidated, [])
+        self.assertTrue(all(not cached for _, _, cached in self.api.requests))
+
+    def test_modified_posts(self):
+        self.poller.poll()
+        self.api.requests = []
+        self.api.posts = [
+            make_post(1, "2020-01-03T10:00:00", tags=[12]),
+            make_post(2, "2020-01-02T10:00:00", tags=[11]),
+            make_post(3, "2020-01-03T10:00:00"),
+        ]
+
+        changes = self.poller.poll()
+
+        # Only posts modified since the last poll are fetched
+        endpoint, params, _ = self.api.requests[0]
+        self.assertEqual(endpoint, "posts")
+        self.assertEqual(params["modified_after"], "2020-01-02T09:59:59")
+        self.assertEqual(params["orderby"], "modified")
+
+        self.assertEqual([post["id"] for post in changes.added], [3])
+        self.assertEqual([post["id"] for post in changes.updated], [1])
+
+        tags = self.api.invalidated[0]
+        self.assertIn("post:1", tags)
+        self.assertIn("tag:10", tags)
+        self.assertIn("tag:12", tags)
+        self.assertIn("slug:post-3", tags)
+        self.assertIn("posts:all", tags)
+        self.assertNotIn("post:2", tags)
+
+        # Nothing new
+        self.assertFalse(self.poller.poll())
+
+    def test_sweep_finds_deleted_posts_and_changed_terms(self):
+        self.poller.poll()
+        self.poller.sweep_interval = 0
+        self.api.posts = self.api.posts[:1]
+        self.api.terms = {"tags": [{"id": 10, "slug": "design", "name": "UX"}]}
+        listened = []
+        self.poller.add_listener(listened.append)
+
+        changes = self.poller.poll()
+
+        self.assertEqual([post["id"] for post in changes.deleted], [2])
+        self.assertEqual(changes.terms["tags"], [10])
+        self.assertEqual([post["id"] for post in changes.updated], [1])
+        self.assertEqual(listened, [changes])
+        self.assertIn("terms:tags", self.api.invalidated[0])
+        self.assertIn("post:2", self.api.invalidated[0])
+
+
+class TestPostChanges(unittest.TestCase):
+    def test_dependency_tags(self):
+        changes = PostChanges(
+            updated=[make_post(1, "2020-01-01T10:00:00", tags=[5])],
+            previous=[make_post(1, "2019-01-01T10:00:00", tags=[4])],
+        )
+
+        self.assertEqual(
+            changes.get_dependency_tags(),
+            {
+                "posts:all",
+                "post:1",
+                "slug:post-1",
+                "tag:4",
+                "tag:5",
+                "author:1",
+            },
+        )
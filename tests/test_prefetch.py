@@ -0,0 +1,130 @@
+# Standard library
+import os
+import threading
+import unittest
+
+# Packages
+import flask
+from flask_reggie import Reggie
+
+# Local
+from canonicalwebteam.blog import BlogViews, Prefetcher, build_blueprint
+from tests.helpers import FakeAPI, make_post
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+def make_api():
+    """
+    Three pages of two posts tagged "snaps", with per_page=2
+    """
+
+    return FakeAPI(
+        [make_post(id, tags=[1]) for id in range(1, 7)],
+        {"tags": [{"id": 1, "slug": "snaps", "name": "Snaps"}]},
+    )
+
+
+def get_pages(api):
+    return [call.get("page") for call in api.get_calls("get_articles")]
+
+
+def get_slugs(api):
+    return [call["slug"] for call in api.get_calls("get_article")]
+
+
+class TestPrefetcher(unittest.TestCase):
+    def test_drops_when_busy(self):
+        prefetcher = Prefetcher(max_concurrent=1)
+        release = threading.Event()
+
+        self.assertTrue(prefetcher.prefetch("a", release.wait))
+        self.assertFalse(prefetcher.prefetch("b", lambda: None))
+
+        release.set()
+        prefetcher._executor.shutdown(wait=True)
+
+        self.assertFalse(prefetcher.is_prefetching())
+
+    def test_same_key(self):
+        prefetcher = Prefetcher(max_concurrent=2)
+        release = threading.Event()
+
+        self.assertTrue(prefetcher.prefetch("a", release.wait))
+        self.assertFalse(prefetcher.prefetch("a", release.wait))
+
+        release.set()
+        prefetcher._executor.shutdown(wait=True)
+
+    def test_skips_recent_keys(self):
+        prefetcher = Prefetcher(ttl=60)
+        calls = []
+
+        self.assertTrue(prefetcher.prefetch("a", lambda: calls.append(1)))
+        prefetcher._executor.shutdown(wait=True)
+
+        self.assertFalse(prefetcher.prefetch("a", lambda: calls.append(2)))
+        self.assertEqual(calls, [1])
+
+    def test_no_nested_prefetches(self):
+        prefetcher = Prefetcher()
+        nested = []
+
+        def prefetch():
+            nested.append(prefetcher.prefetch("b", lambda: None))
+            raise Exception("Ignored")
+
+        prefetcher.prefetch("a", prefetch)
+        prefetcher._executor.shutdown(wait=True)
+
+        self.assertEqual(nested, [False])
+
+
+class TestPrefetchViews(unittest.TestCase):
+    def test_next_page_and_articles(self):
+        api = make_api()
+        prefetcher = Prefetcher(max_concurrent=4, article_count=1)
+        views = BlogViews(api=api, per_page=2, prefetcher=prefetcher)
+
+        context = views.get_tag("snaps", page=1)
+        prefetcher._executor.shutdown(wait=True)
+
+        self.assertEqual(context["current_page"], 1)
+        self.assertIn(2, get_pages(api))
+        self.assertIn("post-6", get_slugs(api))
+        self.assertNotIn("post-5", get_slugs(api))
+
+        # Prefetched pages don't prefetch further
+        self.assertNotIn(3, get_pages(api))
+        self.assertNotIn("post-4", get_slugs(api))
+
+    def test_last_page(self):
+        api = make_api()
+        prefetcher = Prefetcher(article_count=0)
+        views = BlogViews(api=api, per_page=2, prefetcher=prefetcher)
+
+        views.get_tag("snaps", page=3)
+
+        self.assertIsNone(prefetcher._executor)
+
+    def test_after_response(self):
+        api = make_api()
+        prefetcher = Prefetcher(max_concurrent=4, article_count=1)
+        views = BlogViews(api=api, per_page=2, prefetcher=prefetcher)
+
+        app = flask.Flask(
+            "main", template_folder=f"{this_dir}/fixtures/templates"
+        )
+        Reggie().init_app(app)
+        app.register_blueprint(build_blueprint(views), url_prefix="/")
+
+        response = app.test_client().get("/tag/snaps")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(2, get_pages(api))
+
+        response.close()
+        prefetcher._executor.shutdown(wait=True)
+
+        self.assertIn(2, get_pages(api))
+        self.assertIn("post-6", get_slugs(api))
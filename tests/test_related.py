@@ -0,0 +1,167 @@
+# Standard library
+import unittest
+
+# Local
+from canonicalwebteam.blog import (
+    BlogViews,
+    LazyArticle,
+    PostChanges,
+    RelatedArticlesIndex,
+    RelatedArticlesTable,
+)
+from tests.helpers import FakeAPI, make_post
+
+ARTICLES = [
+    make_post(1, tags=[1, 2, 3]),
+    make_post(2, tags=[1, 2]),
+    make_post(3, tags=[1]),
+    make_post(4, tags=[1, 2, 3, 4]),
+    make_post(5, tags=[2, 5]),
+    make_post(6, tags=[6]),
+]
+
+
+def make_api():
+    """
+    Serve the articles two per page
+    """
+
+    return FakeAPI(ARTICLES, page_size=2)
+
+
+class TestRelatedArticlesIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = RelatedArticlesIndex(make_api())
+        self.index.load()
+
+    def get_related(self, *args, **kwargs):
+        return [
+            (article["id"], article["compatibility"])
+            for article in self.index.get_related(*args, **kwargs)
+        ]
+
+    def test_load(self):
+        self.assertEqual(len(self.index), 6)
+
+    def test_most_compatible_and_newest_first(self):
+        self.assertEqual(
+            self.get_related([1, 2, 3], exclude=[1]),
+            [(4, 3), (2, 2), (5, 1)],
+        )
+        self.assertEqual(
+            self.get_related([1, 2, 3], exclude=[1], count=5),
+            [(4, 3), (2, 2), (5, 1), (3, 1)],
+        )
+
+    def test_required_and_excluded_tags(self):
+        self.assertEqual(
+            self.get_related([1, 2, 3], required_tag_ids=[2], exclude=[1]),
+            [(4, 3), (2, 2), (5, 1)],
+        )
+        self.assertEqual(
+            self.get_related([1, 2, 3], excluded_tag_ids=[4], exclude=[1]),
+            [(2, 2), (5, 1), (3, 1)],
+        )
+        self.assertEqual(self.get_related([1], required_tag_ids=[7]), [])
+
+    def test_without_tags(self):
+        self.assertEqual(
+            self.get_related([], exclude=[6]), [(5, 0), (4, 0), (3, 0)]
+        )
+
+    def test_copies(self):
+        related = self.index.get_related([6])
+
+        self.assertEqual(related[0]["compatibility"], 1)
+        self.assertNotIn("compatibility", ARTICLES[5])
+
+    def test_lazy_articles(self):
+        article = LazyArticle(ARTICLES[5])
+        article.defer("excerpt", lambda _: "Transformed")
+        self.index.update([article])
+
+        related = self.index.get_related([6])
+
+        self.assertEqual(related[0]["excerpt"], "Transformed")
+
+
+class TestRelatedArticlesTable(unittest.TestCase):
+    def setUp(self):
+        self.api = make_api()
+        self.table = RelatedArticlesTable(
+            RelatedArticlesIndex(self.api), related_tag_ids=[1]
+        )
+        self.table.load()
+
+    def get_related(self, article_id, *args):
+        return [
+            (article["id"], article["compatibility"])
+            for article in self.table.get_related(article_id, *args)
+        ]
+
+    def test_load(self):
+        self.assertEqual(len(self.table), 6)
+        self.assertEqual(self.get_related(1, [1]), [(4, 3), (2, 2), (3, 1)])
+        self.assertEqual(self.get_related(6, [1]), [])
+
+    def test_other_tags(self):
+        self.assertIsNone(self.table.get_related(1))
+        self.assertIsNone(self.table.get_related(1, [1], [4]))
+        self.assertIsNone(self.table.get_related(7, [1]))
+
+    def test_update(self):
+        updated = make_post(6, tags=[1, 3])
+        added = make_post(7, tags=[1])
+        self.api.update_posts([updated, added])
+        self.api.delete_posts([4])
+        self.api.calls = []
+
+        self.table.update(
+            PostChanges(
+                added=[added],
+                updated=[updated],
+                deleted=[ARTICLES[3]],
+                previous=[ARTICLES[5]],
+            )
+        )
+
+        self.assertEqual(
+            self.api.calls,
+            [("get_articles", {"include": [7, 6], "per_page": 2})],
+        )
+        self.assertEqual(len(self.table), 6)
+        self.assertEqual(self.get_related(1, [1]), [(6, 2), (2, 2), (7, 1)])
+        self.assertEqual(self.get_related(6, [1]), [(1, 2), (7, 1), (3, 1)])
+        self.assertIsNone(self.table.get_related(4, [1]))
+
+
+class TestRelatedArticlesViews(unittest.TestCase):
+    def test_article_context(self):
+        api = make_api()
+        index = RelatedArticlesIndex(api)
+        index.load()
+        api.calls = []
+
+        views = BlogViews(api=api, related_index=index)
+        context = views._get_article_context(ARTICLES[0], [2])
+
+        self.assertEqual(api.calls, [])
+        self.assertEqual(
+            [article["id"] for article in context["related_articles"]],
+            [4, 2, 5],
+        )
+
+    def test_article_context_from_table(self):
+        api = make_api()
+        table = RelatedArticlesTable(RelatedArticlesIndex(api))
+        table.load()
+        api.calls = []
+
+        views = BlogViews(api=api, related_table=table)
+        context = views._get_article_context(ARTICLES[0], [], [])
+
+        self.assertEqual(api.calls, [])
+        self.assertEqual(
+            [article["id"] for article in context["related_articles"]],
+            [4, 2, 5],
+        )
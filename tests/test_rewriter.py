@@ -0,0 +1,54 @@
+# Standard library
+import unittest
+
+# Packages
+from bs4 import BeautifulSoup
+
+# Local
+from canonicalwebteam.blog.rewriter import rewrite_images
+
+
+class TestRewriteImages(unittest.TestCase):
+    def test_matches_beautifulsoup(self):
+        documents = [
+            "Tom &amp; Jerry &#8217; &nbsp; &foo; &#150; &#x2019; &copy",
+            "<p>unclosed <b>bold <i>italic</b> after</i> tail",
+            "<br></br><img src=x></img><hr/></hr>text</br><div/>",
+            "<p>a</p>  \n  <p>b</p> <!----><!--\n\n--><pre>  \n  </pre>",
+            "<script>if (a < b && c) {}</script><style>a>b{}</style>",
+            "<a class='  x   y ' title='say \"hi\"' data-x=\"it's\">l</a>",
+            "<img src=a src=b alt><input disabled><P CLASS=Up>Caps",
+            "<!DOCTYPE html><![CDATA[x<y]]><?php echo 1 ?>x < y",
+        ]
+
+        for document in documents:
+            self.assertEqual(
+                rewrite_images(document),
+                str(BeautifulSoup(document, "html.parser")),
+            )
+
+    def test_replace_image(self):
+        def replace_image(image):
+            if image["src"] == "skip.png":
+                return None
+
+            return f'<img src="{image["src"]}?w={image["width"]}" />'
+
+        html = rewrite_images(
+            '<p><img src="a.png" width="10"></p><img src="skip.png">',
+            replace_image,
+        )
+
+        self.assertEqual(
+            html, '<p><img src="a.png?w=10" /></p><img src="skip.png"/>'
+        )
+
+    def test_rewrite_text(self):
+        html = rewrite_images(
+            '<a href="http://old.example">old.example</a><!-- old -->',
+            rewrite_text=lambda text: text.replace("old", "new"),
+        )
+
+        self.assertEqual(
+            html, '<a href="http://new.example">new.example</a><!-- new -->'
+        )
@@ -0,0 +1,94 @@
+# Standard library
+import unittest
+
+# Local
+from canonicalwebteam.blog import TaxonomyIndex, Wordpress
+from tests.helpers import PagedSession
+
+
+class TestTaxonomyIndex(unittest.TestCase):
+    def setUp(self):
+        self.session = PagedSession(
+            {
+                "categories": [
+                    {"id": 1, "slug": "events", "name": "Events"},
+                    {"id": 2, "slug": "webinars", "name": "Webinars"},
+                    {"id": 3, "slug": "articles", "name": "Articles"},
+                ],
+                "tags": [{"id": 10, "slug": "design", "name": "Design"}],
+                "group": [{"id": 20, "slug": "ai", "name": "AI"}],
+                "users": [{"id": 30, "slug": "canonical", "name": "C"}],
+            }
+        )
+        self.index = TaxonomyIndex(Wordpress(session=self.session))
+
+    def test_load_pages_through_every_taxonomy(self):
+        self.index.load()
+
+        # Two pages of categories, one for each of the other taxonomies
+        self.assertEqual(len(self.session.requested_urls), 5)
+        for url in self.session.requested_urls:
+            self.assertIn("per_page=100", url)
+
+    def test_lookups_are_local(self):
+        self.index.load()
+        self.session.requested_urls = []
+
+        self.assertEqual(self.index.get_category_by_slug("articles")["id"], 3)
+        self.assertEqual(self.index.get_category_by_id(1)["slug"], "events")
+        self.assertEqual(self.index.get_tag_by_slug("design")["id"], 10)
+        self.assertEqual(self.index.get_tag_by_id("10")["slug"], "design")
+        self.assertEqual(self.index.get_group_by_slug("ai")["id"], 20)
+        self.assertEqual(
+            self.index.get_user_by_username("canonical")["id"], 30
+        )
+        self.assertEqual(self.session.requested_urls, [])
+
+    def test_misses_fall_back_to_the_api(self):
+        self.assertEqual(self.index.get_tag_by_slug("design")["id"], 10)
+        self.assertEqual(self.index.get_tag_by_slug("not-exist"), {})
+        self.assertEqual(len(self.session.requested_urls), 2)
+
+    def test_bulk_lookups(self):
+        self.index.load()
+        self.session.requested_urls = []
+
+        categories = self.index.get_categories_by_slugs(
+            ["webinars", "events", "not-exist"]
+        )
+
+        self.assertEqual([c["id"] for c in categories], [2, 1])
+        self.assertEqual(len(self.session.requested_urls), 1)
+        self.assertIn("slug=not-exist", self.session.requested_urls[0])
+
+
+class TestWordpressBulkLookups(unittest.TestCase):
+    def setUp(self):
+        self.session = PagedSession(
+            {
+                "tags": [
+                    {"id": id, "slug": f"tag-{id}", "name": f"Tag {id}"}
+                    for id in range(1, 151)
+                ],
+            },
+            page_size=100,
+        )
+        self.api = Wordpress(session=self.session)
+
+    def test_ids_are_fetched_in_one_request(self):
+        tags = self.api.get_tags_by_ids([3, "1", 2, 3])
+
+        self.assertEqual([tag["id"] for tag in tags], [3, 1, 2])
+        self.assertEqual(len(self.session.requested_urls), 1)
+        self.assertIn("include=3%2C1%2C2", self.session.requested_urls[0])
+        self.assertNotIn("per_page", self.session.requested_urls[0])
+
+    def test_requests_are_chunked(self):
+        slugs = [f"tag-{id}" for id in range(1, 151)]
+
+        tags = self.api.get_tags_by_slugs(slugs)
+
+        self.assertEqual([tag["slug"] for tag in tags], slugs)
+        self.assertEqual(len(self.session.requested_urls), 2)
+        self.assertIn("per_page=100", self.session.requested_urls[0])
+        self.assertIn("per_page=50", self.session.requested_urls[1])